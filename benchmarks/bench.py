@@ -0,0 +1,299 @@
+"""
+Benchmark suite cho pdf2zh, chạy hoàn toàn local (StubTranslator thay API):
+
+    python benchmarks/bench.py --pages 20 --out results.json
+    python benchmarks/bench.py --compare results.json      # so với baseline
+    python benchmarks/bench.py --large-pages 1000 -k convert
+
+Mỗi benchmark chạy trong một process mới (spawn) để peak RSS không bị lẫn;
+PDF đầu vào được sinh trước (benchmarks/synthetic.py) và không tính giờ.
+Kết quả: wall time (s), peak RSS (MB), kích thước output (byte) mỗi case.
+"""
+import fnmatch
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import click
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+for d in (this_dir, src_dir):
+    if d not in sys.path:
+        sys.path.insert(0, d)
+
+from synthetic import KINDS, make_pdf  # noqa: E402
+
+
+@dataclass
+class BenchResult:
+    name: str
+    wall: float            # giây, chỉ phần được đo
+    peak_rss_mb: float     # peak RSS của process benchmark (+ process con)
+    output_bytes: int = 0
+    items: int = 0         # số trang / block / segment đã xử lý
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS (MB) của process hiện tại và các process con đã kết thúc."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return 0.0
+        return psutil.Process().memory_info().peak_wset / 2**20
+    scale = 1 if sys.platform == "darwin" else 1024  # macOS: byte, Linux: KB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return max(own, children) / 2**20
+
+
+class Timer:
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.seconds = time.perf_counter() - self.start
+
+
+# --- Các benchmark: (ctx) -> (wall, output_bytes, items) ---
+
+def _extract_all(pdf: str) -> List[Any]:
+    import fitz
+    from pdf2zh.core import PageCoordinates
+    with fitz.open(pdf) as doc:
+        return [PageCoordinates.from_page(i, page) for i, page in enumerate(doc)]
+
+
+def bench_from_page(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    import fitz
+    from pdf2zh.core import PageCoordinates
+    with fitz.open(ctx["pdf"]) as doc:
+        with Timer() as t:
+            for i, page in enumerate(doc):
+                PageCoordinates.from_page(i, page)
+        return t.seconds, 0, len(doc)
+
+
+def bench_detect_paragraphs(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    from pdf2zh.core import detect_paragraphs
+    pages = _extract_all(ctx["pdf"])
+    with Timer() as t:
+        paras = sum(len(detect_paragraphs(pc.blocks)) for pc in pages)
+    return t.seconds, 0, paras
+
+
+def bench_reflow(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    from pdf2zh.core import _find_system_vn_font, text_blocks_of
+    from pdf2zh.layout import ReflowRenderer
+    blocks = [b for pc in _extract_all(ctx["pdf"]) for b in text_blocks_of(pc)]
+    fontfile = _find_system_vn_font()
+    fontname = "ReflowFont" if fontfile else None
+    renderer = ReflowRenderer()
+    with Timer() as t:
+        for b in blocks:
+            # bản dịch thường dài hơn bản gốc -> ép reflow phải co font
+            renderer.reflow(b.text + " " + b.text[: len(b.text) // 3], fontfile, fontname,
+                            b.font_size or 12.0, b.bbox.width, b.bbox.height)
+    return t.seconds, 0, len(blocks)
+
+
+def bench_render_page(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    import fitz
+    from pdf2zh.core import text_blocks_of
+    from pdf2zh.layout import ReflowRenderer
+    pages = _extract_all(ctx["pdf"])
+    renderer = ReflowRenderer()
+    out = fitz.open()
+    with Timer() as t:
+        for pc in pages:
+            blocks = text_blocks_of(pc)
+            page = out.new_page(width=pc.width, height=pc.height)
+            renderer.render_page(page, blocks, [f"[vi] {b.text}" for b in blocks], False)
+    data = out.tobytes(garbage=3, deflate=True)
+    out.close()
+    return t.seconds, len(data), len(pages)
+
+
+def _translator(ctx: Dict[str, Any]) -> Any:
+    # --replay: phát lại latency/bản dịch thật đã ghi bằng RecordingTranslator
+    if ctx.get("replay"):
+        from pdf2zh.translator.replay_translator import ReplayTranslator
+        return ReplayTranslator(ctx["replay"], scale=ctx["replay_scale"], on_miss="echo")
+    from pdf2zh.translator.stub_translator import StubTranslator
+    return StubTranslator(ctx["latency"], ctx["jitter"])
+
+
+def bench_cached_translator(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    from pdf2zh.cache import CachedTranslator
+    from pdf2zh.core import text_blocks_of
+    texts = [b.text for pc in _extract_all(ctx["pdf"]) for b in text_blocks_of(pc)]
+    db = os.path.join(ctx["work_dir"], "bench_cache.db")
+    if os.path.exists(db):
+        os.remove(db)
+    tr = CachedTranslator(_translator(ctx), db)
+    with Timer() as t:
+        tr.translate(texts, "auto", "Vietnamese")   # miss
+        tr.translate(texts, "auto", "Vietnamese")   # hit
+    return t.seconds, os.path.getsize(db), 2 * len(texts)
+
+
+def bench_convert_pdf(ctx: Dict[str, Any]) -> Tuple[float, int, int]:
+    import fitz
+    from pdf2zh.core import convert_pdf
+    out_pdf = os.path.join(ctx["work_dir"], f"out_{os.getpid()}.pdf")
+    translator = _translator(ctx)
+    with Timer() as t:
+        convert_pdf(ctx["pdf"], out_pdf, "Vietnamese", api_key="", debug=False,
+                    translator=translator, **ctx.get("convert_kwargs", {}))
+    size = os.path.getsize(out_pdf)
+    with fitz.open(out_pdf) as doc:
+        pages = len(doc)
+    os.remove(out_pdf)
+    return t.seconds, size, pages
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[Dict[str, Any]], Tuple[float, int, int]]
+    kind: str
+    pages: int
+    convert_kwargs: Optional[Dict[str, Any]] = None
+
+
+def build_cases(pages: int, large_pages: int) -> List[Case]:
+    cases: List[Case] = []
+    for kind in KINDS:
+        cases.append(Case(f"from_page/{kind}", bench_from_page, kind, pages))
+    for kind in ("single", "multi", "table"):
+        cases.append(Case(f"detect_paragraphs/{kind}", bench_detect_paragraphs, kind, pages))
+    cases.append(Case("reflow/multi", bench_reflow, "multi", pages))
+    cases.append(Case("render_page/multi", bench_render_page, "multi", pages))
+    cases.append(Case("cached_translator/single", bench_cached_translator, "single", pages))
+    for kind in KINDS:
+        cases.append(Case(f"convert/{kind}", bench_convert_pdf, kind, pages))
+    cases.append(Case("convert/images-overlay", bench_convert_pdf, "images", pages,
+                      {"mode": "overlay"}))
+    if large_pages:
+        cases.append(Case(f"convert/single-{large_pages}p-stream", bench_convert_pdf, "single",
+                          large_pages, {"stream_window": 32}))
+    return cases
+
+
+def _child(fn: Callable, ctx: Dict[str, Any], results: Any) -> None:
+    try:
+        wall, size, items = fn(ctx)
+        results.put(("ok", (wall, size, items, peak_rss_mb())))
+    except BaseException as e:
+        results.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def run_case(case: Case, ctx: Dict[str, Any]) -> BenchResult:
+    spawn = mp.get_context("spawn")
+    results = spawn.Queue()
+    proc = spawn.Process(target=_child, args=(case.fn, ctx, results))
+    proc.start()
+    status, payload = results.get()
+    proc.join()
+    if status != "ok":
+        raise RuntimeError(f"{case.name}: {payload}")
+    wall, size, items, rss = payload
+    return BenchResult(case.name, wall, rss, size, items)
+
+
+def compare(results: List[BenchResult], baseline_path: str, threshold: float) -> int:
+    """In bảng so sánh với baseline, trả về số case chậm hơn quá threshold."""
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = 0
+    click.echo(f"\n{'case':<34} {'wall':>9} {'base':>9} {'ratio':>7} {'rss':>8} {'base':>8}")
+    for r in results:
+        b = base.get(r.name)
+        if b is None:
+            click.echo(f"{r.name:<34} {r.wall:>8.4f}s {'-':>9}")
+            continue
+        ratio = r.wall / b["wall"] if b["wall"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- slower"
+            regressions += 1
+        click.echo(
+            f"{r.name:<34} {r.wall:>8.4f}s {b['wall']:>8.4f}s {ratio:>6.2f}x "
+            f"{r.peak_rss_mb:>6.0f}MB {b['peak_rss_mb']:>6.0f}MB{flag}"
+        )
+    return regressions
+
+
+@click.command()
+@click.option("--pages", type=int, default=20, show_default=True, help="Pages per synthetic PDF.")
+@click.option("--large-pages", type=int, default=0,
+              help="Also run a streaming convert on a PDF this long (e.g. 1000).")
+@click.option("--latency", type=float, default=0.0, show_default=True,
+              help="Fake translator latency per segment (s).")
+@click.option("--jitter", type=float, default=0.0, show_default=True,
+              help="Uniform +/- jitter added to the latency (s).")
+@click.option("--replay", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Replay a RecordingTranslator log instead of the stub translator.")
+@click.option("--replay-scale", type=float, default=1.0, show_default=True,
+              help="Multiply recorded latencies (with --replay).")
+@click.option("-k", "--only", "patterns", multiple=True,
+              help="Run only cases matching this glob (repeatable), e.g. 'convert/*'.")
+@click.option("--work-dir", type=click.Path(file_okay=False), default=None,
+              help="Where synthetic PDFs are cached (default: temp dir).")
+@click.option("--out", type=click.Path(dir_okay=False), default=None, help="Write results JSON.")
+@click.option("--compare", "baseline", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Baseline results JSON to compare against.")
+@click.option("--threshold", type=float, default=0.2, show_default=True,
+              help="Relative slowdown reported as a regression.")
+def main(
+    pages, large_pages, latency, jitter, replay, replay_scale,
+    patterns, work_dir, out, baseline, threshold
+) -> None:
+    work_dir = work_dir or tempfile.mkdtemp(prefix="pdf2zh_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    cases = build_cases(pages, large_pages)
+    if patterns:
+        cases = [c for c in cases if any(fnmatch.fnmatch(c.name, p) for p in patterns)]
+
+    results: List[BenchResult] = []
+    for case in cases:
+        pdf = os.path.join(work_dir, f"{case.kind}_{case.pages}.pdf")
+        if not os.path.exists(pdf):
+            make_pdf(pdf, case.kind, case.pages)
+        ctx = {
+            "pdf": pdf,
+            "work_dir": work_dir,
+            "latency": latency,
+            "jitter": jitter,
+            "replay": os.path.abspath(replay) if replay else None,
+            "replay_scale": replay_scale,
+            "convert_kwargs": case.convert_kwargs or {},
+        }
+        r = run_case(case, ctx)
+        results.append(r)
+        click.echo(
+            f"[BENCH] {r.name:<34} {r.wall:>9.4f}s  rss {r.peak_rss_mb:>6.0f}MB  "
+            f"out {r.output_bytes:>9}B  items {r.items}"
+        )
+
+    if out:
+        meta = {"pages": pages, "large_pages": large_pages, "latency": latency,
+                "jitter": jitter, "replay": replay, "python": sys.version.split()[0]}
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": [asdict(r) for r in results]}, f, indent=2)
+        click.echo(f"[SAVE] {out}")
+    if baseline and compare(results, baseline, threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Sinh PDF tổng hợp cho benchmark (deterministic, không cần file mẫu):
+  single   : một cột văn bản
+  multi    : hai cột
+  table    : bảng dày đặc (nhiều ô text nhỏ)
+  images   : nhiều ảnh raster + caption
+Mọi kind đều sinh được tài liệu rất dài (vd 1000+ trang) qua `pages`.
+"""
+import random
+from typing import Callable, Dict
+
+import fitz  # PyMuPDF
+
+WORDS = (
+    "the model layer attention training data results method network feature "
+    "performance image learning sequence token input output baseline accuracy "
+    "experiment dataset loss embedding encoder decoder section figure table"
+).split()
+
+PAGE_W, PAGE_H = 595, 842  # A4
+MARGIN = 56
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 4) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(sentences))
+
+
+def _column_page(page: fitz.Page, rng: random.Random, columns: int) -> None:
+    gap = 20
+    col_w = (PAGE_W - 2 * MARGIN - gap * (columns - 1)) / columns
+    page.insert_text((MARGIN, MARGIN), f"Section {page.number + 1}", fontsize=16)
+    for c in range(columns):
+        x0 = MARGIN + c * (col_w + gap)
+        y = MARGIN + 30
+        while y < PAGE_H - MARGIN - 90:
+            rect = fitz.Rect(x0, y, x0 + col_w, y + 90)
+            page.insert_textbox(rect, _paragraph(rng), fontsize=9)
+            y += 100
+    page.insert_text((PAGE_W / 2, PAGE_H - 30), str(page.number + 1), fontsize=8)
+
+
+def _single(page: fitz.Page, rng: random.Random) -> None:
+    _column_page(page, rng, 1)
+
+
+def _multi(page: fitz.Page, rng: random.Random) -> None:
+    _column_page(page, rng, 2)
+
+
+def _table(page: fitz.Page, rng: random.Random) -> None:
+    rows, cols = 40, 6
+    cell_w = (PAGE_W - 2 * MARGIN) / cols
+    cell_h = (PAGE_H - 2 * MARGIN - 30) / rows
+    page.insert_text((MARGIN, MARGIN), f"Table {page.number + 1}", fontsize=12)
+    for r in range(rows):
+        for c in range(cols):
+            x0 = MARGIN + c * cell_w
+            y0 = MARGIN + 20 + r * cell_h
+            rect = fitz.Rect(x0, y0, x0 + cell_w, y0 + cell_h)
+            page.draw_rect(rect, color=(0, 0, 0), width=0.3)
+            text = rng.choice(WORDS) if c == 0 else f"{rng.uniform(0, 100):.2f}"
+            page.insert_text((x0 + 2, y0 + cell_h - 4), text, fontsize=6)
+
+
+def _image(rng: random.Random, size: int = 128) -> bytes:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+    pix.clear_with(rng.randint(0, 255))
+    # vài dải màu để ảnh không nén về gần 0 byte
+    for y in range(0, size, 8):
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        pix.set_rect(fitz.IRect(0, y, size, y + 4), color)
+    return pix.tobytes("png")
+
+
+def _images(page: fitz.Page, rng: random.Random) -> None:
+    w = (PAGE_W - 2 * MARGIN - 20) / 2
+    h = 150
+    for k in range(4):
+        x0 = MARGIN + (k % 2) * (w + 20)
+        y0 = MARGIN + (k // 2) * (h + 80)
+        page.insert_image(fitz.Rect(x0, y0, x0 + w, y0 + h), stream=_image(rng))
+        page.insert_textbox(
+            fitz.Rect(x0, y0 + h + 5, x0 + w, y0 + h + 60),
+            f"Figure {k + 1}. " + _sentence(rng, 14),
+            fontsize=8,
+        )
+    page.insert_textbox(
+        fitz.Rect(MARGIN, PAGE_H - MARGIN - 200, PAGE_W - MARGIN, PAGE_H - MARGIN),
+        _paragraph(rng, 6),
+        fontsize=9,
+    )
+
+
+KINDS: Dict[str, Callable[[fitz.Page, random.Random], None]] = {
+    "single": _single,
+    "multi": _multi,
+    "table": _table,
+    "images": _images,
+}
+
+
+def make_pdf(path: str, kind: str = "single", pages: int = 10, seed: int = 0) -> str:
+    """Ghi PDF tổng hợp `pages` trang loại `kind` ra path (cùng seed -> cùng nội dung)."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind: {kind!r} (expected one of {tuple(KINDS)})")
+    rng = random.Random(seed)
+    draw = KINDS[kind]
+    doc = fitz.open()
+    for _ in range(pages):
+        draw(doc.new_page(width=PAGE_W, height=PAGE_H), rng)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
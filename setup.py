@@ -21,4 +21,10 @@ setup(
         "babeldoc>=0.1.22,<0.3.0",
         "requests>=2.28.0",
     ],
+    entry_points={
+        "console_scripts": [
+            "pdf2zh=pdf2zh.cli:main",
+            "pdf2zh-server=pdf2zh.server:main",
+        ],
+    },
 ) 
\ No newline at end of file
@@ -4,14 +4,21 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel,
     QComboBox, QPushButton, QSplitter,
-    QFileDialog, QMessageBox, QLineEdit
+    QFileDialog, QMessageBox, QLineEdit,
+    QProgressBar, QCheckBox
 )
 from PySide6.QtGui import QFontDatabase
 import pathlib
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, QBuffer, QByteArray, QIODevice, QTimer
 from PySide6.QtPdf import QPdfDocument
 from PySide6.QtPdfWidgets import QPdfView
-from pdf2zh.core import convert_pdf
+from gui.scheduler import PageScheduler
+from gui.worker import TranslateWorker
+
+# số trang dịch trước sau trang đang xem (chế độ on-demand)
+PREFETCH_PAGES = 3
+# gom nhiều trang dịch xong thành một lần nạp lại right view (ms)
+PREVIEW_RELOAD_MS = 300
 
 
 class PdfTranslatorUI(QMainWindow):
@@ -32,6 +39,16 @@ class PdfTranslatorUI(QMainWindow):
 
         # initialize zoom factor
         self.zoom_factor = 1.0
+        # translation worker (chạy trong QThread riêng)
+        self._thread = None
+        self._worker = None
+        self._scheduler = None
+        self._preview = None
+        self._preview_buf = None
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(PREVIEW_RELOAD_MS)
+        self._reload_timer.timeout.connect(self._reload_preview)
 
     def _setup_top_bar(self, vbox):
         # --- Top bar: language selector, Open, Zoom In/Out ---
@@ -66,9 +83,22 @@ class PdfTranslatorUI(QMainWindow):
         self.zoom_out_btn = QPushButton("Zoom Out")
         top_bar.addWidget(self.zoom_out_btn)
 
+        self.on_demand_check = QCheckBox("On demand")
+        self.on_demand_check.setToolTip(
+            f"Translate the page being viewed first, then the next {PREFETCH_PAGES} pages"
+        )
+        self.on_demand_check.setChecked(True)
+        top_bar.addWidget(self.on_demand_check)
+
         self.translate_btn = QPushButton("Translate")
         top_bar.addWidget(self.translate_btn)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(160)
+        self.progress_bar.setFormat("%v/%m")
+        self.progress_bar.hide()
+        top_bar.addWidget(self.progress_bar)
+
     def _setup_pdf_views(self, vbox):
         splitter = QSplitter(Qt.Horizontal)
         vbox.addWidget(splitter)
@@ -157,6 +187,9 @@ class PdfTranslatorUI(QMainWindow):
     def on_left_page_changed(self, page: int):
         total = self.doc.pageCount()
         self.left_page_label.setText(f"{page + 1}/{total}")
+        # on-demand: ưu tiên dịch trang đang xem + prefetch vài trang sau
+        if self._scheduler is not None:
+            self._scheduler.focus(page)
     
     def on_right_page_changed(self, page: int):
         total = self.doc.pageCount()
@@ -171,8 +204,15 @@ class PdfTranslatorUI(QMainWindow):
 
     def on_translate(self) -> None:
         """
-        Handle Translate button click: perform translation and load result.
+        Handle Translate button click: start translation in a worker thread,
+        or cancel the running one.
         """
+        if self._worker is not None:
+            self._worker.cancel()
+            self.translate_btn.setEnabled(False)
+            self.translate_btn.setText("Stopping...")
+            return
+
         if not hasattr(self, "current_pdf_path"):
             QMessageBox.warning(self, "No PDF Loaded", "Please open a PDF before translating.")
             return
@@ -187,15 +227,116 @@ class PdfTranslatorUI(QMainWindow):
         base, _ = os.path.splitext(input_pdf)
         output_pdf = f"{base}_{service}_{lang}.pdf"
 
-        convert_pdf(
+        total = self.doc.pageCount()
+        self._scheduler = PageScheduler(
+            total,
+            prefetch=PREFETCH_PAGES,
+            whole_document=not self.on_demand_check.isChecked(),
+        )
+        self._scheduler.focus(self.left_view.pageNavigator().currentPage())
+        from gui.preview import PreviewDocument
+        self._preview = PreviewDocument(input_pdf)
+
+        self._thread = QThread(self)
+        self._worker = TranslateWorker(
             input_pdf=input_pdf,
             output_pdf=output_pdf,
             target_lang=lang,
+            service=service,
             api_key=api_key,
+            debug=False,
+            scheduler=self._scheduler,
         )
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self.on_translate_progress)
+        self._worker.page_ready.connect(self.on_translate_page)
+        self._worker.finished.connect(self.on_translate_finished)
+        self._worker.failed.connect(self.on_translate_failed)
+        self._worker.cancelled.connect(self._stop_worker)
+
+        self.translate_btn.setText("Stop" if self.on_demand_check.isChecked() else "Cancel")
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self._thread.start()
+
+    def on_translate_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_translate_page(self, page_index: int, data: bytes) -> None:
+        """
+        Ghép trang vừa dịch vào preview (chỉ ghi thêm trang đó); right view
+        được nạp lại sau PREVIEW_RELOAD_MS, gom các trang về liền nhau.
+        """
+        if self._preview is None:
+            return
+        self._preview.splice(page_index, data)
+        if not self._reload_timer.isActive():
+            self._reload_timer.start()
 
+    def _reload_preview(self) -> None:
+        """
+        Nạp preview vào right view, giữ nguyên trang đang xem.
+        """
+        if self._preview is None:
+            return
+        current = self.right_view.pageNavigator().currentPage()
+        buf = QBuffer(self)
+        buf.setData(QByteArray(self._preview.data()))
+        buf.open(QIODevice.ReadOnly)
+        self.translated_doc.load(buf)
+        # QPdfDocument đọc từ buffer, giữ buffer cũ tới khi load xong buffer mới
+        if self._preview_buf is not None:
+            self._preview_buf.deleteLater()
+        self._preview_buf = buf
+        if 0 < current < self.translated_doc.pageCount():
+            self.right_view.pageNavigator().jump(current, self.right_view.pageNavigator().currentLocation())
+
+    def on_translate_finished(self, output_pdf: str) -> None:
+        # output đã xong, không cần nạp preview nữa
+        self._reload_timer.stop()
+        self._stop_worker()
         # Load translated PDF file directly
         self.translated_doc.load(output_pdf)
+        if self._preview_buf is not None:
+            self._preview_buf.deleteLater()
+            self._preview_buf = None
+
+    def on_translate_failed(self, message: str) -> None:
+        self._stop_worker()
+        QMessageBox.critical(self, "Translation failed", message)
+
+    def _stop_worker(self) -> None:
+        if self._thread is not None:
+            self._thread.quit()
+            self._thread.wait()
+            self._thread.deleteLater()
+        if self._preview is not None:
+            # các trang đã ghép nhưng chưa kịp hiển thị
+            if self._reload_timer.isActive():
+                self._reload_timer.stop()
+                self._reload_preview()
+            self._preview.close()
+            self._preview = None
+        if self._worker is not None:
+            self._worker.deleteLater()
+        self._thread = None
+        self._worker = None
+        self._scheduler = None
+        self.translate_btn.setEnabled(True)
+        self.translate_btn.setText("Translate")
+        self.progress_bar.hide()
+
+    def closeEvent(self, event) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._thread.quit()
+            self._thread.wait()
+        if self._preview is not None:
+            self._preview.close()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+import fitz  # PyMuPDF
+
+
+class PreviewDocument:
+    """
+    Bản preview của right view, nằm trên đĩa: bản copy của PDF gốc, các
+    trang đã dịch được thay vào bằng splice() và lưu incremental (saveIncr),
+    nên mỗi trang chỉ ghi thêm object của chính nó thay vì serialize lại
+    cả document. data() trả về nội dung file để nạp vào QPdfDocument.
+    """
+
+    def __init__(self, input_pdf: str):
+        fd, self.path = tempfile.mkstemp(prefix="pdf2zh_preview_", suffix=".pdf")
+        os.close(fd)
+        # lưu lại một lần để file có xref sạch, saveIncr được
+        with fitz.open(input_pdf) as src:
+            src.save(self.path, garbage=1)
+        self.doc = fitz.open(self.path)
+        self.pages = 0
+
+    def splice(self, page_index: int, pdf_bytes: bytes) -> None:
+        """Thay trang page_index bằng document 1 trang pdf_bytes."""
+        with fitz.open("pdf", pdf_bytes) as page_doc:
+            self.doc.insert_pdf(page_doc, start_at=page_index)
+        self.doc.delete_page(page_index + 1)
+        if self.doc.can_save_incrementally():
+            self.doc.saveIncr()
+        else:
+            tmp = self.path + ".tmp"
+            self.doc.save(tmp, garbage=1)
+            self.doc.close()
+            os.replace(tmp, self.path)
+            self.doc = fitz.open(self.path)
+        self.pages += 1
+
+    def data(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        self.doc.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
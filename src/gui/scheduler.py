@@ -0,0 +1,55 @@
+import threading
+from typing import Iterator, List, Set
+
+
+class PageScheduler:
+    """
+    Hàng đợi trang theo viewport cho chế độ dịch on-demand.
+    - focus(page): trang đang xem được dịch trước, sau đó prefetch `prefetch`
+      trang tiếp theo; các trang đang chờ mà người dùng đã cuộn qua bị bỏ.
+    - whole_document=True: sau cửa sổ ưu tiên vẫn dịch nốt các trang còn lại.
+    Là một iterable (blocking) để truyền thẳng vào iter_translate_pages(pages=...).
+    focus()/close() gọi từ UI thread, __iter__ chạy trong worker thread.
+    """
+
+    def __init__(self, total: int, prefetch: int = 3, whole_document: bool = False):
+        self.total = total
+        self.prefetch = prefetch
+        self.whole_document = whole_document
+        self._queue: List[int] = []
+        self._done: Set[int] = set()
+        self._closed = False
+        self._cond = threading.Condition()
+        self.focus(0)
+
+    def focus(self, page: int) -> None:
+        with self._cond:
+            window = range(page, min(page + self.prefetch + 1, self.total))
+            queue = [p for p in window if p not in self._done]
+            if self.whole_document:
+                rest = [p for p in range(self.total) if p not in self._done and p not in queue]
+                queue += [p for p in rest if p > page] + [p for p in rest if p < page]
+            self._queue = queue
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def finished(self) -> bool:
+        return len(self._done) >= self.total
+
+    def __iter__(self) -> Iterator[int]:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed or self.finished)
+                if self._closed or self.finished:
+                    return
+                if not self._queue:
+                    continue
+                page = self._queue.pop(0)
+                # đánh dấu trước khi dịch để focus() không xếp lại trang này
+                self._done.add(page)
+            yield page
@@ -0,0 +1,98 @@
+import threading
+from typing import Optional
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gui.scheduler import PageScheduler
+
+
+def make_translator(service: str, api_key: str):
+    """
+    Tạo translator theo service chọn trên UI.
+    OpenAI -> None: dùng pipeline mặc định của pdf2zh (translate_text + api_key).
+    """
+    if service == "Gemini":
+        from pdf2zh.translator.gemini_translator import GeminiTranslator
+        return GeminiTranslator(api_key)
+    return None
+
+
+class TranslateWorker(QObject):
+    """
+    Chạy pdf2zh.iter_translate_pages() trong QThread riêng để UI không bị đơ.
+    - progress(done, total): sau mỗi trang
+    - page_ready(page_index, bytes): PDF 1 trang vừa dịch xong; viewer tự
+      ghép vào preview của nó (gui.preview.PreviewDocument), worker không
+      gửi lại cả document sau mỗi trang
+    - finished(output_pdf) / failed(message) / cancelled()
+    scheduler: PageScheduler tuỳ chọn quyết định thứ tự trang (on-demand).
+    Khi bị huỷ mà đã dịch được ít nhất một trang thì vẫn lưu output_pdf
+    (trang chưa dịch giữ nguyên bản gốc) và phát finished.
+    """
+    progress = Signal(int, int)
+    page_ready = Signal(int, object)
+    finished = Signal(str)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(
+        self,
+        input_pdf: str,
+        output_pdf: str,
+        target_lang: str,
+        service: str,
+        api_key: str,
+        debug: bool = False,
+        scheduler: Optional[PageScheduler] = None
+    ):
+        super().__init__()
+        self.input_pdf = input_pdf
+        self.output_pdf = output_pdf
+        self.target_lang = target_lang
+        self.service = service
+        self.api_key = api_key
+        self.debug = debug
+        self.scheduler = scheduler
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        # gọi từ main thread; worker dừng trước trang kế tiếp
+        self._cancel.set()
+        if self.scheduler is not None:
+            self.scheduler.close()
+
+    @Slot()
+    def run(self) -> None:
+        try:
+            import fitz
+            from pdf2zh.core import iter_translate_pages
+
+            translator = make_translator(self.service, self.api_key)
+            # output = bản gốc, các trang được thay dần bằng trang đã dịch
+            out = fitz.open(self.input_pdf)
+            total = len(out)
+            done = 0
+            for res in iter_translate_pages(
+                self.input_pdf,
+                self.target_lang,
+                api_key=self.api_key,
+                translator=translator,
+                pages=self.scheduler,
+                debug=self.debug,
+                cancel=self._cancel,
+            ):
+                with fitz.open("pdf", res.pdf_bytes) as page_doc:
+                    out.insert_pdf(page_doc, start_at=res.page_index)
+                out.delete_page(res.page_index + 1)
+                done += 1
+                self.page_ready.emit(res.page_index, res.pdf_bytes)
+                self.progress.emit(done, total)
+
+            if self._cancel.is_set() and not done:
+                self.cancelled.emit()
+                return
+            out.save(self.output_pdf, garbage=4, deflate=True)
+            out.close()
+            self.finished.emit(self.output_pdf)
+        except Exception as e:
+            self.failed.emit(str(e))
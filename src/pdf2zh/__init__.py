@@ -1,8 +1,27 @@
 """
 pdf2zh: core library for extracting and translating PDF → Markdown/PDF.
 """
-from .core import convert_pdf
+# Các hàm public được import lazy (PEP 562): `import pdf2zh` không kéo theo
+# fitz/openai/pdfplumber cho tới khi thực sự dùng tới.
+_LAZY = {
+    "convert_pdf": ".core",
+    "iter_translate_pages": ".core",
+}
 
 __all__ = [
     "convert_pdf",
-]
\ No newline at end of file
+    "iter_translate_pages",
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,8 +1,9 @@
-import sqlite3
-import threading
 from tenacity import retry, stop_after_attempt, wait_exponential
-from typing import Tuple, Optional
-from pdf2zh.translator.base import BaseTranslator
+from typing import Any
+from pdf2zh.translator.base import BaseTranslator, service_name
+from pdf2zh.metrics import METRICS
+from pdf2zh.cache_backends import backend_from_spec
+from pdf2zh.translator.streaming import translate_stream
 
 class CachedTranslator(BaseTranslator):
     """
@@ -10,58 +11,87 @@ class CachedTranslator(BaseTranslator):
     Save cache of key=(service, src, tgt, text) -> translated text
     """
 
-    def __init__(self, inner: BaseTranslator, db_path: str):
+    def __init__(self, inner: BaseTranslator, db_path: Any):
         """
         inner: instance of OpenAITranslator/GeminiTranslator
-        db_path: path to sqlite file
+        db_path: path to sqlite file, cache spec ("shards://dir", "redis://...",
+                 "cache.db,redis://..."; xem cache_backends) hoặc CacheBackend
         """
         self.inner = inner
         self.db_path = db_path
-        # ensure DB & table exists
-        self._lock = threading.Lock()
-        with self._get_conn() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS translations (
-                  service TEXT, src TEXT, tgt TEXT,
-                  input TEXT, output TEXT,
-                  PRIMARY KEY(service, src, tgt, input)
-                )
-            """)
+        self.backend = backend_from_spec(db_path)
+        self.service = service_name(inner)
+        # thống kê hit/miss để báo cáo cache hit rate
+        self.hits = 0
+        self.misses = 0
 
-    def _get_conn(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path, check_same_thread=False)
-
-    def _lookup(self, key: Tuple[str,str,str,str]) -> Optional[str]:
-        with self._get_conn() as conn:
-            cur = conn.execute(
-                "SELECT output FROM translations WHERE service=? AND src=? AND tgt=? AND input=?",
-                key
-            )
-            row = cur.fetchone()
-            return row[0] if row else None
-
-    def _store(self, key: Tuple[str,str,str,str], output: str):
-        with self._get_conn() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO translations (service,src,tgt,input,output) VALUES (?,?,?,?,?)",
-                (*key, output)
-            )
-            conn.commit()
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=4))
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(min=1, max=4),
+        before_sleep=lambda state: METRICS.incr("translate.retries"),
+    )
     def _call_inner(self, texts, src, tgt):
         # gọi inner.translate, sẽ tự retry nếu lỗi mạng/API
         return self.inner.translate(texts, src, tgt)
 
     def translate(self, texts, src, tgt):
+        keys = [(self.service, src, tgt, t) for t in texts]
+        found = self.backend.get_many(keys)
         results = []
-        for t in texts:
-            key = (self.inner.__class__.__name__, src, tgt, t)
-            cached = self._lookup(key)
+        for key, t in zip(keys, texts):
+            cached = found.get(key)
             if cached is not None:
+                self.hits += 1
+                METRICS.incr("cache.hits")
                 results.append(cached)
             else:
+                self.misses += 1
+                METRICS.incr("cache.misses")
                 translated = self._call_inner([t], src, tgt)[0]
-                self._store(key, translated)
+                self.backend.put_many({key: translated})
+                # text lặp lại trong cùng list -> lần sau là hit
+                found[key] = translated
                 results.append(translated)
-        return results
\ No newline at end of file
+        return results
+
+    def translate_stream(self, texts, src, tgt):
+        """
+        Như translate() nhưng yield (index, bản dịch): cache hit trước, sau đó
+        các đoạn miss theo thứ tự inner stream trả về. Stream lỗi giữa chừng
+        thì phần còn lại được dịch bằng _call_inner (có retry).
+        """
+        keys = [(self.service, src, tgt, t) for t in texts]
+        found = self.backend.get_many(keys)
+        misses = {}
+        for k, key in enumerate(keys):
+            cached = found.get(key)
+            if cached is not None:
+                self.hits += 1
+                METRICS.incr("cache.hits")
+                yield k, cached
+            else:
+                misses.setdefault(key, []).append(k)
+        if not misses:
+            return
+        todo = list(misses)
+        self.misses += len(todo)
+        METRICS.incr("cache.misses", len(todo))
+        done = set()
+        try:
+            for j, translated in translate_stream(self.inner, [key[3] for key in todo], src, tgt):
+                done.add(j)
+                self.backend.put_many({todo[j]: translated})
+                for k in misses[todo[j]]:
+                    yield k, translated
+        except Exception:
+            METRICS.incr("stream.errors")
+        for j, key in enumerate(todo):
+            if j not in done:
+                translated = self._call_inner([key[3]], src, tgt)[0]
+                self.backend.put_many({key: translated})
+                for k in misses[key]:
+                    yield k, translated
+
+    def close(self) -> None:
+        """Ghi nốt các bản dịch còn trong buffer (backend có write batching)."""
+        self.backend.close()
@@ -0,0 +1,336 @@
+"""
+Backend lưu trữ cho CachedTranslator, key = (service, src, tgt, text).
+
+- SqliteBackend:        một file SQLite (WAL + busy timeout), schema cũ
+- ShardedSqliteBackend: N file SQLite trong một thư mục, chọn shard theo
+                        hash của key -> nhiều process ghi ít tranh lock hơn
+- KVBackend:            key-value store qua mạng (Redis hoặc client bất kỳ có
+                        mget/mset), dùng chung giữa nhiều host; LocalKV là
+                        bản in-memory thay thế trong test
+- BatchingBackend:      gom nhiều lần ghi thành một lần put_many
+- TieredBackend:        read-through: đọc local trước, miss thì đọc remote
+                        rồi ghi ngược lại local; ghi thì ghi cả hai
+
+backend_from_spec() tạo backend từ chuỗi cấu hình (CLI --cache-db).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from multiprocessing.util import Finalize
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Key = Tuple[str, str, str, str]
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        """Trả về {key: output} cho các key có trong cache."""
+
+    @abstractmethod
+    def put_many(self, items: Dict[Key, str]) -> None:
+        """Ghi (ghi đè) nhiều key một lần."""
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Bảng translations(service, src, tgt, input, output) như trước, bật WAL
+    để reader không chặn writer và busy_timeout để writer chờ lock thay vì
+    lỗi "database is locked" ngay. Mỗi thread một connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                  service TEXT, src TEXT, tgt TEXT,
+                  input TEXT, output TEXT,
+                  PRIMARY KEY(service, src, tgt, input)
+                )
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        conn = self._conn()
+        found: Dict[Key, str] = {}
+        for key in dict.fromkeys(keys):
+            row = conn.execute(
+                "SELECT output FROM translations WHERE service=? AND src=? AND tgt=? AND input=?",
+                key
+            ).fetchone()
+            if row is not None:
+                found[key] = row[0]
+        return found
+
+    def put_many(self, items: Dict[Key, str]) -> None:
+        if not items:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (service,src,tgt,input,output) VALUES (?,?,?,?,?)",
+                [(*key, output) for key, output in items.items()]
+            )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _digest(key: Key) -> str:
+    return hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()
+
+
+class ShardedSqliteBackend(CacheBackend):
+    """directory/shard_00.db ... shard_{N-1}.db, shard = hash(key) % N."""
+
+    def __init__(self, directory: str, shards: int = 16, timeout: float = 30.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shards = [
+            SqliteBackend(os.path.join(directory, f"shard_{n:02d}.db"), timeout)
+            for n in range(shards)
+        ]
+
+    def _shard(self, key: Key) -> int:
+        return int(_digest(key)[:8], 16) % len(self.shards)
+
+    def _group(self, keys: Sequence[Key]) -> Dict[int, List[Key]]:
+        groups: Dict[int, List[Key]] = {}
+        for key in keys:
+            groups.setdefault(self._shard(key), []).append(key)
+        return groups
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        found: Dict[Key, str] = {}
+        for n, group in self._group(keys).items():
+            found.update(self.shards[n].get_many(group))
+        return found
+
+    def put_many(self, items: Dict[Key, str]) -> None:
+        for n, group in self._group(list(items)).items():
+            self.shards[n].put_many({k: items[k] for k in group})
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+
+
+class LocalKV:
+    """
+    Stand-in in-memory cho Redis (chỉ mget/mset), dùng trong test/benchmark.
+    latency: số giây giả lập cho mỗi round trip; round_trips đếm số lần gọi.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data: Dict[str, bytes] = {}
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def _trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        self._trip()
+        with self._lock:
+            return [self.data.get(k) for k in keys]
+
+    def mset(self, mapping: Dict[str, Any]) -> bool:
+        self._trip()
+        with self._lock:
+            for k, v in mapping.items():
+                self.data[k] = v if isinstance(v, bytes) else str(v).encode("utf-8")
+        return True
+
+
+class KVBackend(CacheBackend):
+    """
+    Key-value store qua mạng: key = prefix + sha256(service, src, tgt, text),
+    mỗi get_many/put_many là một round trip (mget/mset).
+    client: redis.Redis hoặc object có mget(list) / mset(dict).
+    """
+
+    def __init__(self, client: Any, prefix: str = "pdf2zh:tr:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        values = self.client.mget([self.prefix + _digest(k) for k in keys])
+        found: Dict[Key, str] = {}
+        for key, value in zip(keys, values):
+            if value is not None:
+                found[key] = value.decode("utf-8") if isinstance(value, bytes) else value
+        return found
+
+    def put_many(self, items: Dict[Key, str]) -> None:
+        if items:
+            self.client.mset({self.prefix + _digest(k): v for k, v in items.items()})
+
+
+def _flush_pending(inner: CacheBackend, pending: Dict[Key, str], lock: threading.Lock) -> int:
+    """Gửi hết buffer sang inner. Không nhận self để finalizer không giữ backend sống."""
+    with lock:
+        items = dict(pending)
+        pending.clear()
+    if items:
+        inner.put_many(items)
+    return len(items)
+
+
+class BatchingBackend(CacheBackend):
+    """
+    Gom các lần ghi, gửi inner.put_many khi đủ max_batch key, khi bản ghi
+    cũ nhất chờ quá max_delay giây (kiểm tra ở lần gọi kế tiếp), khi flush()/
+    close(), khi backend bị thu hồi và khi process kết thúc. Đọc thấy ngay
+    các key còn trong buffer.
+    """
+
+    def __init__(self, inner: CacheBackend, max_batch: int = 64, max_delay: float = 1.0):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self._pending: Dict[Key, str] = {}
+        self._since = 0.0
+        self._lock = threading.Lock()
+        # chạy cả trong worker của ProcessPoolExecutor (atexit thì không) và
+        # khi backend bị thu hồi; callback chỉ giữ inner + buffer, không giữ self
+        self._finalizer = Finalize(
+            self, _flush_pending, args=(inner, self._pending, self._lock), exitpriority=10
+        )
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        with self._lock:
+            found = {k: self._pending[k] for k in keys if k in self._pending}
+        rest = [k for k in keys if k not in found]
+        if rest:
+            found.update(self.inner.get_many(rest))
+        self._maybe_flush()
+        return found
+
+    def put_many(self, items: Dict[Key, str]) -> None:
+        with self._lock:
+            if not self._pending:
+                self._since = time.monotonic()
+            self._pending.update(items)
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        with self._lock:
+            due = self._pending and (
+                len(self._pending) >= self.max_batch
+                or time.monotonic() - self._since >= self.max_delay
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        if _flush_pending(self.inner, self._pending, self._lock):
+            self.batches += 1
+
+    def close(self) -> None:
+        self.flush()
+        self._finalizer.cancel()
+        self.inner.close()
+
+
+class TieredBackend(CacheBackend):
+    """
+    Read-through qua các tầng (local -> remote): key miss ở tầng trước mà
+    hit ở tầng sau được ghi ngược vào các tầng trước. Ghi vào mọi tầng.
+    """
+
+    def __init__(self, tiers: List[CacheBackend]):
+        if not tiers:
+            raise ValueError("At least one cache tier is required")
+        self.tiers = tiers
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, str]:
+        found: Dict[Key, str] = {}
+        missing = list(dict.fromkeys(keys))
+        for depth, tier in enumerate(self.tiers):
+            if not missing:
+                break
+            hits = tier.get_many(missing)
+            if hits and depth:
+                for upper in self.tiers[:depth]:
+                    upper.put_many(hits)
+            found.update(hits)
+            missing = [k for k in missing if k not in hits]
+        return found
+
+    def put_many(self, items: Dict[Key, str]) -> None:
+        for tier in self.tiers:
+            tier.put_many(items)
+
+    def flush(self) -> None:
+        for tier in self.tiers:
+            tier.flush()
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
+
+
+def _backend_from_part(part: str, batch: int) -> CacheBackend:
+    if part.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("redis cache backend requires the 'redis' package") from e
+        return BatchingBackend(KVBackend(redis.Redis.from_url(part)), max_batch=batch)
+    if part == "memory://":
+        return BatchingBackend(KVBackend(LocalKV()), max_batch=batch)
+    if part.startswith("shards://"):
+        directory, _, n = part[len("shards://"):].partition("#")
+        return ShardedSqliteBackend(directory, int(n) if n else 16)
+    return SqliteBackend(part)
+
+
+def backend_from_spec(spec: Any, batch: int = 64) -> CacheBackend:
+    """
+    spec là CacheBackend (trả lại nguyên) hoặc chuỗi, các tầng cách nhau bởi
+    dấu phẩy, theo thứ tự đọc (local trước):
+      cache.db                      một file SQLite
+      shards://cache_dir#16         16 file SQLite trong cache_dir
+      redis://host:6379/0           Redis dùng chung (ghi theo batch)
+      memory://                     LocalKV in-memory (test)
+      cache.db,redis://host:6379/0  SQLite local + Redis dùng chung (read-through)
+    """
+    if isinstance(spec, CacheBackend):
+        return spec
+    parts = [p.strip() for p in str(spec).split(",") if p.strip()]
+    if not parts:
+        raise ValueError("Empty cache spec")
+    tiers = [_backend_from_part(p, batch) for p in parts]
+    return tiers[0] if len(tiers) == 1 else TieredBackend(tiers)
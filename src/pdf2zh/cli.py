@@ -0,0 +1,449 @@
+import glob
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing.util import Finalize
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import click
+
+from .translator import SERVICES, build_translator
+from .translator.base import BaseTranslator
+
+
+@dataclass
+class Job:
+    input_pdf: str
+    output_pdf: str
+    # nhiều ngôn ngữ đích: {target_lang: output_pdf}, output_pdf là file đầu tiên
+    outputs: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class JobResult:
+    input_pdf: str
+    output_pdf: str
+    status: str            # "done" | "failed"
+    pages: int = 0
+    blocks: int = 0
+    chars: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    skipped: int = 0       # đoạn không cần dịch (prefilter), không gọi API
+    skipped_chars: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+class _CountingTranslator(BaseTranslator):
+    """Đếm số block/ký tự đi qua pipeline dịch (trước cache)."""
+
+    def __init__(self, inner: BaseTranslator):
+        self.inner = inner
+        self.blocks = 0
+        self.chars = 0
+        self._lock = threading.Lock()  # nhiều ngôn ngữ dịch song song
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        with self._lock:
+            self.blocks += len(texts)
+            self.chars += sum(len(t) for t in texts)
+        return self.inner.translate(texts, src, tgt)
+
+    def translate_stream(self, texts: List[str], src: str, tgt: str) -> Iterator[Tuple[int, str]]:
+        from .translator.streaming import translate_stream
+        with self._lock:
+            self.blocks += len(texts)
+            self.chars += sum(len(t) for t in texts)
+        return translate_stream(self.inner, texts, src, tgt)
+
+
+def expand_inputs(
+    inputs: List[str],
+    langs: Sequence[str] = (),
+    output_dir: Optional[str] = None
+) -> List[str]:
+    """
+    Files, glob pattern hoặc thư mục (quét đệ quy *.pdf) -> list file PDF,
+    đã bỏ trùng và giữ thứ tự.
+    Với thư mục/glob, bỏ qua output của chính tool (<tên>_<lang>.pdf với lang
+    trong langs, mọi file trong output_dir) để chạy lại không dịch tiếp bản
+    dịch cũ; file được chỉ định trực tiếp thì luôn giữ.
+    """
+    out_root = os.path.join(os.path.abspath(output_dir), "") if output_dir else None
+    suffixes = tuple(f"_{lang}" for lang in langs)
+
+    def is_output(path: str) -> bool:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if suffixes and stem.endswith(suffixes):
+            return True
+        return out_root is not None and path.startswith(out_root)
+
+    found: List[str] = []
+    for item in inputs:
+        explicit = False
+        if os.path.isdir(item):
+            # không phân biệt hoa thường (.PDF) như phần lọc bên dưới
+            matches = sorted(
+                p for p in glob.glob(os.path.join(item, "**", "*"), recursive=True)
+                if os.path.isfile(p)
+            )
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+        else:
+            matches, explicit = [item], True
+        for path in matches:
+            path = os.path.abspath(path)
+            if not path.lower().endswith(".pdf") or path in found:
+                continue
+            if not explicit and is_output(path):
+                continue
+            found.append(path)
+    return found
+
+
+def output_path(input_pdf: str, target_lang: str, output_dir: Optional[str]) -> str:
+    base, _ = os.path.splitext(os.path.basename(input_pdf))
+    out_dir = output_dir or os.path.dirname(input_pdf)
+    return os.path.join(out_dir, f"{base}_{target_lang}.pdf")
+
+
+def is_up_to_date(job: Job) -> bool:
+    return all(
+        os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(job.input_pdf)
+        for path in (job.outputs.values() if job.outputs else [job.output_pdf])
+    )
+
+
+# --- state của mỗi worker process (tạo trong _init_worker) ---
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(
+    service: str,
+    api_key: str,
+    cache_db: Optional[str],
+    limiter: Any,
+    target_lang: str,
+    mode: str,
+    record: Optional[str] = None,
+    memory_db: Optional[str] = None,
+    hedge: Optional[Tuple[str, str]] = None,
+    page_cache: Optional[str] = None,
+    streaming: bool = False
+) -> None:
+    """
+    Chạy một lần trong mỗi worker: tạo translator dùng chung cho mọi job của
+    worker đó. Cache (sqlite) và RateLimiter được chia sẻ giữa các worker.
+    record: ghi request/response thật gửi tới service (cache miss) để replay
+    offline; khi chạy nhiều worker mỗi worker ghi một file riêng theo pid.
+    memory_db: translation memory mờ (đoạn gần giống đã dịch), tra sau cache.
+    hedge: (service, api_key) backend thứ hai; request được route tới backend
+    nhanh hơn và gửi hedge sang backend kia khi chậm quá p95.
+    page_cache: thư mục cache trang đã render, dùng chung giữa các worker.
+    streaming: mỗi trang một request streaming, đoạn xong được render ngay.
+    Translator stack được đóng bởi _close_worker khi worker kết thúc.
+    """
+    from .cache import CachedTranslator
+    from .ratelimit import RateLimitedTranslator
+
+    translator = build_translator(service, api_key)
+    if hedge:
+        from .translator.routing_translator import RoutingTranslator
+        hedge_service, hedge_key = hedge
+        translator = RoutingTranslator({
+            service: translator,
+            f"{hedge_service}#2" if hedge_service == service else hedge_service:
+                build_translator(hedge_service, hedge_key),
+        })
+    if record:
+        from .translator.replay_translator import RecordingTranslator
+        if mp.parent_process() is not None:
+            # calls.jsonl.gz -> calls.<pid>.jsonl.gz
+            head, name = os.path.split(record)
+            stem, dot, ext = name.partition(".")
+            record = os.path.join(head, f"{stem}.{os.getpid()}{dot}{ext}")
+        translator = RecordingTranslator(translator, record)
+    if limiter is not None:
+        translator = RateLimitedTranslator(translator, limiter)
+    if memory_db:
+        from .memory import FuzzyMemoryTranslator, TranslationMemory
+        translator = FuzzyMemoryTranslator(translator, TranslationMemory(memory_db))
+    cache = CachedTranslator(translator, cache_db) if cache_db else None
+    _WORKER.update(
+        translator=_CountingTranslator(cache or translator),
+        cache=cache,
+        target_lang=target_lang,
+        mode=mode,
+        page_cache=page_cache,
+        streaming=streaming,
+    )
+    # worker của ProcessPoolExecutor không chạy atexit, Finalize thì có
+    # (ưu tiên thấp hơn flush của BatchingBackend)
+    Finalize(None, _close_worker, exitpriority=5)
+
+
+def _close_worker() -> None:
+    """
+    Đóng translator stack của worker theo chuỗi .inner: ghi nốt cache,
+    đóng file record, translation memory, thread pool của RoutingTranslator.
+    """
+    obj = _WORKER.get("translator")
+    _WORKER.clear()
+    while obj is not None:
+        close = getattr(obj, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"[WARN] closing {type(obj).__name__} failed: {e}")
+        obj = getattr(obj, "inner", None)
+
+
+def _run_job(job: Job) -> JobResult:
+    from .core import convert_pdf
+    from .prefilter import STATS
+    import fitz
+
+    translator = _WORKER["translator"]
+    cache = _WORKER["cache"]
+    before = (translator.blocks, translator.chars,
+              cache.hits if cache else 0, cache.misses if cache else 0,
+              STATS.segments, STATS.chars)
+    t0 = time.perf_counter()
+    try:
+        with fitz.open(job.input_pdf) as doc:
+            pages = len(doc)
+        os.makedirs(os.path.dirname(job.output_pdf) or ".", exist_ok=True)
+        if len(job.outputs) > 1:
+            from .multilang import convert_pdf_multi
+            convert_pdf_multi(
+                job.input_pdf,
+                job.outputs,
+                mode=_WORKER["mode"],
+                translator=translator,
+                page_cache=_WORKER["page_cache"],
+            )
+        else:
+            convert_pdf(
+                job.input_pdf,
+                job.output_pdf,
+                _WORKER["target_lang"],
+                api_key="",
+                debug=False,
+                mode=_WORKER["mode"],
+                translator=translator,
+                page_cache=_WORKER["page_cache"],
+                streaming=_WORKER["streaming"],
+            )
+        status, error = "done", ""
+    except Exception as e:
+        pages, status, error = 0, "failed", f"{type(e).__name__}: {e}"
+    return JobResult(
+        input_pdf=job.input_pdf,
+        output_pdf=job.output_pdf,
+        status=status,
+        pages=pages,
+        blocks=translator.blocks - before[0],
+        chars=translator.chars - before[1],
+        cache_hits=(cache.hits if cache else 0) - before[2],
+        cache_misses=(cache.misses if cache else 0) - before[3],
+        skipped=STATS.segments - before[4],
+        skipped_chars=STATS.chars - before[5],
+        seconds=time.perf_counter() - t0,
+        error=error,
+    )
+
+
+def print_summary(results: List[JobResult], skipped: int, wall: float) -> None:
+    done = [r for r in results if r.status == "done"]
+    failed = [r for r in results if r.status != "done"]
+    pages = sum(r.pages for r in done)
+    blocks = sum(r.blocks for r in results)
+    hits = sum(r.cache_hits for r in results)
+    lookups = hits + sum(r.cache_misses for r in results)
+    click.echo("")
+    click.echo(f"[SUMMARY] {len(done)} done, {len(failed)} failed, {skipped} up to date")
+    click.echo(f"[SUMMARY] {pages} pages, {blocks} blocks in {wall:.1f}s")
+    if wall > 0:
+        click.echo(f"[SUMMARY] {pages / wall:.2f} pages/s, {blocks / wall:.2f} blocks/s")
+    if lookups:
+        click.echo(f"[SUMMARY] cache hit rate {hits / lookups:.1%} ({hits}/{lookups})")
+    passthrough = sum(r.skipped for r in results)
+    if passthrough:
+        chars = sum(r.skipped_chars for r in results)
+        click.echo(f"[SUMMARY] {passthrough} segments ({chars} chars) kept as-is without translation")
+    for r in failed:
+        click.echo(f"[FAILED] {r.input_pdf}: {r.error}", err=True)
+
+
+def _preflight_job(args: Tuple[str, List[str], Optional[str], str, int]) -> List[Any]:
+    from .preflight import preflight_pdf
+    return preflight_pdf(*args)
+
+
+def run_preflight(
+    files: List[str],
+    langs: List[str],
+    cache_db: Optional[str],
+    service: str,
+    jobs: int,
+    rate_limit: float,
+    latency: float,
+    batch_size: int
+) -> None:
+    """
+    Dry run: extract + chia đoạn từng document (jobs process), không gọi
+    mạng; in ước lượng cho mỗi document/ngôn ngữ và tổng cả batch.
+    Thời gian dịch dự kiến tính với concurrency = jobs và --rate-limit.
+    """
+    from .preflight import project_runtime
+
+    args = [(f, langs, cache_db, service, batch_size) for f in files]
+    reports = []
+    start = time.perf_counter()
+    if jobs <= 1:
+        for a in args:
+            reports.extend(_preflight_job(a))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            for rs in ex.map(_preflight_job, args):
+                reports.extend(rs)
+    wall = time.perf_counter() - start
+
+    for r in reports:
+        eta = project_runtime(r.requests, latency, 1, rate_limit)
+        click.echo(
+            f"[PREFLIGHT] {r.input_pdf} [{r.target_lang}]: {r.pages} pages, "
+            f"{r.segments} segments, {r.chars} chars, ~{r.tokens} tokens, "
+            f"{r.cache_hits} cached, {r.skipped} kept as-is, "
+            f"{r.requests} requests (~{r.request_tokens} tokens), ~{eta:.0f}s"
+        )
+    requests = sum(r.requests for r in reports)
+    hits = sum(r.cache_hits for r in reports)
+    segments = sum(r.segments for r in reports)
+    eta = project_runtime(requests, latency, jobs, rate_limit)
+    click.echo("")
+    click.echo(f"[PREFLIGHT] {len(files)} documents, {len(langs)} languages scanned in {wall:.1f}s")
+    click.echo(
+        f"[PREFLIGHT] {segments} segments, {sum(r.chars for r in reports)} chars, "
+        f"~{sum(r.tokens for r in reports)} tokens"
+    )
+    if segments:
+        click.echo(f"[PREFLIGHT] cache hits {hits}/{segments} ({hits / segments:.1%})")
+    click.echo(
+        f"[PREFLIGHT] {requests} API requests (~{sum(r.request_tokens for r in reports)} tokens), "
+        f"projected ~{eta:.0f}s at concurrency {jobs}"
+        + (f", {rate_limit:g} req/s" if rate_limit > 0 else "")
+        + f", {latency:g}s/request"
+    )
+
+
+@click.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("-t", "--target-lang", required=True,
+              help="Target language, e.g. Vietnamese. Comma-separated for several languages in one pass.")
+@click.option("-o", "--output-dir", type=click.Path(file_okay=False), default=None,
+              help="Output directory (default: next to each input).")
+@click.option("-s", "--service", type=click.Choice(SERVICES), default="openai", show_default=True)
+@click.option("--api-key", envvar="PDF2ZH_API_KEY", default=None,
+              help="API key (or PDF2ZH_API_KEY / OPENAI_API_KEY).")
+@click.option("-j", "--jobs", type=int, default=1, show_default=True,
+              help="Number of documents converted in parallel.")
+@click.option("--cache-db", default="pdf2zh_cache.db", show_default=True,
+              help="Translation cache shared by all workers ('' to disable): a SQLite file, "
+                   "shards://DIR#N, redis://HOST:PORT/DB, or local,remote tiers separated by commas.")
+@click.option("--rate-limit", type=float, default=0.0,
+              help="Max translation requests per second across all workers (0 = unlimited).")
+@click.option("--mode", type=click.Choice(["rebuild", "overlay"]), default="rebuild", show_default=True)
+@click.option("--force", is_flag=True, help="Re-translate even if the output is up to date.")
+@click.option("--record", type=click.Path(dir_okay=False), default=None,
+              help="Record translation requests/latencies to this file (.jsonl or .jsonl.gz) for offline replay.")
+@click.option("--memory-db", type=click.Path(dir_okay=False), default=None,
+              help="Fuzzy translation memory: reuse or edit translations of near-duplicate segments.")
+@click.option("--hedge-with", type=click.Choice(SERVICES), default=None,
+              help="Second backend: route to the faster one and hedge slow requests to the other.")
+@click.option("--hedge-api-key", envvar="PDF2ZH_HEDGE_API_KEY", default="",
+              help="API key for --hedge-with (or PDF2ZH_HEDGE_API_KEY).")
+@click.option("--dry-run", is_flag=True,
+              help="Extract and segment only (no network): estimate segments, tokens, cache hits, requests and runtime.")
+@click.option("--latency", type=float, default=1.5, show_default=True,
+              help="Seconds per API request assumed by --dry-run.")
+@click.option("--batch-size", type=int, default=1, show_default=True,
+              help="Segments per API request assumed by --dry-run.")
+@click.option("--page-cache", type=click.Path(file_okay=False), default=None,
+              help="Directory caching rendered pages; unchanged pages are reused instead of re-rendered. "
+                   "Grows without bound; delete it to reclaim space.")
+@click.option("--stream", "streaming", is_flag=True,
+              help="One streaming request per page; each paragraph is rendered as soon as it arrives.")
+def main(
+    inputs, target_lang, output_dir, service, api_key,
+    jobs, cache_db, rate_limit, mode, force, record, memory_db,
+    hedge_with, hedge_api_key, dry_run, latency, batch_size, page_cache, streaming
+) -> None:
+    """
+    Batch-translate PDF files. INPUTS may be files, glob patterns or
+    directories (searched recursively for *.pdf).
+    """
+    from dotenv import load_dotenv
+    # .env được nạp trước khi đọc key (click chỉ thấy biến môi trường có sẵn)
+    load_dotenv()
+    api_key = api_key or os.getenv("PDF2ZH_API_KEY") or os.getenv("OPENAI_API_KEY", "")
+    hedge_api_key = hedge_api_key or os.getenv("PDF2ZH_HEDGE_API_KEY", "")
+    if page_cache and streaming:
+        raise click.UsageError("--page-cache cannot be combined with --stream")
+    if not api_key and service != "stub" and not dry_run:
+        raise click.UsageError("API key is required (--api-key or PDF2ZH_API_KEY)")
+
+    langs = [lang.strip() for lang in target_lang.split(",") if lang.strip()]
+    if not langs:
+        raise click.UsageError("No target language given")
+    files = expand_inputs(list(inputs), langs, output_dir)
+    if not files:
+        raise click.UsageError("No PDF files found")
+    queue = []
+    for f in files:
+        outputs = {lang: output_path(f, lang, output_dir) for lang in langs}
+        queue.append(Job(f, outputs[langs[0]], outputs if len(langs) > 1 else {}))
+    todo = [job for job in queue if force or not is_up_to_date(job)]
+    skipped = len(queue) - len(todo)
+    click.echo(f"[QUEUE] {len(todo)} to translate, {skipped} up to date, jobs={jobs}")
+    if dry_run:
+        service_key = "RoutingTranslator" if hedge_with else service
+        run_preflight([job.input_pdf for job in todo], langs, cache_db or None, service_key,
+                      jobs, rate_limit, latency, batch_size)
+        return
+
+    limiter = None
+    if rate_limit > 0:
+        from .ratelimit import RateLimiter
+        limiter = RateLimiter(rate_limit)
+    hedge = (hedge_with, hedge_api_key) if hedge_with else None
+    init_args = (service, api_key, cache_db or None, limiter, langs[0], mode, record, memory_db, hedge,
+                 page_cache, streaming)
+
+    results: List[JobResult] = []
+    start = time.perf_counter()
+    if jobs <= 1:
+        _init_worker(*init_args)
+        for n, job in enumerate(todo, 1):
+            results.append(_run_job(job))
+            click.echo(f"[JOB] {n}/{len(todo)} {results[-1].status}: {job.input_pdf}")
+        _close_worker()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=init_args) as ex:
+            futures = [ex.submit(_run_job, job) for job in todo]
+            for n, fut in enumerate(as_completed(futures), 1):
+                results.append(fut.result())
+                click.echo(f"[JOB] {n}/{len(todo)} {results[-1].status}: {results[-1].input_pdf}")
+
+    print_summary(results, skipped, time.perf_counter() - start)
+    if any(r.status != "done" for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import os
-from dotenv import load_dotenv
-import openai
 import fitz               # PyMuPDF
-import glob
 import re
-import pdfplumber         # optional fallback text extraction
+import unicodedata
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, Dict
-import numpy as np
-import pymupdf
+from functools import lru_cache
+from typing import List, Optional, Any, Dict, TYPE_CHECKING
+from .translator.base import BaseTranslator
+from .metrics import METRICS, estimate_tokens
+from .prefilter import split_translatable
+from .masking import mask, unmask
+
+# openai, pdfplumber, numpy, dotenv chỉ được import khi code path cần tới,
+# để `import pdf2zh`, CLI và worker process khởi động nhanh.
+if TYPE_CHECKING:
+    import numpy as np
 
 @dataclass
 class BlockInfo:
@@ -37,7 +42,7 @@ class PageCoordinates:
     width: float
     height: float
     blocks: List[BlockInfo] = field(default_factory=list)
-    layout_mask: Optional[np.ndarray] = field(default=None, repr=False)
+    layout_mask: Optional["np.ndarray"] = field(default=None, repr=False)
 
     @classmethod
     def from_page(cls, page_index: int, page: fitz.Page) -> "PageCoordinates":
@@ -83,8 +88,20 @@ class PageCoordinates:
             blocks=blocks
         )
 
-# Load OpenAI key from .env
-load_dotenv()
+_openai = None
+
+def _load_openai():
+    """
+    Import openai lần đầu cần dùng (import mất ~0.5s), kèm load .env.
+    """
+    global _openai
+    if _openai is None:
+        from dotenv import load_dotenv
+        # Load OpenAI key from .env
+        load_dotenv()
+        import openai
+        _openai = openai
+    return _openai
 
 # Map UI names → prompt names
 LANG_PROMPT = {
@@ -94,23 +111,86 @@ LANG_PROMPT = {
     # thêm nếu cần
 }
 
+def record_usage(resp: Any) -> None:
+    """Cộng số token thật (resp.usage của chat completion) vào METRICS."""
+    usage = getattr(resp, "usage", None)
+    if METRICS.enabled and usage is not None:
+        METRICS.incr("tokens.prompt", getattr(usage, "prompt_tokens", 0) or 0)
+        METRICS.incr("tokens.completion", getattr(usage, "completion_tokens", 0) or 0)
+
 def translate_text(text: str, target_lang: str) -> str:
     lang_name = LANG_PROMPT.get(target_lang, target_lang)
     prompt = (
         f"Please translate the following text into {lang_name}. "
-        "Do NOT modify any non-text content (images, formulas):\n\n" + text
+        "Do NOT modify any non-text content (images, formulas). "
+        "Keep placeholders like {0} exactly as they are:\n\n" + text
     )
-    resp = openai.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": "You are a helpful translation assistant."},
-            {"role": "user",   "content": prompt}
-        ],
-        temperature=0.0,
+    openai = _load_openai()
+    with METRICS.timer("translate.network"):
+        resp = openai.chat.completions.create(
+            model="gpt-4.1",
+            messages=[
+                {"role": "system", "content": "You are a helpful translation assistant."},
+                {"role": "user",   "content": prompt}
+            ],
+            temperature=0.0,
+        )
+    record_usage(resp)
+    return resp.choices[0].message.content.strip()
+
+def edit_translation(text: str, prev_source: str, prev_translation: str, target_lang: str) -> str:
+    """
+    Sửa bản dịch của một đoạn gần giống (translation memory) cho khớp với
+    đoạn mới, thay vì dịch lại từ đầu.
+    """
+    lang_name = LANG_PROMPT.get(target_lang, target_lang)
+    prompt = (
+        f"Here is a text and its {lang_name} translation:\n\n"
+        f"{prev_source}\n---\n{prev_translation}\n\n"
+        f"Update the translation so it matches this new text, changing as little as possible. "
+        "Keep placeholders like {0} exactly as they are. Reply with the translation only:\n\n" + text
     )
+    openai = _load_openai()
+    with METRICS.timer("translate.network"):
+        resp = openai.chat.completions.create(
+            model="gpt-4.1",
+            messages=[
+                {"role": "system", "content": "You are a helpful translation assistant."},
+                {"role": "user",   "content": prompt}
+            ],
+            temperature=0.0,
+        )
+    record_usage(resp)
     return resp.choices[0].message.content.strip()
 
+class DefaultTranslator(BaseTranslator):
+    """
+    BaseTranslator bọc translate_text() (openai client ở module level),
+    để pipeline mặc định cũng dùng được CachedTranslator.
+    """
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        return [translate_text(t, tgt) for t in texts]
+
+    def edit(self, text: str, prev_source: str, prev_target: str, src: str, tgt: str) -> str:
+        return edit_translation(text, prev_source, prev_target, tgt)
+
+    def translate_stream(self, texts: List[str], src: str, tgt: str):
+        """Một request streaming cho cả list, yield (index, bản dịch) dần dần."""
+        from .translator.streaming import openai_stream, parse_stream, stream_prompt
+        openai = _load_openai()
+        chunks = openai_stream(
+            openai.chat.completions.create,
+            model="gpt-4.1",
+            messages=[
+                {"role": "system", "content": "You are a helpful translation assistant."},
+                {"role": "user",   "content": stream_prompt(texts, LANG_PROMPT.get(tgt, tgt))}
+            ],
+            temperature=0.0,
+        )
+        return parse_stream(chunks, texts, lambda rest: self.translate(rest, src, tgt))
+
 PREFERRED_FONT = "NotoSans-Regular"
+@lru_cache(maxsize=1)
 def _find_system_vn_font() -> Optional[str]:
     base = os.path.dirname(__file__)
     fonts_dir = os.path.join(base, "fonts")
@@ -138,6 +218,7 @@ def extract_layout_pages(
     build 1 numpy mask và gắn vào PageCoordinates.layout_mask.
     Trả về dict: page_index → PageCoordinates.
     """
+    import numpy as np
     if ignore_classes is None:
         # các lớp không phải text (foil, bảng, chú thích công thức…)
         ignore_classes = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
@@ -153,7 +234,8 @@ def extract_layout_pages(
         h, w = pix.height, pix.width
         img = np.frombuffer(pix.samples, np.uint8).reshape(h, w, pix.n).astype(np.uint8)[..., ::-1]
 
-        pred = model.predict(img, imgsz=(h // 32) * 32)[0]
+        with METRICS.timer("layout"):
+            pred = model.predict(img, imgsz=(h // 32) * 32)[0]
 
         mask = np.ones((h, w), dtype=np.int32)
 
@@ -252,96 +334,687 @@ def render_translations_on_page(
             page.draw_rect(blk.bbox, color=(1, 0, 0), width=0.5)
         block_fs = blk.font_size if blk.font_size and blk.font_size > 0 else fontsize
         rect = blk.bbox
-        print(rect)
-        print(block_fs)
         try:
-            page.insert_textbox(
-                rect,
-                txt,
-                fontname=vn_fontname,
-                fontsize=block_fs,
-                color=(0, 0, 0),
-                overlay=True,
-                align=0, 
-            )
+            with METRICS.timer("emit"):
+                page.insert_textbox(
+                    rect,
+                    txt,
+                    fontname=vn_fontname,
+                    fontsize=block_fs,
+                    color=(0, 0, 0),
+                    overlay=True,
+                    align=0, 
+                )
         except Exception as e:
+            METRICS.incr("errors.emit")
             print(f"[ERROR] insert_textbox failed: {e}")
 
+def _redact_text_blocks(page: fitz.Page, blocks: List[BlockInfo]) -> None:
+    """
+    Xoá text gốc nằm trong các block sắp được dịch (in-place redaction).
+    Ảnh và vector graphics được giữ nguyên, không decode/re-encode image stream.
+    """
+    if not blocks:
+        return
+    for blk in blocks:
+        page.add_redact_annot(blk.bbox, fill=False)
+    kwargs = {"images": fitz.PDF_REDACT_IMAGE_NONE}
+    # PyMuPDF < 1.24.2 không có tham số graphics
+    if hasattr(fitz, "PDF_REDACT_LINE_ART_NONE"):
+        kwargs["graphics"] = fitz.PDF_REDACT_LINE_ART_NONE
+    page.apply_redactions(**kwargs)
+
+RENDER_MODES = ("rebuild", "overlay")
+
+@dataclass
+class PageResult:
+    """
+    Kết quả của một trang khi dùng iter_translate_pages().
+    pdf_bytes: document 1 trang đã render bản dịch.
+    """
+    page_index: int
+    page: PageCoordinates
+    text_blocks: List[BlockInfo]
+    translations: List[str]
+    pdf_bytes: bytes
+
+def extract_page(src: fitz.Document, pdf_p: Any, i: int) -> PageCoordinates:
+    """
+    Lấy PageCoordinates của trang i, fallback sang pdfplumber (pdf_p) cho
+    các text block rỗng/garbled.
+    """
+    page = src[i]
+    with METRICS.timer("extract"):
+        pc = PageCoordinates.from_page(i, page)
+
+    p_p = pdf_p.pages[i]
+    h = page.rect.height
+    for blk in pc.blocks:
+        if blk.block_type == 0 and (not blk.text.strip() or "·" in blk.text):
+            x0, y0, x1, y1 = blk.bbox.x0, blk.bbox.y0, blk.bbox.x1, blk.bbox.y1
+            # pdfplumber dùng origin ở bottom-left, nên phải đảo chiều y
+            top_pl = h - y1
+            bottom_pl = h - y0
+            with METRICS.timer("fallback"):
+                crop = p_p.within_bbox((x0, top_pl, x1, bottom_pl))
+                fb = crop.extract_text()
+            METRICS.incr("fallback.blocks")
+            if fb:
+                blk.text = fb
+    return pc
+
+def text_blocks_of(pc: PageCoordinates) -> List[BlockInfo]:
+    """Các text block có nội dung cần dịch."""
+    return [b for b in pc.blocks if b.block_type == 0 and b.text.strip()]
+
+# --- Paragraph làm đơn vị dịch ---
+# dấu kết thúc câu: đoạn kết thúc bằng các ký tự này không nối sang block sau
+SENTENCE_END = ".!?:;。！？)]\"'”’"
+# block/đoạn ngắn hơn (ô bảng, số trang, tiêu đề) không bao giờ được nối
+MIN_JOIN_CHARS = 20
+
+def _continues(prev: str, nxt: str) -> bool:
+    """nxt có phải phần tiếp theo của câu đang dở ở cuối prev không."""
+    prev, nxt = prev.rstrip(), nxt.lstrip()
+    if len(prev) < MIN_JOIN_CHARS or len(nxt) < MIN_JOIN_CHARS:
+        return False
+    if prev.endswith("-"):
+        return True
+    return prev[-1] not in SENTENCE_END and nxt[0].islower()
+
+def join_block_texts(texts: List[str]) -> str:
+    """
+    Ghép text của nhiều block thành một đoạn: bỏ xuống dòng vật lý và
+    nối lại các từ bị ngắt bằng dấu gạch nối cuối dòng.
+    """
+    joined = ""
+    for t in texts:
+        t = re.sub(r"-\s*\n\s*", "", t.strip())
+        t = re.sub(r"\s*\n\s*", " ", t)
+        if joined.endswith("-"):
+            joined = joined[:-1] + t
+        elif joined:
+            joined += " " + t
+        else:
+            joined = t
+    return joined
+
+def _join_lines(m: "re.Match") -> str:
+    # xuống dòng giữa hai ký tự CJK (không dùng space) -> nối liền, còn lại -> space
+    before, after = m.string[m.start() - 1], m.string[m.end()]
+    wide = unicodedata.east_asian_width(before) in "WF" and unicodedata.east_asian_width(after) in "WF"
+    return "" if wide else " "
+
+def split_translation(text: str, weights: List[float]) -> List[str]:
+    """
+    Chia bản dịch của một đoạn lại cho các block gốc theo tỉ lệ weights
+    (độ dài text gốc), cắt ở ranh giới từ (ở ký tự nếu ngôn ngữ không có space
+    hoặc có ít từ hơn số block; khi đó space giữa các từ được giữ lại trong
+    phần được cắt, "".join(parts) đọc lại đúng câu).
+    """
+    n = len(weights)
+    if n == 1:
+        return [text]
+    tokens = text.split()
+    sep = " "
+    if len(tokens) < n:
+        flat = re.sub(r"(?<=\S)\s*\n\s*(?=\S)", _join_lines, text.strip())
+        tokens, sep = list(flat), ""
+    total_w = sum(weights) or n
+    total_c = sum(len(t) for t in tokens) or 1
+    bounds, acc = [], 0.0
+    for w in weights:
+        acc += w
+        bounds.append(acc / total_w * total_c)
+    parts: List[List[str]] = [[] for _ in weights]
+    k, pos = 0, 0
+    for tok in tokens:
+        mid = pos + len(tok) / 2
+        while k < n - 1 and mid > bounds[k]:
+            k += 1
+        parts[k].append(tok)
+        pos += len(tok)
+    return [sep.join(p) for p in parts]
+
+def paragraph_units(text_blocks: List[BlockInfo]) -> List[List[int]]:
+    """
+    Nhóm text_blocks thành các đơn vị dịch (list index vào text_blocks) theo
+    thứ tự đọc: detect_paragraphs() gom theo cột, sau đó
+    - tách lại những chỗ block trước quá ngắn (ô bảng, số, tiêu đề)
+    - nối đoạn với đoạn kế tiếp (dòng ngay dưới, hoặc đầu cột sau) nếu câu
+      còn dở.
+    """
+    index = {id(b): i for i, b in enumerate(text_blocks)}
+    units: List[List[int]] = []
+    for para in detect_paragraphs(text_blocks):
+        unit = [index[id(para[0])]]
+        for prev, blk in zip(para, para[1:]):
+            if len(prev.text.strip()) >= MIN_JOIN_CHARS:
+                unit.append(index[id(blk)])
+            else:
+                units.append(unit)
+                unit = [index[id(blk)]]
+        units.append(unit)
+
+    stitched: List[List[int]] = []
+    for unit in units:
+        if stitched:
+            last = stitched[-1]
+            a, b = text_blocks[last[-1]], text_blocks[unit[0]]
+            new_column = b.bbox.x0 >= a.bbox.x1 - 1 and b.bbox.y0 < a.bbox.y0
+            # cùng cột, cách nhau không quá ~1.5 dòng (detect_paragraphs chỉ nối khi gap <= y_tol)
+            next_line = (
+                abs(b.bbox.x0 - a.bbox.x0) <= 50
+                and 0 <= b.bbox.y0 - a.bbox.y1 <= 1.5 * (a.font_size or 10)
+            )
+            if (new_column or next_line) and _continues(
+                join_block_texts([text_blocks[i].text for i in last]),
+                join_block_texts([text_blocks[i].text for i in unit]),
+            ):
+                last.extend(unit)
+                continue
+        stitched.append(list(unit))
+    return stitched
+
+def unit_text(text_blocks: List[BlockInfo], unit: List[int]) -> str:
+    # đơn vị 1 block gửi nguyên text gốc để cache cũ vẫn dùng được
+    if len(unit) == 1:
+        return text_blocks[unit[0]].text
+    return join_block_texts([text_blocks[i].text for i in unit])
+
+def translate_units(
+    texts: List[str],
+    target_lang: str,
+    translator: Optional[BaseTranslator] = None
+) -> List[str]:
+    """
+    Dịch danh sách đơn vị (đoạn văn). Đoạn không cần dịch (số, URL, code,
+    công thức, đã ở ngôn ngữ đích... xem prefilter) được giữ nguyên; phần
+    còn lại được mask (xem masking) trước khi gửi và khôi phục sau khi dịch.
+    translator=None -> gọi translate_text() từng đoạn, ngược lại gửi cả
+    danh sách qua translator.translate().
+    """
+    todo, results = split_translatable(texts, target_lang)
+    # che math/code/URL/số bằng {0}, {1}...; cache key cũng là dạng masked
+    masked = [mask(texts[i]) for i in todo]
+    pending = [m for m, _ in masked]
+    if METRICS.enabled:
+        METRICS.incr("units", len(texts))
+        METRICS.incr("tokens.estimated", sum(estimate_tokens(t) for t in pending))
+        METRICS.incr("masked.spans", sum(len(spans) for _, spans in masked))
+    if pending:
+        with METRICS.timer("translate"):
+            translated = _translate_list(pending, target_lang, translator)
+            retry = []
+            for i, (_, spans), tr in zip(todo, masked, translated):
+                restored = unmask(tr, spans)
+                if restored is None:
+                    retry.append(i)
+                else:
+                    results[i] = restored
+            if retry:
+                # model làm mất placeholder -> dịch lại bản gốc không mask
+                METRICS.incr("masked.fallback", len(retry))
+                results.update(zip(retry, _translate_list([texts[i] for i in retry], target_lang, translator)))
+    return [results[i] for i in range(len(texts))]
+
+def translate_units_stream(
+    texts: List[str],
+    target_lang: str,
+    translator: BaseTranslator
+):
+    """
+    Generator: như translate_units() nhưng yield (index, bản dịch) ngay khi
+    từng đoạn xong: đoạn giữ nguyên (prefilter) trước, sau đó các đoạn
+    translator trả về dần qua translate_stream() (nếu có).
+    """
+    from .translator.streaming import translate_stream
+    todo, keep = split_translatable(texts, target_lang)
+    yield from sorted(keep.items())
+    masked = [mask(texts[i]) for i in todo]
+    pending = [m for m, _ in masked]
+    if METRICS.enabled:
+        METRICS.incr("units", len(texts))
+        METRICS.incr("tokens.estimated", sum(estimate_tokens(t) for t in pending))
+        METRICS.incr("masked.spans", sum(len(spans) for _, spans in masked))
+    if not pending:
+        return
+    for k, tr in translate_stream(translator, pending, "auto", target_lang):
+        restored = unmask(tr, masked[k][1])
+        if restored is None:
+            METRICS.incr("masked.fallback")
+            restored = _translate_list([texts[todo[k]]], target_lang, translator)[0]
+        yield todo[k], restored
+
+def _translate_list(
+    texts: List[str],
+    target_lang: str,
+    translator: Optional[BaseTranslator]
+) -> List[str]:
+    if translator is not None:
+        return translator.translate(texts, "auto", target_lang)
+    return [translate_text(t, target_lang) for t in texts]
+
+def _count_blocks(text_blocks: List[BlockInfo]) -> None:
+    if METRICS.enabled:
+        METRICS.incr("blocks", len(text_blocks))
+        METRICS.incr("chars", sum(len(blk.text) for blk in text_blocks))
+
+def translate_blocks(
+    text_blocks: List[BlockInfo],
+    target_lang: str,
+    translator: Optional[BaseTranslator] = None
+) -> List[str]:
+    """
+    Dịch các block của một trang theo đơn vị đoạn văn (paragraph_units):
+    mỗi đoạn là một request, bản dịch được chia lại cho các block gốc theo
+    tỉ lệ độ dài. Kết quả tương ứng 1-1 với text_blocks.
+    """
+    _count_blocks(text_blocks)
+    units = paragraph_units(text_blocks)
+    results = translate_units([unit_text(text_blocks, u) for u in units], target_lang, translator)
+    translations = [""] * len(text_blocks)
+    for unit, tr in zip(units, results):
+        parts = split_translation(tr, [len(text_blocks[i].text) for i in unit])
+        for i, part in zip(unit, parts):
+            translations[i] = part
+    return translations
+
+@dataclass
+class _PageUnits:
+    pc: PageCoordinates
+    blocks: List[BlockInfo]
+    units: List[List[int]]
+    # bản dịch đã có sẵn (phần cuối của đoạn nối từ trang trước)
+    done: Dict[int, str] = field(default_factory=dict)
+
+def _long_units(page: _PageUnits) -> List[List[int]]:
+    return [
+        u for u in page.units
+        if u[0] not in page.done and len(unit_text(page.blocks, u).strip()) >= MIN_JOIN_CHARS
+    ]
+
+def _translate_held(
+    page: _PageUnits,
+    nxt: Optional[_PageUnits],
+    target_lang: str,
+    translator: Optional[BaseTranslator]
+) -> List[str]:
+    units = [u for u in page.units if u[0] not in page.done]
+    texts = [unit_text(page.blocks, u) for u in units]
+
+    # đoạn cuối trang nối sang đoạn đầu trang sau?
+    tail = head = None
+    if nxt is not None:
+        tails, heads = _long_units(page), _long_units(nxt)
+        if tails and heads and _continues(
+            unit_text(page.blocks, tails[-1]), unit_text(nxt.blocks, heads[0])
+        ):
+            tail, head = tails[-1], heads[0]
+            t = units.index(tail)
+            texts[t] = join_block_texts(
+                [page.blocks[i].text for i in tail] + [nxt.blocks[i].text for i in head]
+            )
+            METRICS.incr("units.cross_page")
+
+    results = translate_units(texts, target_lang, translator)
+    out = dict(page.done)
+    for unit, tr in zip(units, results):
+        weights = [len(page.blocks[i].text) for i in unit]
+        if unit is tail:
+            weights += [len(nxt.blocks[i].text) for i in head]
+        parts = split_translation(tr, weights)
+        for i, part in zip(unit, parts):
+            out[i] = part
+        if unit is tail:
+            for i, part in zip(head, parts[len(unit):]):
+                nxt.done[i] = part
+    return [out.get(i, "") for i in range(len(page.blocks))]
+
+def translate_pages(
+    pages: Any,
+    target_lang: str,
+    translator: Optional[BaseTranslator] = None
+):
+    """
+    Generator: nhận iterable PageCoordinates theo thứ tự trang, yield
+    (pc, translations) như translate_blocks() nhưng nối được cả đoạn văn
+    vắt qua hai trang liên tiếp. Giữ lại đúng một trang để nhìn trước trang sau.
+    """
+    held: Optional[_PageUnits] = None
+    for pc in pages:
+        blocks = text_blocks_of(pc)
+        _count_blocks(blocks)
+        cur = _PageUnits(pc, blocks, paragraph_units(blocks))
+        if held is not None:
+            yield held.pc, _translate_held(held, cur, target_lang, translator)
+        held = cur
+    if held is not None:
+        yield held.pc, _translate_held(held, None, target_lang, translator)
+
+def render_page(
+    out: fitz.Document,
+    src: fitz.Document,
+    pc: PageCoordinates,
+    translations: List[str],
+    renderer: Any,
+    images: Any,
+    mode: str = "rebuild",
+    debug: bool = False
+) -> fitz.Page:
+    """
+    Thêm trang pc.page_index của src vào cuối out và render bản dịch lên đó.
+    translations tương ứng 1-1 với text_blocks_of(pc).
+    """
+    text_blocks = text_blocks_of(pc)
+    newp = _new_output_page(out, src, pc, text_blocks, images, mode)
+
+    # D) render lên new page
+    renderer.render_page(newp, text_blocks, translations, debug)
+    return newp
+
+def _new_output_page(
+    out: fitz.Document,
+    src: fitz.Document,
+    pc: PageCoordinates,
+    text_blocks: List[BlockInfo],
+    images: Any,
+    mode: str
+) -> fitz.Page:
+    """Trang đích chưa có bản dịch: bản copy đã xoá text (overlay) hoặc trang mới + ảnh (rebuild)."""
+    from .images import image_xrefs
+    i = pc.page_index
+    page = src[i]
+
+    with METRICS.timer("emit.page"):
+        if mode == "overlay":
+            # A) copy nguyên trang gốc (ảnh, vector graphics) rồi xoá text cũ
+            out.insert_pdf(src, from_page=i, to_page=i)
+            newp = out[-1]
+            _redact_text_blocks(newp, text_blocks)
+        else:
+            # A) tạo page mới
+            r = page.rect
+            newp = out.new_page(width=r.width, height=r.height)
+
+            # B) re-insert images (mỗi xref chỉ nhúng một lần)
+            xrefs = image_xrefs(page)
+            for blk in pc.blocks:
+                if blk.block_type == 1 and blk.block_no in xrefs:
+                    images.place(newp, blk.bbox, xrefs[blk.block_no])
+    return newp
+
+def render_page_streaming(
+    out: fitz.Document,
+    src: fitz.Document,
+    pc: PageCoordinates,
+    target_lang: str,
+    translator: BaseTranslator,
+    renderer: Any,
+    images: Any,
+    mode: str = "rebuild",
+    debug: bool = False
+) -> List[str]:
+    """
+    Dịch và render trang pc cùng lúc: trang đích được tạo trước, mỗi đoạn
+    văn được render ngay khi bản dịch của nó về (translate_units_stream),
+    không chờ cả trang. Đơn vị dịch là đoạn văn trong trang (không nối qua
+    trang). -> translations tương ứng 1-1 với text_blocks_of(pc).
+    """
+    text_blocks = text_blocks_of(pc)
+    _count_blocks(text_blocks)
+    newp = _new_output_page(out, src, pc, text_blocks, images, mode)
+    units = paragraph_units(text_blocks)
+    translations = [""] * len(text_blocks)
+    texts = [unit_text(text_blocks, u) for u in units]
+    for k, tr in translate_units_stream(texts, target_lang, translator):
+        unit = units[k]
+        parts = split_translation(tr, [len(text_blocks[i].text) for i in unit])
+        for i, part in zip(unit, parts):
+            translations[i] = part
+        renderer.render_page(newp, [text_blocks[i] for i in unit], parts, debug)
+    return translations
+
+def _finish_job(input_pdf: str) -> None:
+    print("Done.")
+    METRICS.flush(job=os.path.basename(input_pdf))
+
 def convert_pdf(
     input_pdf: str,
     output_pdf: str,
     target_lang: str,
     api_key: str,
-    debug: bool
+    debug: bool,
+    mode: str = "rebuild",
+    render_workers: int = 0,
+    stream_window: int = 0,
+    max_rss_mb: Optional[float] = None,
+    translator: Optional[BaseTranslator] = None,
+    cache_db: Optional[str] = None,
+    work_dir: Optional[str] = None,
+    pipelined: bool = False,
+    extract_workers: int = 1,
+    translate_workers: int = 4,
+    page_cache: Optional[str] = None,
+    streaming: bool = False
 ) -> None:
     """
     1) Mở input_pdf
     2) Với mỗi page: 
          - lấy BlockInfo từ PageCoordinates
-         - re-insert images
-         - dịch từng block.text
-         - gọi render_translations_on_page()
+         - mode="rebuild": tạo trang mới, re-insert images
+           mode="overlay": copy nguyên trang gốc, chỉ redact phần text
+         - dịch theo đoạn văn (paragraph_units), kể cả đoạn nối qua trang,
+           rồi chia bản dịch lại cho từng block
+         - render bản dịch lên trang (ReflowRenderer)
     3) Lưu output_pdf
+
+    render_workers > 1: dịch hết trước, sau đó render song song bằng
+    nhiều process (mỗi process render một shard), rồi merge lại.
+    stream_window > 0: streaming mode cho PDF lớn, xử lý từng cửa sổ
+    stream_window trang, flush ra chunk và giải phóng bộ nhớ sau mỗi cửa sổ
+    (flush sớm khi RSS vượt max_rss_mb).
+    work_dir: ghi journal + shard đã render vào work_dir (thư mục rỗng hoặc
+    dành riêng cho job này); chạy lại với cùng input sẽ resume từ trang
+    cuối cùng đã xong.
+    pipelined: chạy extract (extract_workers process), dịch (translate_workers
+    thread) và render song song trên các trang khác nhau, nối bằng queue.
+
+    translator: BaseTranslator tuỳ chọn (mặc định dùng translate_text với api_key).
+    cache_db: đường dẫn sqlite, bọc translator trong CachedTranslator.
+    page_cache: thư mục cache các trang đã render (xem pagecache); trang có
+    cùng nội dung gốc + bản dịch + config renderer được ghép lại, không render.
+    Chỉ dùng được với đường render tuần tự: kết hợp với work_dir, pipelined,
+    stream_window, render_workers > 1 hoặc streaming -> ValueError.
+    streaming: mỗi trang là một request streaming (translate_stream), đoạn
+    nào dịch xong được render ngay; đơn vị dịch là đoạn trong trang (không
+    nối qua trang).
     """
     from .layout import ReflowRenderer
-    if not api_key:
-        raise ValueError("API key is required")
-    openai.api_key = api_key
+    from .images import ImageEmbedder
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode!r} (expected one of {RENDER_MODES})")
+    if page_cache:
+        unsupported = [name for name, on in (
+            ("work_dir", work_dir), ("pipelined", pipelined), ("stream_window", stream_window > 0),
+            ("render_workers", render_workers > 1), ("streaming", streaming),
+        ) if on]
+        if unsupported:
+            raise ValueError(f"page_cache cannot be combined with {', '.join(unsupported)}")
+    if translator is None:
+        if not api_key:
+            raise ValueError("API key is required")
+        _load_openai().api_key = api_key
+        if cache_db:
+            translator = DefaultTranslator()
+    if cache_db:
+        from .cache import CachedTranslator
+        translator = CachedTranslator(translator, cache_db)
+
+    if work_dir:
+        from .journal import convert_resumable
+        convert_resumable(
+            input_pdf, output_pdf, target_lang, work_dir,
+            translator=translator, mode=mode, debug=debug
+        )
+        _finish_job(input_pdf)
+        return
+
+    if pipelined:
+        from .pipeline import convert_pipelined
+        convert_pipelined(
+            input_pdf, output_pdf, target_lang,
+            translator=translator, mode=mode, debug=debug,
+            extract_workers=extract_workers, translate_workers=translate_workers
+        )
+        _finish_job(input_pdf)
+        return
+
+    if stream_window > 0:
+        from .shards import convert_windowed
+        convert_windowed(
+            input_pdf, output_pdf, target_lang,
+            window=stream_window, max_rss_mb=max_rss_mb, mode=mode, debug=debug,
+            translator=translator
+        )
+        _finish_job(input_pdf)
+        return
 
     import pdfplumber
     src = fitz.open(input_pdf)
     pdf_p = pdfplumber.open(input_pdf)
-    out = fitz.open()
     total = len(src)
+
+    def extracted():
+        for i in range(total):
+            print(f"[PAGE] {i+1}/{total}")
+            yield extract_page(src, pdf_p, i)
+
+    if render_workers > 1:
+        from .shards import TranslatedPage, render_parallel
+        pages: List[TranslatedPage] = []
+        for pc, translations in translate_pages(extracted(), target_lang, translator):
+            pages.append(TranslatedPage(pc, translations))
+        pdf_p.close()
+        src.close()
+        render_parallel(input_pdf, output_pdf, pages, render_workers, mode, debug)
+        _finish_job(input_pdf)
+        return
+
+    out = fitz.open()
     renderer = ReflowRenderer()
+    images = ImageEmbedder(src, out)
+
+    if streaming:
+        # E) dịch + render từng đoạn ngay khi bản dịch stream về
+        for pc in extracted():
+            render_page_streaming(out, src, pc, target_lang, translator or DefaultTranslator(),
+                                  renderer, images, mode, debug)
+        print(f"[SAVE] {output_pdf}")
+        with METRICS.timer("save"):
+            out.save(output_pdf)
+        _finish_job(input_pdf)
+        return
+
+    cache = None
+    if page_cache:
+        from .pagecache import PageCache, render_page_cached
+        cache = PageCache(page_cache)
+
+    # C) dịch theo đoạn văn (nối cả đoạn vắt qua trang), render từng trang
+    for pc, translations in translate_pages(extracted(), target_lang, translator):
+        if cache is not None:
+            render_page_cached(out, src, pc, translations, renderer, target_lang, cache, mode, debug)
+        else:
+            render_page(out, src, pc, translations, renderer, images, mode, debug)
 
-    for i in range(total):
-        print(f"[PAGE] {i+1}/{total}")
-        page = src[i]
-        pc = PageCoordinates.from_page(i, page)
+    print(f"[SAVE] {output_pdf}")
+    with METRICS.timer("save"):
+        if cache is not None:
+            print(f"[PAGECACHE] {cache.hits} reused, {cache.misses} rendered")
+            # fragment mỗi trang nhúng ảnh/font riêng -> gộp object trùng
+            out.save(output_pdf, garbage=4, deflate=True)
+        else:
+            out.save(output_pdf)
+    _finish_job(input_pdf)
 
-        p_p = pdf_p.pages[i]
-        h = page.rect.height
-        for blk in pc.blocks:
-            if blk.block_type == 0 and (not blk.text.strip() or "·" in blk.text):
-                x0, y0, x1, y1 = blk.bbox.x0, blk.bbox.y0, blk.bbox.x1, blk.bbox.y1
-                # pdfplumber dùng origin ở bottom-left, nên phải đảo chiều y
-                top_pl = h - y1
-                bottom_pl = h - y0
-                crop = p_p.within_bbox((x0, top_pl, x1, bottom_pl))
-                fb = crop.extract_text()
-                if fb:
-                    blk.text = fb
 
-        # A) tạo page mới
-        r = page.rect
-        newp = out.new_page(width=r.width, height=r.height)
+def parse_page_range(spec: str, total: int) -> List[int]:
+    """
+    "1-3,7,10-" -> [0, 1, 2, 6, 9, ..., total-1] (input 1-based, output 0-based).
+    """
+    result: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            start = int(a) if a.strip() else 1
+            end = int(b) if b.strip() else total
+        else:
+            start = end = int(part)
+        if start < 1 or end > total or start > end:
+            raise ValueError(f"Invalid page range {part!r} for {total} pages")
+        result.extend(range(start - 1, end))
+    return result
 
-        # B) re-insert images
-        raw = page.get_text("dict")
-        for blk in pc.blocks:
-            if blk.block_type == 1:
-                raw_blk = raw["blocks"][blk.block_no]
-                xref = raw_blk.get("xref", raw_blk.get("image"))
-                if isinstance(xref, int):
-                    img = src.extract_image(xref)["image"]
-                    newp.insert_image(blk.bbox, stream=img)
-
-        # C) dịch từng text-block
-        text_blocks = [b for b in pc.blocks if b.block_type == 0 and b.text.strip()]
-        translations = []
-        for blk in text_blocks:
-            print(f"[TRANSLATE] block_no={blk.block_no}")
-            # Để test, bạn có thể tạm: tr = "TEST"
-            clean = re.sub(r"-(\s*\n\s*)", "", blk.text)
-            tr = translate_text(blk.text, target_lang)
-            
-            print(f"[TRANSLATE] => {tr!r}")
-            translations.append(tr)
-
-        # D) render lên new page
-        renderer.render_page(newp, text_blocks, translations, debug)
+def iter_translate_pages(
+    input_pdf: str,
+    target_lang: str,
+    api_key: Optional[str] = None,
+    translator: Optional[BaseTranslator] = None,
+    pages: Optional[Any] = None,
+    mode: str = "rebuild",
+    debug: bool = False,
+    cancel: Optional[Any] = None
+):
+    """
+    Generator: dịch và render từng trang, yield PageResult ngay khi trang xong.
+    pages:  None (tất cả), chuỗi "1-3,7" (1-based), hoặc iterable page index
+            0-based; iterable được đọc lazy nên có thể là scheduler sinh trang
+            theo thời gian thực (vd trang người dùng đang xem)
+    cancel: object có is_set() (vd threading.Event); dừng trước trang kế tiếp
+            khi được set. Gọi .close() trên generator cũng dừng và đóng file.
+    """
+    from .layout import ReflowRenderer
+    from .images import ImageEmbedder
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode!r} (expected one of {RENDER_MODES})")
+    if translator is None:
+        if not api_key:
+            raise ValueError("API key is required")
+        _load_openai().api_key = api_key
+        translator = DefaultTranslator()
 
-    print(f"[SAVE] {output_pdf}")
-    out.save(output_pdf)
-    print("Done.")
\ No newline at end of file
+    import pdfplumber
+    src = fitz.open(input_pdf)
+    pdf_p = pdfplumber.open(input_pdf)
+    try:
+        total = len(src)
+        if pages is None:
+            selected = list(range(total))
+        elif isinstance(pages, str):
+            selected = parse_page_range(pages, total)
+        else:
+            selected = pages
+        renderer = ReflowRenderer()
+
+        for i in selected:
+            if cancel is not None and cancel.is_set():
+                print("[CANCEL] stopped")
+                return
+            print(f"[PAGE] {i+1}/{total}")
+            pc = extract_page(src, pdf_p, i)
+            text_blocks = text_blocks_of(pc)
+            out = fitz.open()
+            # đoạn nào dịch xong (stream) được render ngay, không chờ cả trang
+            translations = render_page_streaming(
+                out, src, pc, target_lang, translator, renderer, ImageEmbedder(src, out), mode, debug
+            )
+            data = out.tobytes(garbage=1)
+            out.close()
+            yield PageResult(i, pc, text_blocks, translations, data)
+    finally:
+        pdf_p.close()
+        src.close()
@@ -0,0 +1,95 @@
+import re
+from typing import Dict, Optional
+
+import fitz  # PyMuPDF
+
+_REF_RE = re.compile(r"(\d+) 0 R")
+
+
+def image_xrefs(page: fitz.Page) -> Dict[int, int]:
+    """
+    Map block_no (index trong page.get_text("dict")["blocks"]) -> image xref.
+    Ảnh inline (không có xref) sẽ không xuất hiện trong dict.
+    """
+    result: Dict[int, int] = {}
+    for info in page.get_image_info(xrefs=True):
+        xref = info.get("xref", 0)
+        if xref > 0:
+            result[info["number"]] = xref
+    return result
+
+
+class ImageEmbedder:
+    """
+    Nhúng ảnh từ document gốc sang document output khi rebuild trang.
+    - Mỗi xref gốc chỉ được nhúng một lần, các lần sau chỉ tham chiếu lại
+      (xref_map: src xref -> out xref), ví dụ logo lặp lại trên mọi trang.
+    - Stream ảnh được copy raw (giữ nguyên Filter/DecodeParms), không decode
+      rồi encode lại. Nếu copy raw lỗi thì fallback về extract_image.
+    """
+
+    def __init__(self, src: fitz.Document, out: fitz.Document):
+        self.src = src
+        self.out = out
+        self.xref_map: Dict[int, int] = {}
+        self.placements = 0
+
+    def _remap(self, source: str, memo: Dict[int, int], depth: int) -> str:
+        return _REF_RE.sub(
+            lambda m: f"{self._copy_object(int(m.group(1)), memo, depth + 1)} 0 R",
+            source,
+        )
+
+    def _copy_object(self, xref: int, memo: Dict[int, int], depth: int = 0) -> int:
+        """
+        Copy object `xref` (và các object nó tham chiếu: ColorSpace, SMask,
+        ICC profile...) từ src sang out mà không đụng tới nội dung stream.
+        """
+        if xref in self.xref_map:
+            return self.xref_map[xref]
+        if xref in memo:
+            return memo[xref]
+        if depth > 8:
+            raise ValueError(f"object graph too deep at xref {xref}")
+        new = self.out.get_new_xref()
+        memo[xref] = new
+        self.out.update_object(new, self._remap(self.src.xref_object(xref, compressed=True), memo, depth))
+        if self.src.xref_is_stream(xref):
+            # update_stream(compress=0) xoá Filter/DecodeParms -> đặt lại sau
+            self.out.update_stream(new, self.src.xref_stream_raw(xref), new=True, compress=0)
+            for key in ("Filter", "DecodeParms"):
+                kind, value = self.src.xref_get_key(xref, key)
+                if kind != "null":
+                    self.out.xref_set_key(new, key, self._remap(value, memo, depth))
+        return new
+
+    def _embed(self, page: fitz.Page, rect: fitz.Rect, xref: int) -> int:
+        memo: Dict[int, int] = {}
+        try:
+            out_xref = self._copy_object(xref, memo)
+            page.insert_image(rect, xref=out_xref)
+        except Exception as e:
+            print(f"[WARN] raw image copy failed for xref {xref}: {e}")
+            info = self.src.extract_image(xref)
+            mask: Optional[bytes] = None
+            if info.get("smask"):
+                mask = self.src.extract_image(info["smask"])["image"]
+            out_xref = page.insert_image(rect, stream=info["image"], mask=mask)
+        else:
+            # chỉ ghi nhận các object phụ khi copy thành công
+            for k, v in memo.items():
+                self.xref_map.setdefault(k, v)
+        self.xref_map[xref] = out_xref
+        return out_xref
+
+    def place(self, page: fitz.Page, rect: fitz.Rect, xref: int) -> int:
+        """
+        Đặt ảnh `xref` (của src) vào `rect` trên `page` (thuộc out).
+        Trả về xref của ảnh trong out.
+        """
+        self.placements += 1
+        out_xref = self.xref_map.get(xref)
+        if out_xref is None:
+            return self._embed(page, rect, xref)
+        page.insert_image(rect, xref=out_xref)
+        return out_xref
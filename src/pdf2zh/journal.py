@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from .core import BlockInfo, PageCoordinates
+from .metrics import METRICS
+from .translator.base import BaseTranslator, service_name
+
+# Trạng thái của từng trang theo thứ tự tiến trình
+PAGE_STATES = ("", "extracted", "translated", "rendered")
+JOURNAL_VERSION = 1
+# các file journal ghi trong work_dir (kể cả file .tmp khi đang ghi dở)
+_JOURNAL_FILE = re.compile(r"(job\.json|journal\.jsonl|page_\d+\.json|shard_\d+\.pdf)(\.tmp)?$")
+
+
+def page_to_dict(pc: PageCoordinates) -> Dict[str, Any]:
+    """Serialize PageCoordinates (bỏ layout_mask) sang dict JSON được."""
+    return {
+        "page_index": pc.page_index,
+        "width": pc.width,
+        "height": pc.height,
+        "blocks": [
+            {
+                "block_no": b.block_no,
+                "block_type": b.block_type,
+                "bbox": list(b.bbox),
+                "text": b.text,
+                "font_size": b.font_size,
+                "font_name": b.font_name,
+                "font_flags": b.font_flags,
+            }
+            for b in pc.blocks
+        ],
+    }
+
+
+def page_from_dict(data: Dict[str, Any]) -> PageCoordinates:
+    blocks = [
+        BlockInfo(
+            block_no=b["block_no"],
+            block_type=b["block_type"],
+            bbox=fitz.Rect(b["bbox"]),
+            text=b["text"],
+            font_size=b["font_size"],
+            font_name=b.get("font_name"),
+            font_flags=b.get("font_flags", 0),
+        )
+        for b in data["blocks"]
+    ]
+    return PageCoordinates(
+        page_index=data["page_index"],
+        width=data["width"],
+        height=data["height"],
+        blocks=blocks,
+    )
+
+
+def job_fingerprint(input_pdf: str, *params: Any) -> str:
+    """sha256 của nội dung input_pdf + các tham số ảnh hưởng tới output."""
+    h = hashlib.sha256()
+    with open(input_pdf, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(json.dumps([JOURNAL_VERSION, *map(str, params)]).encode("utf-8"))
+    return h.hexdigest()
+
+
+class JobJournal:
+    """
+    Journal của một lần convert, lưu trong work_dir:
+      job.json          : fingerprint của input + tham số
+      journal.jsonl     : append-only, mỗi dòng {"page": i, "state": ...}
+      page_00012.json   : blocks đã extract (+ translations khi đã dịch)
+      shard_00000.pdf   : các trang đã render của một shard
+    Nếu fingerprint khác (input hoặc tham số thay đổi) thì các file của
+    journal trong work_dir bị xoá và làm lại từ đầu. work_dir chưa có
+    job.json phải rỗng (hoặc chưa tồn tại): thư mục lạ có file khác bị từ
+    chối bằng ValueError, không bao giờ bị xoá.
+    """
+
+    def __init__(self, work_dir: str, fingerprint: str):
+        self.work_dir = work_dir
+        self.fingerprint = fingerprint
+        self.states: Dict[int, str] = {}
+        os.makedirs(work_dir, exist_ok=True)
+
+        job_path = os.path.join(work_dir, "job.json")
+        if not os.path.exists(job_path):
+            if os.listdir(work_dir):
+                raise ValueError(
+                    f"work_dir {work_dir!r} is not empty and has no job.json; "
+                    "use an empty or dedicated directory for the journal"
+                )
+            self._write_json(job_path, {"fingerprint": fingerprint})
+            return
+
+        with open(job_path, encoding="utf-8") as f:
+            old = json.load(f).get("fingerprint")
+        if old != fingerprint:
+            print(f"[JOURNAL] inputs changed, resetting {work_dir}")
+            self._reset()
+            self._write_json(job_path, {"fingerprint": fingerprint})
+        else:
+            self._replay()
+
+    def _reset(self) -> None:
+        # chỉ xoá file do journal tạo ra
+        for name in os.listdir(self.work_dir):
+            if _JOURNAL_FILE.match(name):
+                os.remove(os.path.join(self.work_dir, name))
+
+    def _replay(self) -> None:
+        path = os.path.join(self.work_dir, "journal.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # dòng cuối bị cắt ngang khi crash
+                    continue
+                self.states[entry["page"]] = entry["state"]
+
+    @staticmethod
+    def _write_json(path: str, data: Any) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _mark(self, page: int, state: str) -> None:
+        self.states[page] = state
+        with open(os.path.join(self.work_dir, "journal.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"page": page, "state": state}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _page_path(self, page: int) -> str:
+        return os.path.join(self.work_dir, f"page_{page:05d}.json")
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.work_dir, f"shard_{shard:05d}.pdf")
+
+    def state(self, page: int) -> str:
+        return self.states.get(page, "")
+
+    def reached(self, page: int, state: str) -> bool:
+        return PAGE_STATES.index(self.state(page)) >= PAGE_STATES.index(state)
+
+    def save_extracted(self, pc: PageCoordinates) -> None:
+        self._write_json(self._page_path(pc.page_index), {"page": page_to_dict(pc)})
+        self._mark(pc.page_index, "extracted")
+
+    def save_translated(self, pc: PageCoordinates, translations: List[str]) -> None:
+        self._write_json(
+            self._page_path(pc.page_index),
+            {"page": page_to_dict(pc), "translations": translations},
+        )
+        self._mark(pc.page_index, "translated")
+
+    def load_page(self, page: int) -> Dict[str, Any]:
+        with open(self._page_path(page), encoding="utf-8") as f:
+            data = json.load(f)
+        data["page"] = page_from_dict(data["page"])
+        return data
+
+    def mark_rendered(self, pages: List[int]) -> None:
+        for page in pages:
+            self._mark(page, "rendered")
+
+
+def convert_resumable(
+    input_pdf: str,
+    output_pdf: str,
+    target_lang: str,
+    work_dir: str,
+    translator: Optional[BaseTranslator] = None,
+    mode: str = "rebuild",
+    debug: bool = False,
+    shard_pages: Optional[int] = None
+) -> None:
+    """
+    Convert có checkpoint: mỗi trang đi qua extracted -> translated -> rendered,
+    ghi lại vào JobJournal. Các trang render theo shard (shard_pages trang);
+    khi chạy lại với cùng input/tham số, trang/shard đã xong được dùng lại,
+    không extract, gọi API hay render lại.
+    """
+    from .core import extract_page, render_page, text_blocks_of, translate_blocks
+    from .images import ImageEmbedder
+    from .layout import ReflowRenderer
+    from .shards import SHARD_PAGES, merge_shards
+    import pdfplumber
+
+    shard_pages = shard_pages or SHARD_PAGES
+    translator_name = service_name(translator) if translator else "translate_text"
+    journal = JobJournal(
+        work_dir,
+        job_fingerprint(input_pdf, target_lang, mode, translator_name, shard_pages),
+    )
+
+    src = fitz.open(input_pdf)
+    pdf_p = None
+    total = len(src)
+    renderer = ReflowRenderer()
+    paths: List[str] = []
+    try:
+        for n, start in enumerate(range(0, total, shard_pages)):
+            pages = list(range(start, min(start + shard_pages, total)))
+            path = journal.shard_path(n)
+            paths.append(path)
+            if os.path.exists(path) and all(journal.reached(i, "rendered") for i in pages):
+                print(f"[RESUME] pages {pages[0]+1}-{pages[-1]+1} already rendered")
+                continue
+
+            out = fitz.open()
+            images = ImageEmbedder(src, out)
+            for i in pages:
+                print(f"[PAGE] {i+1}/{total}")
+                if journal.reached(i, "translated"):
+                    data = journal.load_page(i)
+                    pc, translations = data["page"], data["translations"]
+                else:
+                    if journal.reached(i, "extracted"):
+                        pc = journal.load_page(i)["page"]
+                    else:
+                        if pdf_p is None:
+                            pdf_p = pdfplumber.open(input_pdf)
+                        pc = extract_page(src, pdf_p, i)
+                        journal.save_extracted(pc)
+                    translations = translate_blocks(text_blocks_of(pc), target_lang, translator)
+                    journal.save_translated(pc, translations)
+                render_page(out, src, pc, translations, renderer, images, mode, debug)
+
+            with METRICS.timer("save"):
+                out.save(path + ".tmp", garbage=1, no_new_id=True)
+            out.close()
+            os.replace(path + ".tmp", path)
+            journal.mark_rendered(pages)
+    finally:
+        if pdf_p is not None:
+            pdf_p.close()
+        src.close()
+
+    print(f"[SAVE] {output_pdf}")
+    merge_shards(paths, output_pdf)
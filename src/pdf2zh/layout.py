@@ -10,6 +10,11 @@ except ImportError:
     pyphen = None
 
 from .core import BlockInfo, _find_system_vn_font
+from .metrics import METRICS
+
+# tăng khi thay đổi cách render (wrap, font, vị trí...) để cache trang đã
+# render (pagecache) không trả lại kết quả cũ
+RENDER_VERSION = 1
 
 class ReflowRenderer:
     def __init__(
@@ -24,6 +29,7 @@ class ReflowRenderer:
         self.min_fontsize = min_fontsize
         self.max_iter = max_iter
         self.debug = debug
+        self.hyphen_lang = hyphen_lang
         self.hyph = pyphen.Pyphen(lang=hyphen_lang) if (pyphen and hyphen_lang) else None
 
     def _split_paragraphs(self, text: str) -> List[str]:
@@ -184,14 +190,15 @@ class ReflowRenderer:
                 continue
             rect = blk.bbox
             init_fs = blk.font_size if blk.font_size and blk.font_size > 0 else 12.0
-            lines, fs = self.reflow(
-                text=txt,
-                fontfile=fontfile,
-                fontname=fontname,
-                initial_fs=init_fs,
-                max_width=rect.width,
-                max_height=rect.height
-            )
+            with METRICS.timer("reflow"):
+                lines, fs = self.reflow(
+                    text=txt,
+                    fontfile=fontfile,
+                    fontname=fontname,
+                    initial_fs=init_fs,
+                    max_width=rect.width,
+                    max_height=rect.height
+                )
             try:
                 base_h = font.height(fs)
             except Exception:
@@ -216,12 +223,13 @@ class ReflowRenderer:
             baseline0 = rect.y0 + asc
 
             x0, y0 = rect.x0, rect.y0
-            for i, line in enumerate(lines):
-                yb = baseline0 + i * line_h
-                page.insert_text(
-                    (x0, yb),
-                    line,
-                    fontsize=fs,
-                    fontname=fontname,
-                    color=(0, 0, 0)
-                )
+            with METRICS.timer("emit"):
+                for i, line in enumerate(lines):
+                    yb = baseline0 + i * line_h
+                    page.insert_text(
+                        (x0, yb),
+                        line,
+                        fontsize=fs,
+                        fontname=fontname,
+                        color=(0, 0, 0)
+                    )
@@ -3,9 +3,9 @@ import re
 from typing import List, Tuple, Optional
 
 import fitz        # PyMuPDF
-import pdfplumber
 
-from .core import PageCoordinates, BlockInfo, translate_text, _find_system_vn_font
+from .core import PageCoordinates, BlockInfo, translate_text, _find_system_vn_font, _load_openai
+from .images import ImageEmbedder, image_xrefs
 
 def wrap_text(
     text: str,
@@ -133,12 +133,13 @@ def build_pdf_manual(
     """
     if not api_key:
         raise ValueError("API key is required")
-    import openai
-    openai.api_key = api_key
+    import pdfplumber
+    _load_openai().api_key = api_key
 
     src = fitz.open(input_pdf)
     pdfp = pdfplumber.open(input_pdf)
     out = fitz.open()
+    images = ImageEmbedder(src, out)
     total = len(src)
 
     for i in range(total):
@@ -162,15 +163,11 @@ def build_pdf_manual(
         r = page.rect
         newp = out.new_page(width=r.width, height=r.height)
 
-        # re-insert images
-        raw = page.get_text("dict")
+        # re-insert images (mỗi xref chỉ nhúng một lần)
+        xrefs = image_xrefs(page)
         for blk in pc.blocks:
-            if blk.block_type == 1:
-                rb = raw["blocks"][blk.block_no]
-                xref = rb.get("xref") or rb.get("image")
-                if isinstance(xref, int):
-                    img = src.extract_image(xref)["image"]
-                    newp.insert_image(blk.bbox, stream=img)
+            if blk.block_type == 1 and blk.block_no in xrefs:
+                images.place(newp, blk.bbox, xrefs[blk.block_no])
 
         # dịch text blocks
         text_blocks = [b for b in pc.blocks if b.block_type == 0 and b.text.strip()]
@@ -0,0 +1,67 @@
+"""
+Che (mask) các phần không cần dịch bên trong một đoạn văn trước khi gửi
+dịch: inline math ($..$, \\(..\\), lệnh LaTeX, x_i, a^2, ký hiệu toán),
+code span `..`, URL/email/DOI và số. Mỗi span được thay bằng placeholder
+{0}, {1}, ... theo thứ tự xuất hiện rồi khôi phục sau khi dịch.
+Hai đoạn chỉ khác nhau ở ký hiệu/số có cùng dạng masked -> dùng chung cache.
+"""
+import re
+from typing import List, Optional, Tuple
+
+_SPAN = re.compile(
+    r"`[^`\n]+`"                                           # code span
+    r"|\$\$.+?\$\$|\$[^$\n]+\$|\\\(.+?\\\)|\\\[.+?\\\]"    # LaTeX math
+    r"|(?:https?://|www\.)\S+?(?=[.,;:)\]]?(?:\s|$))"      # URL
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+"                       # email
+    r"|\b10\.\d{4,9}/\S+?(?=[.,;]?(?:\s|$))"               # DOI
+    r"|\\[A-Za-z]+(?:\{[^{}]*\})*(?:[_^](?:\{[^{}]*\}|[A-Za-z0-9]+))*"  # lệnh LaTeX
+    r"|[A-Za-z0-9]+(?:[_^](?:\{[^{}]*\}|[A-Za-z0-9]+))+"   # x_i, a^2, W_{ij}
+    r"|[=<>≤≥≈≠±×÷∑∏∫√∞∂∇α-ωΑ-Ω]+"                         # ký hiệu toán, chữ Hy Lạp
+    r"|(?<![\w.])\d+(?:[.,]\d+)*%?(?!\w)",                 # số
+    re.S,
+)
+_PLACEHOLDER = re.compile(r"\{(\d+)\}")
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def mask(text: str) -> Tuple[str, List[str]]:
+    """
+    -> (text đã mask, danh sách span gốc theo số thứ tự placeholder).
+    Các span chỉ cách nhau bởi khoảng trắng được gộp thành một placeholder.
+    Text đã chứa sẵn chuỗi dạng {N} thì giữ nguyên (không mask).
+    """
+    if _PLACEHOLDER.search(text):
+        return text, []
+    ranges: List[List[int]] = []
+    for m in _SPAN.finditer(text):
+        if ranges and not text[ranges[-1][1]:m.start()].strip():
+            ranges[-1][1] = m.end()
+        else:
+            ranges.append([m.start(), m.end()])
+    if not ranges:
+        return text, []
+    parts, spans, pos = [], [], 0
+    for start, end in ranges:
+        parts.append(text[pos:start])
+        parts.append("{%d}" % len(spans))
+        spans.append(text[start:end])
+        pos = end
+    parts.append(text[pos:])
+    masked = "".join(parts)
+    if not _LETTER.search(_PLACEHOLDER.sub("", masked)):
+        # chỉ còn ký hiệu, không có chữ để dịch -> không mask
+        return text, []
+    return masked, spans
+
+
+def unmask(text: str, spans: List[str]) -> Optional[str]:
+    """
+    Thay placeholder trong bản dịch bằng span gốc. None nếu bản dịch làm mất
+    hoặc sinh thêm placeholder (khi đó nên dịch lại bản không mask).
+    """
+    if not spans:
+        return text
+    found = [int(n) for n in _PLACEHOLDER.findall(text)]
+    if sorted(set(found)) != list(range(len(spans))):
+        return None
+    return _PLACEHOLDER.sub(lambda m: spans[int(m.group(1))], text)
@@ -0,0 +1,219 @@
+"""
+Translation memory mờ (fuzzy): tìm đoạn nguồn gần giống đã dịch trước đó
+bằng MinHash + LSH trên n-gram ký tự, lưu trong SQLite.
+
+- Mỗi đoạn -> tập 5-gram ký tự (đã chuẩn hoá) -> chữ ký MinHash NUM_PERM số.
+- Chữ ký chia thành BANDS band; mỗi band băm thành một bucket (kèm service
+  và ngôn ngữ). Bảng lsh(bucket, seg_id) có index, nên một lần tra chỉ là
+  một truy vấn IN (...) BANDS giá trị + kiểm tra lại vài ứng viên bằng
+  Jaccard thật -> vài ms kể cả khi có hàng triệu đoạn.
+"""
+import hashlib
+import random
+import re
+import sqlite3
+import struct
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+
+from .metrics import METRICS
+from .translator.base import BaseTranslator, service_name
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE = 5
+MAX_CANDIDATES = 20
+_rng = random.Random(1234)  # seed cố định: chữ ký phải giống nhau giữa các lần chạy
+# họ hàm băm multiply-shift: ((a*h + b) mod 2^64) >> 32, a lẻ
+_PERM_A = [_rng.getrandbits(64) | 1 for _ in range(NUM_PERM)]
+_PERM_B = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    norm = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(norm) <= SHINGLE:
+        return frozenset([norm])
+    return frozenset(norm[i:i + SHINGLE] for i in range(len(norm) - SHINGLE + 1))
+
+
+def minhash(grams: FrozenSet[str]) -> List[int]:
+    import numpy as np
+    h = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+         for g in grams),
+        dtype=np.uint64, count=len(grams),
+    )
+    a = np.array(_PERM_A, dtype=np.uint64)[:, None]
+    b = np.array(_PERM_B, dtype=np.uint64)[:, None]
+    with np.errstate(over="ignore"):
+        return ((a * h[None, :] + b) >> np.uint64(32)).min(axis=1).tolist()
+
+
+def normalize(text: str) -> str:
+    """So khớp "giống hệt": chỉ bỏ khác biệt Unicode (NFKC) và khoảng trắng."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _buckets(signature: List[int], scope: str) -> List[int]:
+    rows = NUM_PERM // BANDS
+    prefix = scope.encode("utf-8")
+    out = []
+    for band in range(BANDS):
+        data = struct.pack(f"<B{rows}Q", band, *signature[band * rows:(band + 1) * rows])
+        digest = hashlib.blake2b(prefix + data, digest_size=8).digest()
+        out.append(struct.unpack("<q", digest)[0])
+    return out
+
+
+@dataclass
+class Match:
+    similarity: float
+    source: str
+    target: str
+    exact: bool = False  # normalize(source) == normalize(câu cần dịch)
+
+
+class TranslationMemory:
+    """
+    Kho (service, src, tgt, source) -> target kèm index LSH.
+    lookup() trả về Match giống nhất có similarity >= min_similarity.
+    """
+
+    def __init__(self, db_path: str, min_similarity: float = 0.7):
+        self.db_path = db_path
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                  id INTEGER PRIMARY KEY,
+                  service TEXT, src TEXT, tgt TEXT,
+                  source TEXT, target TEXT,
+                  UNIQUE(service, src, tgt, source)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS lsh (
+                  bucket INTEGER, seg_id INTEGER,
+                  PRIMARY KEY(bucket, seg_id)
+                ) WITHOUT ROWID
+            """)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, service: str, src: str, tgt: str, source: str, target: str) -> None:
+        buckets = _buckets(minhash(shingles(source)), f"{service}\0{src}\0{tgt}")
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM segments WHERE service=? AND src=? AND tgt=? AND source=?",
+                (service, src, tgt, source),
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE segments SET target=? WHERE id=?", (target, row[0]))
+                return
+            seg_id = self._conn.execute(
+                "INSERT INTO segments (service, src, tgt, source, target) VALUES (?,?,?,?,?)",
+                (service, src, tgt, source, target),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lsh (bucket, seg_id) VALUES (?,?)",
+                [(b, seg_id) for b in buckets],
+            )
+
+    def lookup(self, service: str, src: str, tgt: str, source: str) -> Optional[Match]:
+        grams = shingles(source)
+        buckets = _buckets(minhash(grams), f"{service}\0{src}\0{tgt}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT s.source, s.target FROM segments s JOIN (
+                  SELECT seg_id, COUNT(*) AS n FROM lsh
+                  WHERE bucket IN ({",".join("?" * len(buckets))})
+                  GROUP BY seg_id ORDER BY n DESC LIMIT {MAX_CANDIDATES}
+                ) c ON s.id = c.seg_id
+                """,
+                buckets,
+            ).fetchall()
+        norm = normalize(source)
+        best: Optional[Match] = None
+        for cand_source, cand_target in rows:
+            exact = normalize(cand_source) == norm
+            sim = 1.0 if exact else jaccard(grams, shingles(cand_source))
+            # cùng similarity thì ưu tiên bản khớp chính xác
+            if sim >= self.min_similarity and (
+                best is None or (sim, exact) > (best.similarity, best.exact)
+            ):
+                best = Match(sim, cand_source, cand_target, exact)
+        return best
+
+
+class FuzzyMemoryTranslator(BaseTranslator):
+    """
+    Wrapper dùng TranslationMemory trước khi gọi inner:
+    - khớp chính xác sau normalize() (Match.exact): trả luôn bản dịch đã lưu.
+      Jaccard cao chưa đủ: hai câu chỉ khác một token ("not", một con số)
+      vẫn giống nhau > 0.95 nhưng bản dịch thì khác
+    - similarity >= edit_threshold và inner có edit(): gửi request "sửa bản
+      dịch cũ cho khớp câu mới" (ngắn, rẻ hơn dịch lại từ đầu)
+    - còn lại: dịch bình thường. Mọi kết quả mới đều được thêm vào memory.
+    Đặt bên trong CachedTranslator (cache exact match trước, memory sau).
+    """
+
+    def __init__(
+        self,
+        inner: BaseTranslator,
+        memory: TranslationMemory,
+        edit_threshold: float = 0.75
+    ):
+        self.inner = inner
+        self.memory = memory
+        self.service = service_name(inner)
+        self.edit_threshold = edit_threshold
+        self.served = 0
+        self.edited = 0
+        self.missed = 0
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        results: List[Optional[str]] = [None] * len(texts)
+        todo: List[int] = []
+        edit = getattr(self.inner, "edit", None)
+        for i, t in enumerate(texts):
+            with METRICS.timer("memory.lookup"):
+                match = self.memory.lookup(self.service, src, tgt, t)
+            if match and match.exact:
+                self.served += 1
+                METRICS.incr("memory.served")
+                results[i] = match.target
+            elif match and edit is not None and match.similarity >= self.edit_threshold:
+                self.edited += 1
+                METRICS.incr("memory.edited")
+                results[i] = edit(t, match.source, match.target, src, tgt)
+                self.memory.add(self.service, src, tgt, t, results[i])
+            else:
+                self.missed += 1
+                todo.append(i)
+        if todo:
+            translated = self.inner.translate([texts[i] for i in todo], src, tgt)
+            for i, tr in zip(todo, translated):
+                results[i] = tr
+                self.memory.add(self.service, src, tgt, texts[i], tr)
+        return results
+
+    def close(self) -> None:
+        self.memory.close()
@@ -0,0 +1,217 @@
+"""
+Metrics/instrumentation cho pipeline dịch.
+
+Timer (giây):   extract, fallback, layout, translate, translate.network,
+                translate.queue_wait, reflow, emit, save
+Counter:        blocks, chars, tokens.prompt, tokens.completion, tokens.estimated,
+                cache.hits, cache.misses, translate.retries, ...
+
+Mặc định tắt: timer() trả về một context manager no-op dùng chung và incr()
+return ngay, nên code được instrument gần như không tốn gì.
+Bật bằng env PDF2ZH_METRICS (phân cách bằng dấu phẩy):
+    log              -> in một dòng [METRICS] mỗi job
+    json:<path>      -> append snapshot mỗi job vào file JSON lines
+    otel             -> ghi vào OpenTelemetry meter (cần opentelemetry-api)
+hoặc gọi METRICS.enable(sink, ...) trong code.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class TimerStat:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Registry timer/counter của một process (thread-safe).
+    sinks: object có thể có
+      - record(kind, name, value): gọi ngay mỗi lần observe/incr ("timer"/"counter")
+      - export(snapshot): gọi khi flush(), snapshot là dict JSON được
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sinks: List[Any] = []
+        self._live: List[Any] = []
+        self._lock = threading.Lock()
+        self.timers: Dict[str, TimerStat] = {}
+        self.counters: Dict[str, float] = {}
+
+    def enable(self, *sinks: Any) -> None:
+        self.sinks.extend(sinks)
+        self._live = [s for s in self.sinks if hasattr(s, "record")]
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.sinks = []
+        self._live = []
+        self.reset()
+
+    def timer(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            stat = self.timers.get(name)
+            if stat is None:
+                stat = self.timers[name] = TimerStat()
+            stat.add(seconds)
+        for sink in self._live:
+            sink.record("timer", name, seconds)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        for sink in self._live:
+            sink.record("counter", name, value)
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "labels": {"pid": os.getpid(), **labels},
+                "timers": {k: asdict(v) for k, v in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+
+    def flush(self, **labels: Any) -> Optional[Dict[str, Any]]:
+        """Export snapshot hiện tại ra mọi sink rồi reset (gọi sau mỗi job)."""
+        if not self.enabled:
+            return None
+        snap = self.snapshot(**labels)
+        self.reset()
+        for sink in self.sinks:
+            if hasattr(sink, "export"):
+                sink.export(snap)
+        return snap
+
+
+class LogSink:
+    """In snapshot thành một dòng [METRICS] (timer: tổng giây, counter: giá trị)."""
+
+    def export(self, snap: Dict[str, Any]) -> None:
+        parts = [f"{k}={v['total']:.3f}s/{v['count']}" for k, v in snap["timers"].items()]
+        parts += [f"{k}={v:g}" for k, v in snap["counters"].items()]
+        print(f"[METRICS] {' '.join(parts)}")
+
+
+class JsonSink:
+    """Append mỗi snapshot thành một dòng JSON (an toàn khi nhiều process cùng ghi)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, snap: Dict[str, Any]) -> None:
+        line = json.dumps(snap, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class OTelSink:
+    """
+    Ghi trực tiếp vào OpenTelemetry metrics API: timer -> histogram (đơn vị s),
+    counter -> counter. Exporter/provider do ứng dụng cấu hình như bình thường.
+    """
+
+    def __init__(self, meter: Any = None, prefix: str = "pdf2zh."):
+        if meter is None:
+            from opentelemetry import metrics as otel_metrics
+            meter = otel_metrics.get_meter("pdf2zh")
+        self.meter = meter
+        self.prefix = prefix
+        self._instruments: Dict[str, Any] = {}
+
+    def record(self, kind: str, name: str, value: float) -> None:
+        inst = self._instruments.get(name)
+        if inst is None:
+            if kind == "timer":
+                inst = self.meter.create_histogram(self.prefix + name, unit="s")
+            else:
+                inst = self.meter.create_counter(self.prefix + name)
+            self._instruments[name] = inst
+        if kind == "timer":
+            inst.record(value)
+        else:
+            inst.add(value)
+
+
+def sinks_from_spec(spec: str) -> List[Any]:
+    """'log,json:metrics.jsonl,otel' -> list sink."""
+    sinks: List[Any] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item == "log":
+            sinks.append(LogSink())
+        elif item.startswith("json:"):
+            sinks.append(JsonSink(item[len("json:"):]))
+        elif item == "otel":
+            sinks.append(OTelSink())
+        else:
+            raise ValueError(f"Unknown metrics sink: {item!r}")
+    return sinks
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 ký tự / token, đủ để so sánh tương đối giữa các job
+    return (len(text) + 3) // 4
+
+
+METRICS = Metrics()
+
+if os.getenv("PDF2ZH_METRICS"):
+    METRICS.enable(*sinks_from_spec(os.environ["PDF2ZH_METRICS"]))
@@ -0,0 +1,140 @@
+"""
+Dịch một PDF sang nhiều ngôn ngữ trong một lần chạy:
+extract (PyMuPDF + fallback pdfplumber) và page model chỉ làm một lần,
+các ngôn ngữ được dịch song song (thread, vì dịch là I/O mạng), rồi render
+ra một file cho mỗi ngôn ngữ từ cùng page model.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from .core import (
+    RENDER_MODES,
+    DefaultTranslator,
+    PageCoordinates,
+    _finish_job,
+    _load_openai,
+    extract_page,
+    render_page,
+    translate_pages,
+)
+from .metrics import METRICS
+from .translator.base import BaseTranslator
+
+
+def extract_pages(input_pdf: str) -> List[PageCoordinates]:
+    """Extract mọi trang một lần (page model dùng chung cho mọi ngôn ngữ)."""
+    import pdfplumber
+    with fitz.open(input_pdf) as src, pdfplumber.open(input_pdf) as pdf_p:
+        total = len(src)
+        pages = []
+        for i in range(total):
+            print(f"[PAGE] {i+1}/{total}")
+            pages.append(extract_page(src, pdf_p, i))
+    return pages
+
+
+def _translate_lang(
+    pages: List[PageCoordinates],
+    target_lang: str,
+    translator: Optional[BaseTranslator]
+) -> List[List[str]]:
+    # page model chỉ được đọc, nên các thread dùng chung được
+    return [translations for _, translations in translate_pages(pages, target_lang, translator)]
+
+
+def _render_lang(
+    input_pdf: str,
+    output_pdf: str,
+    pages: List[PageCoordinates],
+    translations: List[List[str]],
+    target_lang: str,
+    mode: str,
+    debug: bool,
+    page_cache: Optional[str] = None
+) -> None:
+    from .images import ImageEmbedder
+    from .layout import ReflowRenderer
+
+    with fitz.open(input_pdf) as src:
+        out = fitz.open()
+        renderer = ReflowRenderer()
+        images = ImageEmbedder(src, out)
+        cache = None
+        if page_cache:
+            from .pagecache import PageCache, render_page_cached
+            cache = PageCache(page_cache)
+        for pc, tr in zip(pages, translations):
+            if cache is not None:
+                render_page_cached(out, src, pc, tr, renderer, target_lang, cache, mode, debug)
+            else:
+                render_page(out, src, pc, tr, renderer, images, mode, debug)
+        print(f"[SAVE] {output_pdf}")
+        with METRICS.timer("save"):
+            if cache is not None:
+                out.save(output_pdf, garbage=4, deflate=True)
+            else:
+                out.save(output_pdf)
+        out.close()
+
+
+def convert_pdf_multi(
+    input_pdf: str,
+    outputs: Dict[str, str],
+    api_key: str = "",
+    debug: bool = False,
+    mode: str = "rebuild",
+    render_workers: int = 0,
+    translator: Optional[BaseTranslator] = None,
+    cache_db: Optional[str] = None,
+    lang_workers: int = 0,
+    page_cache: Optional[str] = None
+) -> None:
+    """
+    outputs: {target_lang: output_pdf}.
+    1) Extract mọi trang một lần
+    2) Dịch song song cho từng ngôn ngữ (lang_workers thread, mặc định mỗi
+       ngôn ngữ một thread; translator phải thread-safe như CachedTranslator)
+    3) Ngôn ngữ nào dịch xong thì render ngay (trong lúc các ngôn ngữ khác
+       vẫn đang dịch); render_workers > 1 render song song bằng process,
+       page_cache dùng lại các trang đã render (xem pagecache); hai tuỳ
+       chọn này không dùng chung được (ValueError).
+    """
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode!r} (expected one of {RENDER_MODES})")
+    if page_cache and render_workers > 1:
+        raise ValueError("page_cache cannot be combined with render_workers")
+    if not outputs:
+        raise ValueError("At least one target language is required")
+    if translator is None:
+        if not api_key:
+            raise ValueError("API key is required")
+        _load_openai().api_key = api_key
+        translator = DefaultTranslator()
+    if cache_db:
+        from .cache import CachedTranslator
+        translator = CachedTranslator(translator, cache_db)
+
+    pages = extract_pages(input_pdf)
+    with ThreadPoolExecutor(max_workers=lang_workers or len(outputs)) as ex:
+        futures = {
+            ex.submit(_translate_lang, pages, lang, translator): lang for lang in outputs
+        }
+        for fut in as_completed(futures):
+            lang = futures[fut]
+            translations = fut.result()
+            print(f"[LANG] {lang} translated")
+            output_pdf = outputs[lang]
+            os.makedirs(os.path.dirname(output_pdf) or ".", exist_ok=True)
+            if render_workers > 1:
+                from .shards import TranslatedPage, render_parallel
+                render_parallel(
+                    input_pdf, output_pdf,
+                    [TranslatedPage(pc, tr) for pc, tr in zip(pages, translations)],
+                    render_workers, mode, debug
+                )
+            else:
+                _render_lang(input_pdf, output_pdf, pages, translations, lang, mode, debug, page_cache)
+    _finish_job(input_pdf)
@@ -0,0 +1,175 @@
+"""
+Cache các trang đã render (content-addressed): mỗi trang đã dịch được lưu
+thành một PDF 1 trang, key là sha256 của
+  (fingerprint trang gốc, hash bản dịch, ngôn ngữ đích, config renderer/version).
+Lần chạy sau trang nào có key trùng thì chỉ cần insert_pdf fragment vào
+output, không wrap/render lại; chỉ các trang có bản dịch hoặc config thay
+đổi mới phải render.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from .core import PageCoordinates, _find_system_vn_font, render_page
+from .metrics import METRICS
+
+
+_REF_RE = re.compile(r"(\d+) 0 R")
+
+
+def _page_resources(src: fitz.Document, xref: int) -> str:
+    """/Resources của trang (dict inline hoặc "N 0 R"), kể cả kế thừa từ /Pages cha."""
+    seen = set()
+    while xref and xref not in seen:
+        seen.add(xref)
+        kind, value = src.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return value
+        kind, parent = src.xref_get_key(xref, "Parent")
+        xref = int(parent.split()[0]) if kind == "xref" else 0
+    return ""
+
+
+def _hash_resources(src: fitz.Document, h: Any, source: str) -> None:
+    """
+    Hash toàn bộ closure của /Resources: mọi object được tham chiếu (đệ quy:
+    Form XObject và resource của nó, font + FontFile, ExtGState, ảnh...) cùng
+    raw stream của chúng. Số xref được thay bằng thứ tự gặp lần đầu, nên hai
+    file giống hệt nội dung nhưng đánh số object khác vẫn cùng fingerprint.
+    """
+    order: Dict[int, int] = {}
+    visited = set()
+    todo = [source]
+    while todo:
+        text = todo.pop()
+        refs = [int(m) for m in _REF_RE.findall(text)]
+        for xref in refs:
+            order.setdefault(xref, len(order))
+        h.update(_REF_RE.sub(lambda m: f"#{order[int(m.group(1))]}", text).encode())
+        for xref in reversed(refs):
+            if xref in visited:
+                continue
+            visited.add(xref)
+            if src.xref_get_key(xref, "Type")[1] in ("/Page", "/Pages"):
+                # không đi ngược lên cây trang (vd /P của annotation)
+                continue
+            h.update(b"\0obj")
+            if src.xref_is_stream(xref):
+                h.update(src.xref_stream_raw(xref) or b"")
+            todo.append(src.xref_object(xref, compressed=True))
+
+
+def page_fingerprint(src: fitz.Document, page_index: int) -> str:
+    """
+    Hash nội dung trang gốc: kích thước/rotation, content stream và toàn bộ
+    resource trang dùng (xem _hash_resources) -- hai trang chỉ khác nhau bên
+    trong một Form XObject hay font không được trùng key.
+    """
+    page = src[page_index]
+    h = hashlib.sha256()
+    h.update(repr((tuple(page.rect), page.rotation)).encode())
+    h.update(page.read_contents())
+    _hash_resources(src, h, _page_resources(src, page.xref))
+    return h.hexdigest()
+
+
+def renderer_config(renderer: Any, mode: str, debug: bool) -> List[Any]:
+    from .layout import RENDER_VERSION
+    font = _find_system_vn_font()
+    return [
+        RENDER_VERSION,
+        fitz.VersionBind,
+        mode,
+        debug,
+        renderer.line_spacing,
+        renderer.min_fontsize,
+        renderer.max_iter,
+        getattr(renderer, "hyphen_lang", None) if renderer.hyph else None,
+        os.path.basename(font) if font else None,
+    ]
+
+
+def page_key(fingerprint: str, translations: List[str], target_lang: str, config: List[Any]) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([fingerprint, translations, target_lang, config], ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+class PageCache:
+    """
+    Thư mục cache_dir/ab/<key>.pdf. Ghi qua file tạm + os.replace nên nhiều
+    process dùng chung một thư mục được.
+    Không có giới hạn dung lượng và không tự xoá entry cũ: mỗi bản dịch hoặc
+    config renderer mới của một trang thêm một fragment, nên thư mục lớn dần
+    theo thời gian; xoá cả thư mục (hoặc các file lâu không đọc) khi cần.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def render_page_cached(
+    out: fitz.Document,
+    src: fitz.Document,
+    pc: PageCoordinates,
+    translations: List[str],
+    renderer: Any,
+    target_lang: str,
+    cache: PageCache,
+    mode: str = "rebuild",
+    debug: bool = False
+) -> bool:
+    """
+    Như render_page(), nhưng lấy trang từ cache nếu có; trang mới render
+    được lưu vào cache. Ảnh không còn được dùng chung giữa các trang, nên
+    output nên được save với garbage=4 để gộp object trùng. -> True nếu hit.
+    """
+    from .images import ImageEmbedder
+
+    key = page_key(
+        page_fingerprint(src, pc.page_index), translations, target_lang,
+        renderer_config(renderer, mode, debug),
+    )
+    path = cache.get(key)
+    if path is not None:
+        try:
+            with fitz.open(path) as frag:
+                out.insert_pdf(frag)
+            cache.hits += 1
+            METRICS.incr("pagecache.hits")
+            return True
+        except Exception:
+            # fragment hỏng -> render lại và ghi đè
+            pass
+    cache.misses += 1
+    METRICS.incr("pagecache.misses")
+    frag = fitz.open()
+    render_page(frag, src, pc, translations, renderer, ImageEmbedder(src, frag), mode, debug)
+    data = frag.tobytes(garbage=1)
+    cache.put(key, data)
+    out.insert_pdf(frag)
+    frag.close()
+    return False
@@ -0,0 +1,282 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from .metrics import METRICS
+from .translator.base import BaseTranslator
+
+_DONE = None  # sentinel giữa các stage
+
+
+@dataclass
+class StageStats:
+    """
+    Thống kê của một stage trong pipeline.
+    busy:  tổng thời gian làm việc thật (giây, cộng dồn mọi worker)
+    wait:  tổng thời gian chờ input từ stage trước
+    """
+    name: str
+    workers: int
+    items: int = 0
+    busy: float = 0.0
+    wait: float = 0.0
+
+    def utilization(self, wall: float) -> float:
+        if wall <= 0 or self.workers <= 0:
+            return 0.0
+        return self.busy / (wall * self.workers)
+
+
+def _extract_worker(input_pdf: str, tasks: Any, results: Any) -> None:
+    """
+    Process extract: lấy page index từ `tasks`, extract (fitz + pdfplumber)
+    rồi đẩy (i, page dict, thời gian) vào `results`. results có maxsize nên
+    process sẽ bị chặn khi các stage sau chưa kịp xử lý (backpressure).
+    Lỗi được gửi về dạng (i, None, repr(lỗi)) rồi process dừng
+    (i = -1 nếu lỗi khi mở file).
+    """
+    from .core import extract_page
+    from .journal import page_to_dict
+    import pdfplumber
+
+    src = pdf_p = None
+    i = -1
+    try:
+        src = fitz.open(input_pdf)
+        pdf_p = pdfplumber.open(input_pdf)
+        while True:
+            i = tasks.get()
+            if i is _DONE:
+                break
+            t0 = time.perf_counter()
+            pc = extract_page(src, pdf_p, i)
+            data = page_to_dict(pc)
+            results.put((i, data, time.perf_counter() - t0))
+    except Exception as e:
+        results.put((i, None, repr(e)))
+    finally:
+        results.put(_DONE)
+        if pdf_p is not None:
+            pdf_p.close()
+        if src is not None:
+            src.close()
+        METRICS.flush(stage="extract")
+
+
+class _Window:
+    """
+    Giới hạn số trang đang "in flight": trang i chỉ được giao cho stage
+    extract khi i < next_page + size (next_page = trang đang chờ render).
+    Trang đang chờ render luôn đã được giao nên không bao giờ deadlock,
+    còn buffer sắp xếp lại thứ tự ở stage render thì luôn bị chặn trên.
+    abort() đánh thức mọi admit() đang chờ khi pipeline dừng vì lỗi.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.next_page = 0
+        self.aborted = False
+        self.cond = threading.Condition()
+
+    def admit(self, i: int) -> bool:
+        """Chờ tới lượt trang i; False nếu pipeline đã bị abort."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.aborted or i < self.next_page + self.size)
+            return not self.aborted
+
+    def abort(self) -> None:
+        with self.cond:
+            self.aborted = True
+            self.cond.notify_all()
+
+    def advance(self) -> None:
+        with self.cond:
+            self.next_page += 1
+            self.cond.notify_all()
+
+
+def convert_pipelined(
+    input_pdf: str,
+    output_pdf: str,
+    target_lang: str,
+    translator: Optional[BaseTranslator] = None,
+    mode: str = "rebuild",
+    debug: bool = False,
+    extract_workers: int = 1,
+    translate_workers: int = 4,
+    queue_size: int = 8
+) -> Dict[str, StageStats]:
+    """
+    Pipeline 3 stage chạy chồng lên nhau trên các trang khác nhau:
+      extract (process) -> translate (thread, I/O bound) -> render (main thread)
+    Các stage nối với nhau bằng queue có giới hạn (queue_size) và số trang
+    in-flight bị chặn bởi _Window, nên bộ nhớ không tăng theo số trang.
+    Trả về StageStats của từng stage để biết stage nào là bottleneck.
+    """
+    from .core import render_page, text_blocks_of, translate_blocks
+    from .images import ImageEmbedder
+    from .journal import page_from_dict
+    from .layout import ReflowRenderer
+
+    src = fitz.open(input_pdf)
+    total = len(src)
+    out = fitz.open()
+    renderer = ReflowRenderer()
+    images = ImageEmbedder(src, out)
+
+    stats = {
+        "extract": StageStats("extract", extract_workers),
+        "translate": StageStats("translate", translate_workers),
+        "render": StageStats("render", 1),
+    }
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+    inflight = [0]  # trang đã qua collect nhưng chưa vào to_render
+    window = _Window(max(queue_size, 1))
+
+    tasks = mp.Queue()
+    extracted = mp.Queue(maxsize=queue_size)
+    to_translate: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    to_render: "queue.Queue" = queue.Queue()
+    procs = [
+        mp.Process(target=_extract_worker, args=(input_pdf, tasks, extracted), daemon=True)
+        for _ in range(extract_workers)
+    ]
+
+    def dispatch() -> None:
+        # giao page index cho các process extract theo cửa sổ in-flight
+        for i in range(total):
+            if not window.admit(i):
+                break
+            tasks.put(i)
+        for _ in range(extract_workers):
+            tasks.put(_DONE)
+
+    def collect() -> None:
+        # gom kết quả từ các process extract, chuyển sang stage dịch
+        finished = 0
+        try:
+            while finished < extract_workers:
+                item = extracted.get()
+                if item is _DONE:
+                    finished += 1
+                    continue
+                i, data, busy = item
+                if data is None:
+                    where = f"page {i+1}" if i >= 0 else input_pdf
+                    errors.append(RuntimeError(f"extract failed on {where}: {busy}"))
+                    window.abort()
+                    continue
+                with lock:
+                    stats["extract"].items += 1
+                    stats["extract"].busy += busy
+                    inflight[0] += 1
+                to_translate.put((i, page_from_dict(data)))
+        except BaseException as e:
+            errors.append(e)
+            window.abort()
+        finally:
+            for _ in range(translate_workers):
+                to_translate.put(_DONE)
+
+    def translate_loop() -> None:
+        while True:
+            t0 = time.perf_counter()
+            item = to_translate.get()
+            waited = time.perf_counter() - t0
+            if item is _DONE:
+                break
+            i, pc = item
+            t0 = time.perf_counter()
+            try:
+                translations = translate_blocks(text_blocks_of(pc), target_lang, translator)
+            except BaseException as e:
+                errors.append(e)
+                translations = e
+            else:
+                with lock:
+                    stats["translate"].items += 1
+                    stats["translate"].busy += time.perf_counter() - t0
+                    stats["translate"].wait += waited
+            to_render.put((i, pc, translations))
+            with lock:
+                inflight[0] -= 1
+
+    def stalled() -> bool:
+        # mọi process extract đã chết (kể cả bị kill, không kịp gửi _DONE)
+        # và không còn trang nào trong các queue hay đang được dịch
+        with lock:
+            busy = inflight[0]
+        return (
+            busy == 0
+            and not any(p.is_alive() for p in procs)
+            and extracted.empty() and to_translate.empty() and to_render.empty()
+        )
+
+    threads = [
+        threading.Thread(target=dispatch, daemon=True),
+        threading.Thread(target=collect, daemon=True),
+    ] + [
+        threading.Thread(target=translate_loop, daemon=True) for _ in range(translate_workers)
+    ]
+
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for t in threads:
+        t.start()
+
+    pending: Dict[int, Any] = {}
+    idle = 0
+    try:
+        # render đúng thứ tự trang, buffer các trang về sớm
+        while window.next_page < total:
+            i = window.next_page
+            t0 = time.perf_counter()
+            while i not in pending:
+                try:
+                    j, pc, translations = to_render.get(timeout=0.5)
+                except queue.Empty:
+                    if errors:
+                        raise errors[0]
+                    # cần hai lần liên tiếp để bỏ qua trang đang chuyển giữa hai stage
+                    idle = idle + 1 if stalled() else 0
+                    if idle >= 2:
+                        raise RuntimeError(f"pipeline stalled before page {i+1}")
+                    continue
+                idle = 0
+                pending[j] = (pc, translations)
+            stats["render"].wait += time.perf_counter() - t0
+
+            pc, translations = pending.pop(i)
+            if isinstance(translations, BaseException):
+                raise translations
+            print(f"[PAGE] {i+1}/{total}")
+            t0 = time.perf_counter()
+            render_page(out, src, pc, translations, renderer, images, mode, debug)
+            stats["render"].busy += time.perf_counter() - t0
+            stats["render"].items += 1
+            window.advance()
+
+        print(f"[SAVE] {output_pdf}")
+        with METRICS.timer("save"):
+            out.save(output_pdf)
+    finally:
+        window.abort()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        src.close()
+
+    wall = time.perf_counter() - start
+    for st in stats.values():
+        print(
+            f"[STAGE] {st.name:<9} workers={st.workers} items={st.items} "
+            f"busy={st.busy:.2f}s wait={st.wait:.2f}s util={st.utilization(wall):.0%}"
+        )
+    return stats
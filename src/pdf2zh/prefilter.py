@@ -0,0 +1,147 @@
+"""
+Bộ lọc nhanh (regex + heuristic theo script) cho các đoạn không cần dịch:
+số trang, số liệu, URL/DOI/email, citation [12], code, mảnh công thức và
+text đã ở sẵn ngôn ngữ đích. Các đoạn này được giữ nguyên, không gọi API.
+Bộ lọc thiên về an toàn: chỉ bỏ qua khi chắc chắn, còn lại vẫn gửi dịch.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import METRICS
+
+_LETTER = re.compile(r"[^\W\d_]")
+_URL = re.compile(r"^(?:https?://|ftp://|www\.)\S+$", re.I)
+_DOI = re.compile(r"^(?:doi:\s*|https?://(?:dx\.)?doi\.org/)?10\.\d{4,9}/\S+$", re.I)
+_EMAIL = re.compile(r"^[\w.+-]+@[\w-]+(?:\.[\w-]+)+$")
+_CITATION = re.compile(r"^(?:\[\s*\d+(?:\s*[-–,]\s*\d+)*\s*\][\s,;]*)+$")
+_PAGE_LABEL = re.compile(r"^(?:page|p\.|pp\.|trang)?\s*\d+\s*(?:(?:of|/)\s*\d+)?$", re.I)
+# số La Mã làm số trang/đánh số mục (1..39): chữ hoa đứng riêng ("XIV", "IV.",
+# "(II)"), chữ thường chỉ khi có dấu list marker ("iv.", "(iii)"). Không dùng
+# C/D/L/M để tránh nhầm từ/viết tắt như "Mix", "CV", "DI", "MD"
+_ROMAN_UPPER = r"(?=[IVX])X{0,3}(?:IX|IV|V?I{0,3})"
+_ROMAN_LOWER = _ROMAN_UPPER.lower()
+_ROMAN = re.compile(
+    rf"^(?:{_ROMAN_UPPER}[.)]?|\({_ROMAN_UPPER}\)|{_ROMAN_LOWER}[.)]|\({_ROMAN_LOWER}\))$"
+)
+_CODE_KEYWORD = re.compile(
+    r"^\s*(?:def \w+\(|class \w+[:(]|import \w|from \S+ import|return\b|#include|"
+    r"public |private |const |let |var |function\b|for\s*\(|while\s*\(|if\s*\()"
+)
+_CODE_SYNTAX = re.compile(r"[;{}]\s*$|==|!=|->|::|\w+\s*=\s*[\w\"'\[({]")
+_CODE_SYMBOLS = re.compile(r"[(){}\[\];=<>_:,\"'.]")
+_MATH = re.compile(r"[=<>≤≥≈≠±×÷∑∏∫√∞∂∇^]|[α-ωΑ-Ω]")
+
+# tiếng Việt: các chữ cái/dấu không có trong tiếng Anh
+_VI_CHARS = set(
+    "ăâđêôơưĂÂĐÊÔƠƯ"
+    "àáảãạằắẳẵặầấẩẫậèéẻẽẹềếểễệìíỉĩịòóỏõọồốổỗộờớởỡợùúủũụừứửữựỳýỷỹỵ"
+    "ÀÁẢÃẠẰẮẲẴẶẦẤẨẪẬÈÉẺẼẸỀẾỂỄỆÌÍỈĨỊÒÓỎÕỌỒỐỔỖỘỜỚỞỠỢÙÚỦŨỤỪỨỬỮỰỲÝỶỸỴ"
+)
+_EN_STOPWORDS = set(
+    "the of and to in a is that for on with as are by this be it from at an or "
+    "we which not can have has was were these our their its".split()
+)
+
+
+@dataclass
+class SkipStats:
+    """Tổng số đoạn/ký tự đã bỏ qua (theo lý do) trong process hiện tại."""
+    segments: int = 0
+    chars: int = 0
+    by_reason: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, reason: str, text: str) -> None:
+        with self._lock:
+            self.segments += 1
+            self.chars += len(text)
+            self.by_reason[reason] = self.by_reason.get(reason, 0) + 1
+        if METRICS.enabled:
+            METRICS.incr("skipped.segments")
+            METRICS.incr("skipped.chars", len(text))
+            METRICS.incr(f"skipped.{reason}")
+
+
+STATS = SkipStats()
+
+
+def _script_ratio(letters: List[str], lo: int, hi: int) -> float:
+    return sum(lo <= ord(c) <= hi for c in letters) / len(letters)
+
+
+def in_target_language(text: str, target_lang: str) -> bool:
+    """Heuristic theo bảng chữ cái: text đã viết bằng ngôn ngữ đích chưa."""
+    letters = _LETTER.findall(text)
+    if len(letters) < 8:
+        return False
+    lang = target_lang.strip().lower()
+    if lang in ("vietnamese", "vi", "tiếng việt"):
+        vi = sum(c in _VI_CHARS for c in letters)
+        return vi >= 3 and vi / len(letters) >= 0.08
+    if lang in ("chinese", "zh", "simplified chinese", "traditional chinese"):
+        return _script_ratio(letters, 0x4E00, 0x9FFF) >= 0.6 and _script_ratio(letters, 0x3040, 0x30FF) == 0
+    if lang in ("japanese", "ja"):
+        return _script_ratio(letters, 0x3040, 0x30FF) >= 0.1
+    if lang in ("korean", "ko"):
+        return _script_ratio(letters, 0xAC00, 0xD7AF) >= 0.6
+    if lang in ("english", "en"):
+        if any(ord(c) > 0x24F for c in letters):
+            return False
+        words = re.findall(r"[a-z]+", text.lower())
+        return len(words) >= 4 and sum(w in _EN_STOPWORDS for w in words) / len(words) >= 0.2
+    return False
+
+
+def _is_code_line(line: str) -> bool:
+    if _CODE_KEYWORD.match(line):
+        return True
+    # prose có dấu "=" lẻ tẻ thì mật độ ký hiệu vẫn thấp
+    return bool(_CODE_SYNTAX.search(line)) and len(_CODE_SYMBOLS.findall(line)) / len(line) >= 0.08
+
+
+def skip_reason(text: str, target_lang: str) -> Optional[str]:
+    """Lý do không cần dịch text (None = cần dịch)."""
+    s = text.strip()
+    if not s:
+        return "empty"
+    if _CITATION.match(s):
+        return "citation"
+    letters = _LETTER.findall(s)
+    if not letters:
+        return "number"
+    if len(s) <= 12 and (_PAGE_LABEL.match(s) or _ROMAN.match(s)):
+        return "page_number"
+    if " " not in s:
+        if _DOI.match(s):
+            return "doi"
+        if _URL.match(s):
+            return "url"
+        if _EMAIL.match(s):
+            return "email"
+    words = re.findall(r"[^\W\d_]+", s)
+    if _MATH.search(s) and all(len(w) <= 3 for w in words):
+        return "formula"
+    lines = [ln for ln in s.splitlines() if ln.strip()]
+    if sum(_is_code_line(ln) for ln in lines) / len(lines) >= 0.6:
+        return "code"
+    if in_target_language(s, target_lang):
+        return "target_lang"
+    return None
+
+
+def split_translatable(texts: List[str], target_lang: str) -> Tuple[List[int], Dict[int, str]]:
+    """
+    -> (index các text cần gửi dịch, {index: text giữ nguyên}) và cộng STATS.
+    """
+    todo: List[int] = []
+    keep: Dict[int, str] = {}
+    for i, t in enumerate(texts):
+        reason = skip_reason(t, target_lang)
+        if reason is None:
+            todo.append(i)
+        else:
+            keep[i] = t
+            STATS.add(reason, t)
+    return todo, keep
@@ -0,0 +1,125 @@
+"""
+Preflight (dry run): chỉ extract + chia đoạn, không gọi mạng, để ước lượng
+trước một batch lớn: số đoạn/ký tự, token ước tính, số đoạn đã có trong
+cache, số request API dự kiến và thời gian dịch dự kiến.
+Các đoạn được tính đúng như lúc dịch thật (paragraph_units, nối qua trang,
+prefilter, masking) bằng một translator giả chỉ ghi lại text rồi trả nguyên.
+"""
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from .cache_backends import backend_from_spec
+from .core import extract_page, translate_pages
+from .metrics import estimate_tokens
+from .translator.base import BaseTranslator
+
+# tên service trong cache key (service_name() của translator mà CLI tạo ra)
+CACHE_SERVICE = {
+    "openai": "DefaultTranslator",
+    "gemini": "GeminiTranslator",
+    "stub": "StubTranslator",
+}
+
+
+@dataclass
+class PreflightReport:
+    input_pdf: str
+    target_lang: str
+    pages: int = 0
+    segments: int = 0          # đoạn sẽ gửi dịch (sau prefilter)
+    chars: int = 0
+    tokens: int = 0            # token ước tính của mọi đoạn
+    skipped: int = 0           # đoạn giữ nguyên (prefilter)
+    cache_hits: int = 0
+    requests: int = 0          # request API dự kiến (đoạn chưa có trong cache, theo batch)
+    request_tokens: int = 0    # token ước tính của các đoạn phải gửi
+    seconds: float = 0.0       # thời gian chạy preflight
+
+
+class _DryTranslator(BaseTranslator):
+    """Ghi lại các đoạn được gửi dịch, trả nguyên văn (placeholder giữ nguyên)."""
+
+    def __init__(self):
+        self.texts: List[str] = []
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        self.texts.extend(texts)
+        return list(texts)
+
+
+def _cached_inputs(cache_db: Optional[str], service: str, tgt: str, texts: List[str]) -> set:
+    if not cache_db or not texts:
+        return set()
+    if "://" not in cache_db and "," not in cache_db and not os.path.exists(cache_db):
+        return set()
+    backend = backend_from_spec(cache_db)
+    try:
+        found = backend.get_many([(service, "auto", tgt, t) for t in set(texts)])
+    finally:
+        backend.close()
+    return {key[3] for key in found}
+
+
+def preflight_pdf(
+    input_pdf: str,
+    target_langs: List[str],
+    cache_db: Optional[str] = None,
+    service: str = "openai",
+    batch_size: int = 1
+) -> List[PreflightReport]:
+    """
+    Một PreflightReport cho mỗi ngôn ngữ đích; extract chỉ chạy một lần.
+    batch_size: số đoạn mỗi request (pipeline hiện tại gửi 1 đoạn/request).
+    Đoạn trùng nhau trong cùng document chỉ tính một request (lần sau cache hit).
+    """
+    import pdfplumber
+    from .prefilter import STATS
+
+    t0 = time.perf_counter()
+    with fitz.open(input_pdf) as src, pdfplumber.open(input_pdf) as pdf_p:
+        pages = [extract_page(src, pdf_p, i) for i in range(len(src))]
+    extract_seconds = time.perf_counter() - t0
+
+    reports = []
+    for lang in target_langs:
+        t1 = time.perf_counter()
+        dry = _DryTranslator()
+        skipped_before = STATS.segments
+        for _ in translate_pages(pages, lang, dry):
+            pass
+        cached = _cached_inputs(cache_db, CACHE_SERVICE.get(service, service), lang, dry.texts)
+        todo = {t for t in dry.texts if t not in cached}
+        reports.append(PreflightReport(
+            input_pdf=input_pdf,
+            target_lang=lang,
+            pages=len(pages),
+            segments=len(dry.texts),
+            chars=sum(len(t) for t in dry.texts),
+            tokens=sum(estimate_tokens(t) for t in dry.texts),
+            skipped=STATS.segments - skipped_before,
+            cache_hits=sum(t in cached for t in dry.texts),
+            requests=math.ceil(len(todo) / max(batch_size, 1)),
+            request_tokens=sum(estimate_tokens(t) for t in todo),
+            seconds=extract_seconds / len(target_langs) + time.perf_counter() - t1,
+        ))
+    return reports
+
+
+def project_runtime(
+    requests: int,
+    latency: float,
+    concurrency: int = 1,
+    rate_limit: float = 0.0
+) -> float:
+    """
+    Thời gian dịch dự kiến (giây): bị chặn bởi số request chạy song song
+    (concurrency, mỗi request mất latency giây) hoặc bởi rate limit (request/giây).
+    """
+    by_latency = requests * latency / max(concurrency, 1)
+    by_rate = requests / rate_limit if rate_limit > 0 else 0.0
+    return max(by_latency, by_rate)
@@ -0,0 +1,65 @@
+import multiprocessing as mp
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .metrics import METRICS
+from .translator.base import BaseTranslator
+
+
+class RateLimiter:
+    """
+    Giới hạn số request/giây, dùng chung được giữa nhiều thread và nhiều
+    process: trạng thái (thời điểm sớm nhất được gửi request kế tiếp) nằm
+    trong multiprocessing.Value, truyền cho worker qua initializer của pool.
+    """
+
+    def __init__(self, rate: float, shared: Optional[Any] = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self._next = shared if shared is not None else mp.Value("d", 0.0)
+
+    def acquire(self) -> float:
+        """Chờ tới lượt gửi request, trả về số giây đã chờ."""
+        with self._next.get_lock():
+            now = time.time()
+            slot = max(now, self._next.value)
+            self._next.value = slot + 1.0 / self.rate
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        METRICS.observe("translate.queue_wait", max(wait, 0.0))
+        return max(wait, 0.0)
+
+
+class RateLimitedTranslator(BaseTranslator):
+    """
+    Wrapper: mỗi text gửi tới inner phải lấy một lượt từ RateLimiter.
+    Đặt bên trong CachedTranslator để cache hit không tốn lượt.
+    """
+
+    def __init__(self, inner: BaseTranslator, limiter: RateLimiter):
+        self.inner = inner
+        self.limiter = limiter
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        for _ in texts:
+            self.limiter.acquire()
+        return self.inner.translate(texts, src, tgt)
+
+    def translate_stream(self, texts: List[str], src: str, tgt: str) -> Iterator[Tuple[int, str]]:
+        from .translator.streaming import translate_stream
+        for _ in texts:
+            self.limiter.acquire()
+        return translate_stream(self.inner, texts, src, tgt)
+
+    def __getattr__(self, name: str) -> Any:
+        # edit() (translation memory) chỉ có khi inner hỗ trợ
+        if name != "edit" or "inner" not in self.__dict__:
+            raise AttributeError(name)
+        edit = getattr(self.inner, "edit")
+
+        def limited(*args: Any) -> str:
+            self.limiter.acquire()
+            return edit(*args)
+        return limited
@@ -0,0 +1,445 @@
+import json
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import click
+
+from .translator import SERVICES
+
+TERMINAL = ("done", "failed")
+MAX_UPLOAD_BYTES = 200 * 2**20
+JOB_TTL = 3600.0
+MAX_JOBS = 100
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # ghi file tạm cùng thư mục rồi os.replace: client không bao giờ đọc
+    # được file ghi dở
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@dataclass
+class ServerJob:
+    """
+    Trạng thái một job phía server. events là log append-only các event
+    (queued/started/page/done/failed) để stream lại cho client.
+    """
+    job_id: str
+    job_dir: str
+    target_lang: str
+    mode: str
+    status: str = "queued"
+    total: int = 0
+    pages_done: int = 0
+    error: str = ""
+    finished_at: float = 0.0   # time.monotonic() khi done/failed, để evict
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    def page_path(self, page: int) -> str:
+        return os.path.join(self.job_dir, f"page_{page:05d}.pdf")
+
+    def result_path(self) -> str:
+        return os.path.join(self.job_dir, "output.pdf")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "target_lang": self.target_lang,
+            "total": self.total,
+            "pages_done": self.pages_done,
+            "error": self.error,
+        }
+
+
+def _service_worker(
+    service: str,
+    api_key: str,
+    cache_db: Optional[str],
+    jobs: Any,
+    events: Any
+) -> None:
+    """
+    Worker process sống suốt vòng đời server: translator client, cache và
+    font được tạo một lần rồi dùng lại cho mọi job (warm).
+    Mỗi trang xong -> ghi page_XXXXX.pdf và gửi event "page" về server.
+    Mọi file được ghi atomic (file tạm + os.replace).
+    """
+    import fitz
+    from .cache import CachedTranslator
+    from .core import iter_translate_pages
+    from .metrics import METRICS
+    from .translator import build_translator
+
+    translator = build_translator(service, api_key)
+    if cache_db:
+        translator = CachedTranslator(translator, cache_db)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, job_dir, target_lang, mode = job
+        input_pdf = os.path.join(job_dir, "input.pdf")
+        try:
+            with fitz.open(input_pdf) as doc:
+                total = len(doc)
+            events.put({"job": job_id, "type": "started", "total": total})
+            out = fitz.open()
+            for res in iter_translate_pages(input_pdf, target_lang, translator=translator, mode=mode):
+                path = os.path.join(job_dir, f"page_{res.page_index:05d}.pdf")
+                _write_atomic(path, res.pdf_bytes)
+                with fitz.open("pdf", res.pdf_bytes) as page_doc:
+                    out.insert_pdf(page_doc)
+                events.put({"job": job_id, "type": "page", "page": res.page_index})
+            result = os.path.join(job_dir, "output.pdf")
+            with METRICS.timer("save"):
+                out.save(result + ".tmp", garbage=4, deflate=True)
+            os.replace(result + ".tmp", result)
+            out.close()
+            events.put({"job": job_id, "type": "done"})
+        except Exception as e:
+            events.put({"job": job_id, "type": "failed", "error": f"{type(e).__name__}: {e}"})
+        METRICS.flush(job=job_id)
+
+
+class TranslationService:
+    """
+    Service dịch chạy lâu dài:
+    - `workers` process giữ translator/cache/font warm giữa các job
+    - job queue có giới hạn (queue_size); submit() raise queue.Full khi đầy
+    - progress từng trang được gom về qua events queue và lưu vào ServerJob
+    - job đã xong được giữ job_ttl giây, tối đa max_jobs job; cũ hơn thì
+      bị xoá khỏi jobs cùng job_dir (evict())
+    """
+
+    def __init__(
+        self,
+        service: str = "stub",
+        api_key: str = "",
+        cache_db: Optional[str] = None,
+        workers: int = 1,
+        queue_size: int = 16,
+        work_dir: Optional[str] = None,
+        job_ttl: float = JOB_TTL,
+        max_jobs: int = MAX_JOBS,
+        max_upload: int = MAX_UPLOAD_BYTES
+    ):
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.max_upload = max_upload
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="pdf2zh_server_")
+        self._own_work_dir = work_dir is None
+        self.jobs: Dict[str, ServerJob] = {}
+        self._cond = threading.Condition()
+        self._jobs_q = mp.Queue(maxsize=queue_size)
+        self._events_q = mp.Queue()
+        self._procs = [
+            mp.Process(
+                target=_service_worker,
+                args=(service, api_key, cache_db, self._jobs_q, self._events_q),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for p in self._procs:
+            p.start()
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                event = self._events_q.get(timeout=min(max(self.job_ttl, 1.0), 60.0))
+            except queue.Empty:
+                self.evict()
+                continue
+            if event is None:
+                break
+            with self._cond:
+                job = self.jobs.get(event["job"])
+                if job is None:
+                    continue
+                kind = event["type"]
+                if kind == "started":
+                    job.status = "running"
+                    job.total = event["total"]
+                elif kind == "page":
+                    job.pages_done += 1
+                elif kind == "done":
+                    job.status = "done"
+                elif kind == "failed":
+                    job.status = "failed"
+                    job.error = event["error"]
+                if job.status in TERMINAL:
+                    job.finished_at = time.monotonic()
+                job.events.append({k: v for k, v in event.items() if k != "job"})
+                self._cond.notify_all()
+            if kind in TERMINAL:
+                self.evict()
+
+    def evict(self) -> List[str]:
+        """
+        Xoá các job đã kết thúc quá job_ttl giây, và các job kết thúc sớm
+        nhất khi số job vượt max_jobs. Job đang chờ/chạy không bị xoá.
+        -> list job_id đã xoá.
+        """
+        now = time.monotonic()
+        with self._cond:
+            finished = sorted(
+                (j for j in self.jobs.values() if j.status in TERMINAL),
+                key=lambda j: j.finished_at,
+            )
+            over = max(len(self.jobs) - self.max_jobs, 0)
+            expired = [
+                j for n, j in enumerate(finished)
+                if n < over or now - j.finished_at > self.job_ttl
+            ]
+            for job in expired:
+                del self.jobs[job.job_id]
+        for job in expired:
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+        if expired:
+            print(f"[SERVER] evicted {len(expired)} finished jobs")
+        return [j.job_id for j in expired]
+
+    def submit(self, pdf_bytes: bytes, target_lang: str, mode: str = "rebuild") -> ServerJob:
+        from .core import RENDER_MODES
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {mode!r} (expected one of {RENDER_MODES})")
+        self.evict()
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.work_dir, job_id)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, "input.pdf"), "wb") as f:
+            f.write(pdf_bytes)
+        job = ServerJob(job_id, job_dir, target_lang, mode)
+        job.events.append({"type": "queued"})
+        with self._cond:
+            self.jobs[job_id] = job
+        try:
+            self._jobs_q.put_nowait((job_id, job_dir, target_lang, mode))
+        except queue.Full:
+            with self._cond:
+                del self.jobs[job_id]
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job
+
+    def iter_events(self, job_id: str, timeout: float = 600.0):
+        """Yield các event của job (kể cả event cũ) cho tới khi job kết thúc."""
+        job = self.jobs[job_id]
+        n = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(job.events) > n or time.monotonic() > deadline,
+                    timeout=1.0,
+                )
+                new = job.events[n:]
+                n += len(new)
+                finished = job.status in TERMINAL
+            for event in new:
+                yield event
+            if (finished and not new) or time.monotonic() > deadline:
+                return
+
+    def page_path(self, job_id: str, page: int) -> str:
+        return self.jobs[job_id].page_path(page)
+
+    def result_path(self, job_id: str) -> str:
+        return self.jobs[job_id].result_path()
+
+    def close(self) -> None:
+        for _ in self._procs:
+            try:
+                self._jobs_q.put(None, timeout=1)
+            except queue.Full:
+                break
+        for p in self._procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        self._events_q.put(None)
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST /jobs?target_lang=..&mode=..   body = PDF    -> 202 {job}
+    GET  /jobs/<id>                                   -> {job}
+    GET  /jobs/<id>/events                            -> NDJSON stream
+    GET  /jobs/<id>/pages/<n>                         -> PDF 1 trang (0-based)
+    GET  /jobs/<id>/result                            -> PDF hoàn chỉnh
+    GET  /health
+    """
+    service: TranslationService = None  # gán trong make_server()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _file(self, path: str) -> None:
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            # chưa xong (file được ghi atomic) hoặc job vừa bị evict
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not ready"})
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, status: int, error: str) -> None:
+        # body chưa được đọc -> đóng connection thay vì keep-alive
+        self.close_connection = True
+        self._json(status, {"error": error})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/jobs":
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        from .core import RENDER_MODES
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        mode = params.get("mode", "rebuild")
+        if mode not in RENDER_MODES:
+            self._reject(HTTPStatus.BAD_REQUEST, f"mode must be one of {list(RENDER_MODES)}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reject(HTTPStatus.LENGTH_REQUIRED, "valid Content-Length required")
+            return
+        if length < 0:
+            self._reject(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+            return
+        if length > self.service.max_upload:
+            self._reject(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                         f"upload exceeds {self.service.max_upload} bytes")
+            return
+        data = self.rfile.read(length)
+        if not data.startswith(b"%PDF"):
+            self._json(HTTPStatus.BAD_REQUEST, {"error": "body must be a PDF file"})
+            return
+        try:
+            job = self.service.submit(
+                data,
+                target_lang=params.get("target_lang", "Vietnamese"),
+                mode=mode,
+            )
+        except queue.Full:
+            self._json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "job queue is full"})
+            return
+        self._json(HTTPStatus.ACCEPTED, job.summary())
+
+    def do_GET(self) -> None:
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            self._json(HTTPStatus.OK, {"status": "ok"})
+            return
+        job = self.service.jobs.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        if job is None:
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        if len(parts) == 2:
+            self._json(HTTPStatus.OK, job.summary())
+        elif parts[2:] == ["events"]:
+            self._stream_events(job.job_id)
+        elif parts[2:] == ["result"]:
+            self._file(job.result_path())
+        elif len(parts) == 4 and parts[2] == "pages" and parts[3].isdigit():
+            self._file(job.page_path(int(parts[3])))
+        else:
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def _stream_events(self, job_id: str) -> None:
+        # chunked transfer: mỗi event là một dòng JSON, gửi ngay khi có
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in self.service.iter_events(job_id):
+            line = (json.dumps(event) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(service: TranslationService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option("-s", "--service", type=click.Choice(SERVICES), default="openai", show_default=True)
+@click.option("--api-key", envvar="PDF2ZH_API_KEY", default=None,
+              help="API key (or PDF2ZH_API_KEY / OPENAI_API_KEY).")
+@click.option("-w", "--workers", type=int, default=2, show_default=True,
+              help="Number of jobs translated concurrently.")
+@click.option("--queue-size", type=int, default=16, show_default=True,
+              help="Max queued jobs; further uploads get 503.")
+@click.option("--cache-db", type=click.Path(dir_okay=False), default="pdf2zh_cache.db",
+              show_default=True, help="Translation cache ('' to disable).")
+@click.option("--job-ttl", type=float, default=JOB_TTL, show_default=True,
+              help="Seconds a finished job and its files are kept.")
+@click.option("--max-jobs", type=int, default=MAX_JOBS, show_default=True,
+              help="Max jobs retained; the oldest finished jobs are evicted first.")
+@click.option("--max-upload-mb", type=float, default=MAX_UPLOAD_BYTES / 2**20, show_default=True,
+              help="Largest PDF accepted by POST /jobs; bigger uploads get 413.")
+def main(host, port, service, api_key, workers, queue_size, cache_db,
+         job_ttl, max_jobs, max_upload_mb) -> None:
+    """Run the local translation service (HTTP + job queue)."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = api_key or os.getenv("PDF2ZH_API_KEY") or os.getenv("OPENAI_API_KEY", "")
+    if not api_key and service != "stub":
+        raise click.UsageError("API key is required (--api-key or PDF2ZH_API_KEY)")
+    svc = TranslationService(
+        service, api_key, cache_db or None, workers, queue_size,
+        job_ttl=job_ttl, max_jobs=max_jobs, max_upload=int(max_upload_mb * 2**20),
+    )
+    server = make_server(svc, host, port)
+    click.echo(f"[SERVER] listening on http://{host}:{server.server_address[1]} ({service}, {workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        svc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import gc
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from .core import PageCoordinates
+from .metrics import METRICS
+from .translator.base import BaseTranslator
+
+# Số trang mỗi shard cố định (không phụ thuộc số worker) để file output
+# giống hệt nhau dù chạy với bao nhiêu process.
+SHARD_PAGES = 16
+
+# merge_shards: output tới số trang này thì ghi lại một lần với garbage=4
+# (gộp font/ảnh trùng giữa các shard); lớn hơn thì chỉ append incremental
+COMPACT_PAGES = 256
+
+
+@dataclass
+class TranslatedPage:
+    """
+    Một trang đã extract + dịch xong, sẵn sàng để render.
+    translations tương ứng 1-1 với text_blocks_of(pc).
+    """
+    pc: PageCoordinates
+    translations: List[str]
+
+
+def render_shard(
+    input_pdf: str,
+    shard_pdf: str,
+    pages: List[TranslatedPage],
+    mode: str = "rebuild",
+    debug: bool = False
+) -> str:
+    """
+    Chạy trong worker process: mở input_pdf riêng, render `pages` vào một
+    document tạm rồi lưu ra shard_pdf. fitz.Document không thread-safe nên
+    mỗi process có document của riêng nó.
+    """
+    from .core import render_page
+    from .images import ImageEmbedder
+    from .layout import ReflowRenderer
+
+    src = fitz.open(input_pdf)
+    out = fitz.open()
+    renderer = ReflowRenderer()
+    images = ImageEmbedder(src, out)
+    for tp in pages:
+        render_page(out, src, tp.pc, tp.translations, renderer, images, mode, debug)
+    with METRICS.timer("save"):
+        out.save(shard_pdf, garbage=1, no_new_id=True)
+    out.close()
+    src.close()
+    # metrics của worker process không về được process chính, export ngay tại đây
+    METRICS.flush(shard=os.path.basename(shard_pdf))
+    return shard_pdf
+
+
+_FONT_FILES = ("FontFile", "FontFile2", "FontFile3")
+
+
+def _share_font_files(doc: fitz.Document, start: int, seen: Dict[str, int]) -> int:
+    """
+    Trỏ FontFile của các FontDescriptor có xref >= start về stream font đã
+    có trong seen (hash raw stream + dict -> xref), như ImageEmbedder.xref_map
+    làm với ảnh. Stream trùng bị thay bằng null để lần lưu incremental không
+    ghi lại cả file font. -> số stream font đã gộp.
+    """
+    shared = 0
+    for xref in range(start, doc.xref_length()):
+        try:
+            if doc.xref_get_key(xref, "Type") != ("name", "/FontDescriptor"):
+                continue
+        except Exception:
+            continue  # xref trống (free entry)
+        for key in _FONT_FILES:
+            kind, value = doc.xref_get_key(xref, key)
+            if kind != "xref":
+                continue
+            font = int(value.split()[0])
+            h = hashlib.sha256(doc.xref_object(font, compressed=True).encode())
+            h.update(doc.xref_stream_raw(font) or b"")
+            first = seen.setdefault(h.hexdigest(), font)
+            if first != font:
+                doc.xref_set_key(xref, key, f"{first} 0 R")
+                doc.update_object(font, "null")
+                shared += 1
+    return shared
+
+
+def merge_shards(
+    shard_paths: List[str],
+    output_pdf: str,
+    compact_pages: int = COMPACT_PAGES
+) -> None:
+    """
+    Ghép các shard theo đúng thứ tự vào output_pdf, từng shard một:
+    mỗi shard được insert_pdf vào file trên đĩa rồi lưu incremental
+    (saveIncr), document đã ghép không nằm hết trong RAM nên bộ nhớ đỉnh
+    chỉ phụ thuộc kích thước một shard, không phụ thuộc tổng số trang.
+    Shard và output đều lưu với no_new_id (không có /ID ngẫu nhiên) nên
+    output giống hệt nhau từng byte giữa các lần chạy và số worker.
+    Output có tối đa compact_pages trang được ghi lại một lần với
+    garbage=4 để gộp các object trùng nhau (font, ảnh nhúng lại ở mỗi shard);
+    output lớn hơn giữ nguyên bản incremental, font nhúng lại ở mỗi shard
+    được gộp ngay khi append (_share_font_files).
+    """
+    if not shard_paths:
+        raise ValueError("No shards to merge")
+    part = output_pdf + ".part"
+    shutil.copyfile(shard_paths[0], part)
+    fonts: Dict[str, int] = {}
+    try:
+        with fitz.open(part) as out:
+            _share_font_files(out, 1, fonts)
+        for path in shard_paths[1:]:
+            with fitz.open(part) as out, fitz.open(path) as shard:
+                start = out.xref_length()
+                out.insert_pdf(shard)
+                if _share_font_files(out, start, fonts):
+                    METRICS.incr("merge.fonts_shared")
+                with METRICS.timer("save"):
+                    # như saveIncr() nhưng không thêm /ID ngẫu nhiên
+                    out.save(part, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, no_new_id=True)
+            fitz.TOOLS.store_shrink(100)
+        with fitz.open(part) as out:
+            compact = len(out) <= compact_pages
+            if compact:
+                with METRICS.timer("save"):
+                    out.save(output_pdf, garbage=4, deflate=True, no_new_id=True)
+        if not compact:
+            os.replace(part, output_pdf)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+
+
+def render_parallel(
+    input_pdf: str,
+    output_pdf: str,
+    pages: List[TranslatedPage],
+    workers: int,
+    mode: str = "rebuild",
+    debug: bool = False,
+    shard_pages: int = SHARD_PAGES
+) -> None:
+    """
+    Chia `pages` thành các shard liên tiếp, render song song bằng
+    ProcessPoolExecutor rồi merge lại bằng insert_pdf.
+    """
+    chunks = [pages[k:k + shard_pages] for k in range(0, len(pages), shard_pages)]
+    tmpdir = tempfile.mkdtemp(prefix="pdf2zh_shards_")
+    try:
+        paths = [os.path.join(tmpdir, f"shard_{n:05d}.pdf") for n in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(render_shard, input_pdf, path, chunk, mode, debug)
+                for path, chunk in zip(paths, chunks)
+            ]
+            for n, fut in enumerate(futures):
+                fut.result()
+                print(f"[RENDER] shard {n+1}/{len(chunks)}")
+        print(f"[SAVE] {output_pdf}")
+        merge_shards(paths, output_pdf)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def current_rss_mb() -> float:
+    """RSS hiện tại của process (MB), 0.0 nếu không đo được."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _release_plumber_page(pdf_p: Any, i: int) -> None:
+    # pdfplumber cache chars/objects của từng page cho tới khi đóng PDF
+    p_p = pdf_p.pages[i]
+    release = getattr(p_p, "close", None) or getattr(p_p, "flush_cache", None)
+    if release:
+        release()
+
+
+def convert_windowed(
+    input_pdf: str,
+    output_pdf: str,
+    target_lang: str,
+    window: int = 32,
+    max_rss_mb: Optional[float] = None,
+    mode: str = "rebuild",
+    debug: bool = False,
+    translator: Optional[BaseTranslator] = None
+) -> None:
+    """
+    Streaming mode cho PDF rất lớn:
+    1) Xử lý tối đa `window` trang mỗi lượt vào một sub-document riêng,
+       lưu ra file chunk ngay khi xong (hoặc sớm hơn khi RSS vượt max_rss_mb).
+    2) Sau mỗi chunk đóng hết fitz/pdfplumber document và shrink MuPDF store
+       để giải phóng cache theo trang.
+    3) Cuối cùng merge các chunk thành output_pdf (append từng chunk lên
+       file trên đĩa, xem merge_shards).
+    """
+    from .core import extract_page, render_page, text_blocks_of, translate_blocks
+    from .images import ImageEmbedder
+    from .layout import ReflowRenderer
+    import pdfplumber
+
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    with fitz.open(input_pdf) as doc:
+        total = len(doc)
+
+    renderer = ReflowRenderer()
+    tmpdir = tempfile.mkdtemp(prefix="pdf2zh_chunks_")
+    try:
+        paths: List[str] = []
+        i = 0
+        while i < total:
+            src = fitz.open(input_pdf)
+            pdf_p = pdfplumber.open(input_pdf)
+            out = fitz.open()
+            images = ImageEmbedder(src, out)
+            start = i
+            while i < total and i - start < window:
+                print(f"[PAGE] {i+1}/{total}")
+                pc = extract_page(src, pdf_p, i)
+                translations = translate_blocks(text_blocks_of(pc), target_lang, translator)
+                render_page(out, src, pc, translations, renderer, images, mode, debug)
+                _release_plumber_page(pdf_p, i)
+                i += 1
+                if max_rss_mb and current_rss_mb() > max_rss_mb:
+                    break
+
+            path = os.path.join(tmpdir, f"chunk_{len(paths):05d}.pdf")
+            with METRICS.timer("save"):
+                out.save(path, garbage=1, no_new_id=True)
+            paths.append(path)
+            out.close()
+            pdf_p.close()
+            src.close()
+            del out, pdf_p, src, images
+            gc.collect()
+            fitz.TOOLS.store_shrink(100)
+            print(f"[FLUSH] pages {start+1}-{i} -> {path} (rss {current_rss_mb():.0f} MB)")
+
+        print(f"[SAVE] {output_pdf}")
+        merge_shards(paths, output_pdf)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
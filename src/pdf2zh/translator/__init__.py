@@ -0,0 +1,23 @@
+from .base import BaseTranslator
+
+SERVICES = ("openai", "gemini", "stub")
+
+
+def build_translator(service: str, api_key: str = "") -> BaseTranslator:
+    """
+    Tạo translator theo tên service (dùng chung cho CLI và server).
+    openai -> DefaultTranslator của pdf2zh.core (translate_text + api_key).
+    """
+    if service == "stub":
+        from .stub_translator import StubTranslator
+        return StubTranslator()
+    if service == "gemini":
+        from .gemini_translator import GeminiTranslator
+        return GeminiTranslator(api_key)
+    if service == "openai":
+        from ..core import DefaultTranslator, _load_openai
+        if not api_key:
+            raise ValueError("API key is required")
+        _load_openai().api_key = api_key
+        return DefaultTranslator()
+    raise ValueError(f"Unknown service: {service!r} (expected one of {SERVICES})")
@@ -8,4 +8,13 @@ class BaseTranslator(ABC):
         Take a list of strings, return a list of translated strings.
         src/tgt according to ISO code or name you map in config.
         """
-        pass
\ No newline at end of file
+        pass
+
+def service_name(translator: BaseTranslator) -> str:
+    """
+    Tên service thật của translator, bỏ qua các wrapper
+    (CachedTranslator, RateLimitedTranslator... đều giữ translator gốc ở .inner).
+    """
+    while hasattr(translator, "inner"):
+        translator = translator.inner
+    return translator.__class__.__name__
@@ -1,5 +1,6 @@
 from typing import List
 from .base import BaseTranslator
+from ..metrics import METRICS
 import requests
 
 class GeminiTranslator(BaseTranslator):
@@ -18,7 +19,8 @@ class GeminiTranslator(BaseTranslator):
                 "text": t
             }
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            r = requests.post("https://api.gemini.example/v1/translate", json=payload, headers=headers)
+            with METRICS.timer("translate.network"):
+                r = requests.post("https://api.gemini.example/v1/translate", json=payload, headers=headers)
             r.raise_for_status()
             data = r.json()
             results.append(data["translation"])
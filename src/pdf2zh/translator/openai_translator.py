@@ -1,6 +1,8 @@
 from openai import OpenAI
-from typing import List
+from typing import Iterator, List, Tuple
 from .base import BaseTranslator
+from .streaming import openai_stream, parse_stream, stream_prompt
+from ..metrics import METRICS
 
 class OpenAITranslator(BaseTranslator):
     def __init__(self, api_key: str):
@@ -13,9 +15,40 @@ class OpenAITranslator(BaseTranslator):
         for t in texts:
             prompt = (
                 f"Please translate the following text into {tgt}. "
-                "Do NOT modify any LaTeX or non-text content:\n\n" + t
+                "Do NOT modify any LaTeX or non-text content. "
+                "Keep placeholders like {0} exactly as they are:\n\n" + t
             )
+            results.append(self._complete(prompt))
+        return results
+
+    def translate_stream(self, texts: List[str], src: str, tgt: str) -> Iterator[Tuple[int, str]]:
+        """
+        Dịch cả list trong một request streaming, yield (index, bản dịch) ngay
+        khi từng đoạn hoàn chỉnh trong luồng token (xem streaming).
+        """
+        chunks = openai_stream(
+            self.client.chat.completions.create,
+            model="gpt-4.1",
+            messages=[
+                {"role": "system", "content": "You are a helpful translator."},
+                {"role": "user", "content": stream_prompt(texts, tgt)}
+            ],
+            temperature=0.0
+        )
+        return parse_stream(chunks, texts, lambda rest: self.translate(rest, src, tgt))
 
+    def edit(self, text: str, prev_source: str, prev_target: str, src: str, tgt: str) -> str:
+        """Sửa bản dịch của đoạn gần giống cho khớp đoạn mới (translation memory)."""
+        prompt = (
+            f"Here is a text and its {tgt} translation:\n\n"
+            f"{prev_source}\n---\n{prev_target}\n\n"
+            "Update the translation so it matches this new text, changing as little as possible. "
+            "Keep placeholders like {0} exactly as they are. Reply with the translation only:\n\n" + text
+        )
+        return self._complete(prompt)
+
+    def _complete(self, prompt: str) -> str:
+        with METRICS.timer("translate.network"):
             resp = self.client.chat.completions.create(
                 model="gpt-4.1",
                 messages=[
@@ -31,5 +64,8 @@ class OpenAITranslator(BaseTranslator):
                 ],
                 temperature=0.0
             )
-            results.append(resp.choices[0].message.content.strip())
-        return results
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            METRICS.incr("tokens.prompt", usage.prompt_tokens or 0)
+            METRICS.incr("tokens.completion", usage.completion_tokens or 0)
+        return resp.choices[0].message.content.strip()
@@ -0,0 +1,173 @@
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .base import BaseTranslator
+
+
+def _open(path: str, mode: str) -> Any:
+    # .gz -> gzip (mỗi lần mở append thêm một member, gzip vẫn đọc liền mạch)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordingTranslator(BaseTranslator):
+    """
+    Wrapper ghi lại mọi lần gọi inner.translate() vào file JSON lines
+    (nén gzip nếu path kết thúc bằng .gz), mỗi dòng:
+        {"s": src, "t": tgt, "in": [...], "out": [...], "ms": latency}
+    hoặc "err" thay cho "out" nếu inner raise. Dùng một file cho mỗi process.
+    Nếu inner có edit() (translation memory) thì edit() cũng được chuyển tiếp
+    và ghi lại, thêm "edit": [prev_source, prev_target].
+    """
+
+    def __init__(self, inner: BaseTranslator, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = _open(path, "a")
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def _record(self, entry: Dict[str, Any], call: Callable[[], List[str]]) -> List[str]:
+        t0 = time.perf_counter()
+        try:
+            outputs = call()
+        except Exception as e:
+            ms = round((time.perf_counter() - t0) * 1000, 1)
+            self._write({**entry, "err": f"{type(e).__name__}: {e}", "ms": ms})
+            raise
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        self._write({**entry, "out": outputs, "ms": ms})
+        return outputs
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        return self._record(
+            {"s": src, "t": tgt, "in": texts},
+            lambda: self.inner.translate(texts, src, tgt),
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # edit() chỉ có khi inner hỗ trợ (FuzzyMemoryTranslator kiểm tra bằng getattr)
+        if name != "edit" or "inner" not in self.__dict__:
+            raise AttributeError(name)
+        edit = getattr(self.inner, "edit")
+
+        def recorded(text: str, prev_source: str, prev_target: str, src: str, tgt: str) -> str:
+            return self._record(
+                {"s": src, "t": tgt, "in": [text], "edit": [prev_source, prev_target]},
+                lambda: [edit(text, prev_source, prev_target, src, tgt)],
+            )[0]
+        return recorded
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ReplayError(RuntimeError):
+    """Lỗi đã được ghi lại lúc record, phát lại khi replay."""
+
+
+class ReplayTranslator(BaseTranslator):
+    """
+    Phát lại file của RecordingTranslator, không gọi mạng.
+    - Mỗi text được tra theo (src, tgt, text); text lặp lại được trả lần lượt
+      theo thứ tự đã ghi (quay vòng khi hết).
+    - latency="recorded": ngủ đúng latency đã ghi của text đó (latency của
+      một call chia đều cho các text trong call); "sample": lấy ngẫu nhiên
+      (seed cố định) từ phân phối latency đã ghi; "none": không ngủ.
+      scale nhân thêm vào latency (0.5 = nhanh gấp đôi).
+    - on_miss: "error" (KeyError) hoặc "echo" (trả lại text gốc) cho text
+      không có trong file; latency khi miss lấy theo phân phối đã ghi.
+    - Lỗi đã ghi được phát lại thành ReplayError để test retry.
+    - Các lần edit() đã ghi được phát lại bằng edit(), tra riêng với translate().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: str = "recorded",
+        scale: float = 1.0,
+        on_miss: str = "error",
+        seed: Optional[int] = 0
+    ):
+        if latency not in ("recorded", "sample", "none"):
+            raise ValueError(f"Unknown latency mode: {latency!r}")
+        if on_miss not in ("error", "echo"):
+            raise ValueError(f"Unknown on_miss: {on_miss!r}")
+        self.latency = latency
+        self.scale = scale
+        self.on_miss = on_miss
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # (src, tgt, text) -> deque[(output hoặc None nếu lỗi, error, latency giây)]
+        self._entries: Dict[Tuple[str, str, str], Deque[Tuple[Optional[str], str, float]]] = defaultdict(deque)
+        self._edits: Dict[Tuple[str, str, str], Deque[Tuple[Optional[str], str, float]]] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.hits = 0
+        self.misses = 0
+        self._load(path)
+
+    def _load(self, path: str) -> None:
+        calls = 0
+        with _open(path, "r") as f:
+            try:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except json.JSONDecodeError:
+                        # dòng cuối bị cắt ngang khi process bị kill
+                        continue
+                    per_text = e["ms"] / 1000 / max(len(e["in"]), 1)
+                    outputs = e.get("out") or [None] * len(e["in"])
+                    entries = self._edits if "edit" in e else self._entries
+                    for text, out in zip(e["in"], outputs):
+                        entries[(e["s"], e["t"], text)].append((out, e.get("err", ""), per_text))
+                        self.latencies.append(per_text)
+                    calls += 1
+            except (EOFError, gzip.BadGzipFile, zlib.error) as err:
+                # file .gz chưa được đóng (process bị kill): dùng phần còn đọc được
+                print(f"[REPLAY] {path} is truncated ({err}), loaded {calls} calls")
+
+    def _sample_latency(self) -> float:
+        return self._rng.choice(self.latencies) if self.latencies else 0.0
+
+    def _next(self, key: Tuple[str, str, str], edit: bool = False) -> Tuple[Optional[str], str, float]:
+        with self._lock:
+            entries = (self._edits if edit else self._entries).get(key)
+            if not entries:
+                self.misses += 1
+                if self.on_miss == "error":
+                    raise KeyError(f"no recorded translation for {key[2][:60]!r}")
+                return key[2], "", self._sample_latency()
+            self.hits += 1
+            entry = entries[0]
+            entries.rotate(-1)
+            if self.latency == "sample":
+                entry = (entry[0], entry[1], self._sample_latency())
+            return entry
+
+    def _replay(self, key: Tuple[str, str, str], edit: bool = False) -> str:
+        out, err, wait = self._next(key, edit)
+        if self.latency != "none" and wait * self.scale > 0:
+            time.sleep(wait * self.scale)
+        if err:
+            raise ReplayError(err)
+        return out
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        return [self._replay((src, tgt, t)) for t in texts]
+
+    def edit(self, text: str, prev_source: str, prev_target: str, src: str, tgt: str) -> str:
+        return self._replay((src, tgt, text), edit=True)
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .base import BaseTranslator
+from ..metrics import METRICS
+
+
+class BackendStats:
+    """
+    Latency (giây / text) và lỗi của N request gần nhất của một backend,
+    kèm circuit breaker đơn giản: tỉ lệ lỗi vượt ngưỡng -> nghỉ cooldown giây
+    rồi thử lại với cửa sổ thống kê mới.
+    """
+
+    def __init__(self, window: int = 100, max_error_rate: float = 0.5,
+                 min_samples: int = 5, cooldown: float = 30.0):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.errors: Deque[bool] = deque(maxlen=window)
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds_per_text: float, ok: bool) -> None:
+        with self._lock:
+            self.errors.append(not ok)
+            if ok:
+                self.latencies.append(seconds_per_text)
+            elif (len(self.errors) >= self.min_samples
+                  and sum(self.errors) / len(self.errors) > self.max_error_rate):
+                self.down_until = time.monotonic() + self.cooldown
+                self.errors.clear()
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            data = sorted(self.latencies)
+        if not data:
+            return None
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class RoutingTranslator(BaseTranslator):
+    """
+    Chọn backend nhanh nhất (p50) trong số backend còn healthy cho mỗi
+    request; nếu sau hedge_delay (= p95 của backend đó) vẫn chưa xong thì gửi
+    thêm một bản sao tới backend tốt thứ hai và lấy kết quả về trước.
+    Bên thua bị huỷ nếu chưa chạy; nếu đang chạy (SDK blocking, không ngắt
+    được) thì kết quả bị bỏ, chỉ latency được ghi vào thống kê.
+    Backend chưa có số liệu được ưu tiên để có latency ngay từ đầu.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, BaseTranslator],
+        hedge_quantile: float = 0.95,
+        default_hedge_delay: float = 2.0,
+        min_hedge_delay: float = 0.01,
+        window: int = 100,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        max_workers: int = 8
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = dict(backends)
+        self.stats = {
+            name: BackendStats(window, max_error_rate, cooldown=cooldown) for name in self.backends
+        }
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.wins: Dict[str, int] = {name: 0 for name in self.backends}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route")
+
+    def ranked(self) -> List[str]:
+        """Backend theo thứ tự ưu tiên: healthy trước, rồi p50 tăng dần."""
+        def key(name: str) -> Tuple[bool, float, float]:
+            st = self.stats[name]
+            p50 = st.percentile(0.5)
+            return (not st.healthy, -1.0 if p50 is None else p50, st.error_rate)
+        return sorted(self.backends, key=key)
+
+    def hedge_delay(self, name: str, n_texts: int) -> float:
+        p = self.stats[name].percentile(self.hedge_quantile)
+        if p is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p * max(n_texts, 1))
+
+    def _call(self, name: str, texts: List[str], src: str, tgt: str) -> List[str]:
+        t0 = time.perf_counter()
+        try:
+            out = self.backends[name].translate(texts, src, tgt)
+        except Exception:
+            self.stats[name].record(0.0, ok=False)
+            METRICS.incr(f"route.errors.{name}")
+            raise
+        self.stats[name].record((time.perf_counter() - t0) / max(len(texts), 1), ok=True)
+        return out
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        order = self.ranked()
+        primary = order[0]
+        pending: Dict[Future, str] = {self._pool.submit(self._call, primary, texts, src, tgt): primary}
+        spare = [n for n in order[1:] if self.stats[n].healthy]
+        timeout: Optional[float] = self.hedge_delay(primary, len(texts)) if spare else None
+        error: Optional[BaseException] = None
+        while pending:
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # primary chậm hơn p95 -> gửi hedge
+                name = spare.pop(0)
+                pending[self._pool.submit(self._call, name, texts, src, tgt)] = name
+                self.hedged += 1
+                METRICS.incr("route.hedged")
+                timeout = None
+                continue
+            for fut in done:
+                name = pending.pop(fut)
+                if fut.exception() is not None:
+                    error = fut.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                self.wins[name] += 1
+                if name != primary:
+                    self.hedge_wins += 1
+                    METRICS.incr("route.hedge_wins")
+                return fut.result()
+            # bên đang chạy lỗi -> chuyển ngay sang backend kế tiếp nếu chưa có
+            if not pending and spare:
+                name = spare.pop(0)
+                pending[self._pool.submit(self._call, name, texts, src, tgt)] = name
+                timeout = None
+        raise error
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,136 @@
+import re
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .base import BaseTranslator
+from ..metrics import METRICS
+
+# mỗi đoạn trong prompt/response được bọc bởi <seg id=N>...</seg>
+_SEGMENT = re.compile(r"<seg id=(\d+)>(.*?)</seg>", re.S)
+
+
+def stream_prompt(texts: List[str], tgt: str) -> str:
+    """Prompt dịch nhiều đoạn trong một request, mỗi đoạn có id riêng."""
+    body = "\n".join(f"<seg id={i}>{t}</seg>" for i, t in enumerate(texts))
+    return (
+        f"Please translate each <seg> below into {tgt}. "
+        "Do NOT modify any LaTeX or non-text content. "
+        "Keep placeholders like {0} exactly as they are. "
+        "Reply with the translations only, in the same order, each wrapped in "
+        "<seg id=N>...</seg> with the same id:\n\n" + body
+    )
+
+
+class SegmentStreamParser:
+    """
+    Tách các đoạn đã hoàn chỉnh ra khỏi luồng token: feed() từng chunk,
+    trả về các (id, text) có thẻ đóng </seg> vừa xuất hiện. Thẻ bị cắt
+    ngang giữa hai chunk được giữ lại trong buffer tới chunk sau.
+    id ngoài khoảng [0, n) hoặc lặp lại bị bỏ qua.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.seen: Set[int] = set()
+        self._buf = ""
+
+    def feed(self, chunk: str) -> List[Tuple[int, str]]:
+        self._buf += chunk
+        out = []
+        end = 0
+        for m in _SEGMENT.finditer(self._buf):
+            end = m.end()
+            i = int(m.group(1))
+            if 0 <= i < self.n and i not in self.seen:
+                self.seen.add(i)
+                out.append((i, m.group(2).strip()))
+        if end:
+            self._buf = self._buf[end:]
+        return out
+
+    def missing(self) -> List[int]:
+        return [i for i in range(self.n) if i not in self.seen]
+
+
+def parse_stream(
+    chunks: Iterable[Optional[str]],
+    texts: List[str],
+    fallback: Callable[[List[str]], List[str]]
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (index, bản dịch) ngay khi từng đoạn trong luồng chunks hoàn chỉnh.
+    Đoạn model bỏ sót hoặc viết sai thẻ được dịch lại bằng fallback (không stream).
+    """
+    parser = SegmentStreamParser(len(texts))
+    t0 = time.perf_counter()
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for item in parser.feed(chunk):
+            if first:
+                METRICS.observe("translate.first_segment", time.perf_counter() - t0)
+                first = False
+            yield item
+    missing = parser.missing()
+    if missing:
+        METRICS.incr("stream.fallback", len(missing))
+        yield from zip(missing, fallback([texts[i] for i in missing]))
+
+
+def openai_chunks(stream: Any) -> Iterator[Optional[str]]:
+    """
+    Nội dung text của từng chunk trong chat.completions.create(stream=True).
+    Chunk cuối (stream_options include_usage) không có choices, chỉ có usage
+    -> cộng vào tokens.prompt / tokens.completion.
+    """
+    for chunk in stream:
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            METRICS.incr("tokens.prompt", getattr(usage, "prompt_tokens", 0) or 0)
+            METRICS.incr("tokens.completion", getattr(usage, "completion_tokens", 0) or 0)
+        choices = getattr(chunk, "choices", None)
+        if choices:
+            yield choices[0].delta.content
+
+
+def openai_stream(create: Callable[..., Any], **kwargs: Any) -> Iterator[Optional[str]]:
+    """
+    Gọi create(stream=True, ...) và yield text từng chunk như openai_chunks.
+    translate.network chỉ tính thời gian chờ mạng (create + chờ từng chunk),
+    không tính thời gian consumer render giữa các chunk; ghi một lần khi
+    stream kết thúc hoặc bị bỏ dở.
+    """
+    waited = 0.0
+    t0 = time.perf_counter()
+    try:
+        stream = iter(create(stream=True, stream_options={"include_usage": True}, **kwargs))
+        waited += time.perf_counter() - t0
+        chunks = openai_chunks(stream)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                piece = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                waited += time.perf_counter() - t0
+            yield piece
+    finally:
+        METRICS.observe("translate.network", waited)
+
+
+def translate_stream(
+    translator: BaseTranslator,
+    texts: List[str],
+    src: str,
+    tgt: str
+) -> Iterator[Tuple[int, str]]:
+    """
+    translator.translate_stream() nếu có, ngược lại translate() cả list rồi
+    yield lần lượt (cùng dạng (index, bản dịch)).
+    """
+    stream = getattr(translator, "translate_stream", None)
+    if stream is not None:
+        return stream(texts, src, tgt)
+    return iter(enumerate(translator.translate(texts, src, tgt)))
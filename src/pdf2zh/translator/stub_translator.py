@@ -0,0 +1,44 @@
+import random
+import time
+from typing import Iterator, List, Optional, Tuple
+from .base import BaseTranslator
+
+
+class StubTranslator(BaseTranslator):
+    """
+    Translator giả để chạy local / test / benchmark: không gọi mạng.
+    Trả về "[tgt] text" sau delay ± jitter giây cho mỗi text (mỗi text tương
+    ứng một request API). seed cố định -> chuỗi độ trễ lặp lại được.
+    """
+
+    def __init__(self, delay: float = 0.0, jitter: float = 0.0, seed: Optional[int] = 0):
+        self.delay = delay
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def latency(self) -> float:
+        if not self.jitter:
+            return self.delay
+        return max(0.0, self.delay + self._rng.uniform(-self.jitter, self.jitter))
+
+    def translate(self, texts: List[str], src: str, tgt: str) -> List[str]:
+        results = []
+        for t in texts:
+            self.calls += 1
+            wait = self.latency()
+            if wait:
+                time.sleep(wait)
+            results.append(f"[{tgt}] {t}")
+        return results
+
+    def translate_stream(self, texts: List[str], src: str, tgt: str) -> Iterator[Tuple[int, str]]:
+        for i, t in enumerate(texts):
+            yield i, self.translate([t], src, tgt)[0]
+
+    def edit(self, text: str, prev_source: str, prev_target: str, src: str, tgt: str) -> str:
+        self.calls += 1
+        wait = self.latency()
+        if wait:
+            time.sleep(wait)
+        return f"[{tgt}~] {text}"
@@ -0,0 +1,56 @@
+"""
+Helper dùng chung cho các test: translator giả Upper, make_pdf và fixture
+src_pdf (mỗi trang một dòng "Heading <word> page.").
+"""
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.translator.base import BaseTranslator
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf"]
+
+
+class Upper(BaseTranslator):
+    """
+    Dịch = viết hoa. requests: mọi đoạn đã gửi, calls: số lần translate();
+    overrides: {text: bản dịch} thay cho viết hoa; fail_on: đoạn chứa chuỗi
+    này thì raise (giả lập mất mạng / crash).
+    """
+
+    def __init__(self, overrides=None, fail_on=None):
+        self.overrides = overrides or {}
+        self.fail_on = fail_on
+        self.requests = []
+        self.calls = 0
+
+    def translate(self, texts, src, tgt):
+        self.calls += 1
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise RuntimeError("network down")
+        self.requests.extend(texts)
+        return [self.overrides.get(t, t.upper()) for t in texts]
+
+
+def make_pdf(path, words=WORDS):
+    """PDF mỗi word một trang "Heading <word> page." -> str(path)."""
+    import fitz
+
+    doc = fitz.open()
+    for word in words:
+        doc.new_page().insert_text((72, 72), f"Heading {word} page.", fontsize=12)
+    doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def src_pdf(tmp_path, request):
+    """make_pdf với WORDS của module test (mặc định WORDS ở đây)."""
+    return make_pdf(tmp_path / "in.pdf", getattr(request.module, "WORDS", WORDS))
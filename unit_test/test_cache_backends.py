@@ -0,0 +1,98 @@
+import gc
+import multiprocessing as mp
+import os
+import sys
+import weakref
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.cache import CachedTranslator
+from pdf2zh.cache_backends import (
+    BatchingBackend,
+    KVBackend,
+    LocalKV,
+    ShardedSqliteBackend,
+    SqliteBackend,
+    TieredBackend,
+    backend_from_spec,
+)
+from pdf2zh.translator.stub_translator import StubTranslator
+
+
+def key(text, tgt="vi"):
+    return ("StubTranslator", "auto", tgt, text)
+
+
+def _write_many(spec, worker):
+    backend = backend_from_spec(spec)
+    for i in range(100):
+        backend.put_many({key(f"w{worker}-{i}"): f"out{i}"})
+    backend.close()
+
+
+def test_sharded_sqlite_concurrent_writers(tmp_path):
+    spec = f"shards://{tmp_path / 'shards'}#4"
+    procs = [mp.Process(target=_write_many, args=(spec, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+
+    backend = backend_from_spec(spec)
+    assert isinstance(backend, ShardedSqliteBackend)
+    keys = [key(f"w{w}-{i}") for w in range(4) for i in range(100)]
+    assert len(backend.get_many(keys)) == 400
+    dbs = sorted(f for f in os.listdir(tmp_path / "shards") if f.endswith(".db"))
+    assert dbs == [f"shard_0{n}.db" for n in range(4)]
+
+
+def test_batching_reads_pending_writes():
+    kv = LocalKV()
+    backend = BatchingBackend(KVBackend(kv), max_batch=3, max_delay=60)
+    backend.put_many({key("a"): "A"})
+    backend.put_many({key("b"): "B"})
+    assert kv.round_trips == 0
+    assert backend.get_many([key("a"), key("c")]) == {key("a"): "A"}
+    backend.put_many({key("c"): "C"})  # đủ batch -> một lần mset
+    assert backend.batches == 1 and len(kv.data) == 3
+
+
+def test_batching_backend_is_collected_and_flushed_on_release():
+    kv = LocalKV()
+    backend = BatchingBackend(KVBackend(kv), max_batch=16, max_delay=60)
+    backend.put_many({key("a"): "A"})
+    ref = weakref.ref(backend)
+    del backend
+    gc.collect()
+    # finalizer không giữ backend sống; buffer còn lại được ghi khi thu hồi
+    assert ref() is None
+    assert len(kv.data) == 1
+
+
+def test_read_through_shares_hits_between_hosts(tmp_path):
+    shared = LocalKV()
+
+    def host(name):
+        tiers = TieredBackend([
+            SqliteBackend(str(tmp_path / f"{name}.db")),
+            BatchingBackend(KVBackend(shared), max_batch=16),
+        ])
+        stub = StubTranslator()
+        return stub, CachedTranslator(stub, tiers)
+
+    stub_a, cache_a = host("a")
+    assert cache_a.translate(["one", "two", "one"], "auto", "vi") == ["[vi] one", "[vi] two", "[vi] one"]
+    assert stub_a.calls == 2 and cache_a.hits == 1
+    cache_a.close()
+
+    stub_b, cache_b = host("b")
+    assert cache_b.translate(["two", "three"], "auto", "vi") == ["[vi] two", "[vi] three"]
+    assert stub_b.calls == 1 and cache_b.hits == 1
+    # hit từ remote đã được ghi ngược vào SQLite local của host b
+    local_b = SqliteBackend(str(tmp_path / "b.db"))
+    assert local_b.get_many([key("two")]) == {key("two"): "[vi] two"}
@@ -0,0 +1,142 @@
+import glob
+import gzip
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from click.testing import CliRunner
+
+from pdf2zh.cli import Job, JobResult, expand_inputs, is_up_to_date, main, print_summary
+
+
+def touch(path, mtime=None, data=b"%PDF"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_expand_inputs_files_globs_and_directories(tmp_path):
+    a = touch(tmp_path / "a.pdf")
+    b = touch(tmp_path / "docs" / "b.PDF")
+    c = touch(tmp_path / "docs" / "sub" / "c.pdf")
+    touch(tmp_path / "docs" / "notes.txt")
+
+    found = expand_inputs([
+        str(tmp_path / "docs"),         # thư mục: quét đệ quy
+        str(tmp_path / "*.pdf"),        # glob
+        a,                              # trùng -> bỏ
+        str(tmp_path / "docs" / "notes.txt"),
+    ])
+    assert found == [b, c, a]
+
+    # output của tool (a_vi.pdf, mọi file trong output dir) bị bỏ qua khi quét
+    a_vi = touch(tmp_path / "a_vi.pdf")
+    touch(tmp_path / "docs" / "out" / "b_fr.pdf")
+    found = expand_inputs([str(tmp_path / "*.pdf"), str(tmp_path / "docs")],
+                          ["vi", "fr"], str(tmp_path / "docs" / "out"))
+    assert found == [a, b, c]
+    # file chỉ định trực tiếp thì vẫn giữ
+    assert expand_inputs([a_vi], ["vi"]) == [a_vi]
+
+
+def test_is_up_to_date_checks_every_output(tmp_path):
+    now = time.time()
+    src = touch(tmp_path / "in.pdf", now - 100)
+    vi = str(tmp_path / "in_vi.pdf")
+    fr = str(tmp_path / "in_fr.pdf")
+
+    assert not is_up_to_date(Job(src, vi))
+    touch(vi, now - 200)
+    assert not is_up_to_date(Job(src, vi))       # output cũ hơn input
+    touch(vi, now)
+    assert is_up_to_date(Job(src, vi))
+
+    job = Job(src, vi, {"vi": vi, "fr": fr})
+    assert not is_up_to_date(job)                # thiếu bản fr
+    touch(fr, now)
+    assert is_up_to_date(job)
+
+
+def test_print_summary_counts(capsys):
+    results = [
+        JobResult("a.pdf", "a_vi.pdf", "done", pages=3, blocks=10, cache_hits=6, cache_misses=4,
+                  skipped=2, skipped_chars=9),
+        JobResult("b.pdf", "b_vi.pdf", "done", pages=2, blocks=5, cache_hits=0, cache_misses=5),
+        JobResult("c.pdf", "c_vi.pdf", "failed", pages=0, blocks=1, error="ValueError: bad"),
+    ]
+    print_summary(results, skipped=4, wall=2.0)
+    out, err = capsys.readouterr()
+    assert "[SUMMARY] 2 done, 1 failed, 4 up to date" in out
+    assert "[SUMMARY] 5 pages, 16 blocks in 2.0s" in out
+    assert "cache hit rate 40.0% (6/15)" in out
+    assert "2 segments (9 chars) kept as-is" in out
+    assert "[FAILED] c.pdf: ValueError: bad" in err
+
+
+def test_parallel_run_counts_and_closes_worker_stack(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("pdfplumber")
+    for name in ("one", "two", "three"):
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), f"Document {name} text.", fontsize=12)
+        doc.save(str(tmp_path / f"{name}.pdf"))
+    out_dir = tmp_path / "out"
+    args = [str(tmp_path / "*.pdf"), "-t", "vi", "-s", "stub", "-o", str(out_dir),
+            "--cache-db", str(tmp_path / "cache.db"), "--record", str(tmp_path / "calls.jsonl.gz")]
+
+    result = CliRunner().invoke(main, args + ["-j", "2"])
+    assert result.exit_code == 0, result.output
+    assert "[QUEUE] 3 to translate, 0 up to date, jobs=2" in result.output
+    assert "[SUMMARY] 3 done, 0 failed, 0 up to date" in result.output
+    assert len(os.listdir(out_dir)) == 3
+
+    # mỗi worker ghi một file record riêng; file được đóng khi worker
+    # kết thúc nên gzip đầy đủ, đọc hết không bị cắt cụt
+    records = glob.glob(str(tmp_path / "calls.*.jsonl.gz"))
+    assert records
+    with_entries = 0
+    for path in records:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            with_entries += sum(1 for line in f if json.loads(line)["in"])
+    assert with_entries == 3
+
+    result = CliRunner().invoke(main, args + ["-j", "2"])
+    assert "[QUEUE] 0 to translate, 3 up to date" in result.output
+
+
+def test_page_cache_and_stream_are_rejected_together(tmp_path):
+    pdf = touch(tmp_path / "a.pdf")
+    result = CliRunner().invoke(main, [pdf, "-t", "vi", "-s", "stub", "--stream",
+                                       "--page-cache", str(tmp_path / "pages")])
+    assert result.exit_code == 2
+    assert "--page-cache cannot be combined with --stream" in result.output
+
+
+def test_rerun_on_directory_does_not_translate_its_own_outputs(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("pdfplumber")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Document text.", fontsize=12)
+    doc.save(str(tmp_path / "doc.pdf"))
+    args = [str(tmp_path), "-t", "vi", "-s", "stub", "--cache-db", ""]
+
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert "[QUEUE] 1 to translate, 0 up to date" in result.output
+
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert "[QUEUE] 0 to translate, 1 up to date" in result.output
+    assert sorted(os.listdir(tmp_path)) == ["doc.pdf", "doc_vi.pdf"]
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("PySide6.QtPdfWidgets")
+
+from gui import worker as worker_mod
+from gui.preview import PreviewDocument
+from gui.scheduler import PageScheduler
+from conftest import Upper
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+
+
+def test_worker_emits_only_new_pages(tmp_path, src_pdf, monkeypatch):
+    monkeypatch.setattr(worker_mod, "make_translator", lambda service, key: Upper())
+    scheduler = PageScheduler(len(WORDS), prefetch=1, whole_document=True)
+    scheduler.focus(3)
+    out = str(tmp_path / "out.pdf")
+    w = worker_mod.TranslateWorker(src_pdf, out, "vi", "Stub", "", scheduler=scheduler)
+
+    pages, finished = [], []
+    w.page_ready.connect(lambda i, data: pages.append((i, data)))
+    w.failed.connect(lambda msg: pytest.fail(msg))
+    w.finished.connect(finished.append)
+    w.run()  # chạy đồng bộ trong test, không cần QThread
+
+    # trang đang xem + prefetch trước, rồi các trang sau, cuối cùng các trang trước
+    assert [i for i, _ in pages] == [3, 4, 5, 0, 1, 2]
+    for i, data in pages:
+        with fitz.open("pdf", data) as doc:
+            assert len(doc) == 1
+            assert f"HEADING {WORDS[i].upper()} PAGE." in doc[0].get_text()
+    assert finished == [out]
+
+    # viewer ghép từng trang vào preview, kết quả giống output
+    preview = PreviewDocument(src_pdf)
+    try:
+        for i, data in pages[:2]:
+            preview.splice(i, data)
+        with fitz.open("pdf", preview.data()) as doc:
+            texts = [p.get_text() for p in doc]
+        assert len(texts) == len(WORDS)
+        assert "HEADING DELTA PAGE." in texts[3] and "HEADING ECHO PAGE." in texts[4]
+        assert "Heading alpha page." in texts[0]
+    finally:
+        preview.close()
+    assert not os.path.exists(preview.path)
+
+
+def test_splice_appends_instead_of_rewriting(tmp_path, src_pdf):
+    preview = PreviewDocument(src_pdf)
+    try:
+        size = os.path.getsize(preview.path)
+        with open(preview.path, "rb") as f:
+            head = f.read()
+        one = fitz.open()
+        one.new_page().insert_text((72, 72), "Replaced", fontsize=12)
+        preview.splice(2, one.tobytes())
+        data = preview.data()
+        # incremental: phần đầu file giữ nguyên, chỉ ghi thêm phía sau
+        assert data[:size] == head and len(data) > size
+        with fitz.open("pdf", data) as doc:
+            assert len(doc) == len(WORDS) and doc[2].get_text().strip() == "Replaced"
+    finally:
+        preview.close()
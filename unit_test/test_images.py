@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+
+from pdf2zh.images import ImageEmbedder, image_xrefs
+
+
+def png_bytes():
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 32, 32), False)
+    pix.set_rect(pix.irect, (200, 30, 30))
+    return pix.tobytes("png")
+
+
+def test_repeated_image_is_embedded_once(tmp_path):
+    src = fitz.open()
+    logo = png_bytes()
+    for _ in range(3):
+        page = src.new_page()
+        page.insert_image(fitz.Rect(50, 50, 150, 150), stream=logo)
+    path = tmp_path / "in.pdf"
+    src.save(str(path), garbage=4)
+    src = fitz.open(str(path))
+
+    out = fitz.open()
+    images = ImageEmbedder(src, out)
+    placed = []
+    for page in src:
+        xrefs = image_xrefs(page)
+        assert len(xrefs) == 1
+        newp = out.new_page(width=page.rect.width, height=page.rect.height)
+        placed.append(images.place(newp, fitz.Rect(50, 50, 150, 150), next(iter(xrefs.values()))))
+
+    # cả ba trang tham chiếu cùng một xref trong out
+    assert len(set(placed)) == 1
+    assert images.placements == 3
+    assert all(p.get_images()[0][0] == placed[0] for p in out)
+
+    # stream được copy raw, không decode/encode lại
+    src_xref = next(iter(image_xrefs(src[0]).values()))
+    assert out.xref_stream_raw(placed[0]) == src.xref_stream_raw(src_xref)
+    assert out.xref_get_key(placed[0], "Filter") == src.xref_get_key(src_xref, "Filter")
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+
+# các dependency nặng chỉ được import khi code path cần tới
+HEAVY_MODULES = {"openai", "pdfplumber", "numpy", "dotenv"}
+# budget (ms) cho `import pdf2zh`, chỉnh qua env nếu máy CI chậm
+PACKAGE_BUDGET_MS = float(os.getenv("PDF2ZH_IMPORT_BUDGET_MS", "100"))
+
+
+def import_times(module: str) -> dict:
+    """
+    Chạy `python -X importtime -c "import <module>"` trong process mới,
+    trả về dict: tên module top-level -> cumulative time (ms).
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = src_dir + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def test_import_pdf2zh_is_lightweight():
+    times = import_times("pdf2zh")
+    loaded = {name.split(".")[0] for name in times}
+    assert not loaded & (HEAVY_MODULES | {"fitz", "pymupdf"})
+    assert times["pdf2zh"] < PACKAGE_BUDGET_MS, times["pdf2zh"]
+
+
+def test_import_core_skips_translation_stack():
+    pytest.importorskip("fitz")
+    times = import_times("pdf2zh.core")
+    loaded = {name.split(".")[0] for name in times}
+    assert not loaded & HEAVY_MODULES
+
+
+def test_gui_window_does_not_import_pdf2zh_core():
+    pytest.importorskip("PySide6.QtPdfWidgets")
+    times = import_times("gui.main")
+    assert "pdf2zh.core" not in times
+    assert not {name.split(".")[0] for name in times} & HEAVY_MODULES
+
+
+def test_public_names_resolve_lazily():
+    pytest.importorskip("fitz")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = src_dir + os.pathsep + env.get("PYTHONPATH", "")
+    code = (
+        "import sys, pdf2zh\n"
+        "assert 'pdf2zh.core' not in sys.modules and 'openai' not in sys.modules\n"
+        "assert {'convert_pdf', 'iter_translate_pages'} <= set(dir(pdf2zh))\n"
+        "fn = pdf2zh.convert_pdf\n"
+        "import pdf2zh.core\n"
+        "assert fn is pdf2zh.core.convert_pdf and 'convert_pdf' in vars(pdf2zh)\n"
+        "assert 'openai' not in sys.modules\n"
+        "try:\n"
+        "    pdf2zh.no_such_name\n"
+        "except AttributeError:\n"
+        "    pass\n"
+        "else:\n"
+        "    raise SystemExit('missing AttributeError')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh.core import iter_translate_pages, parse_page_range
+from conftest import Upper
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo"]
+
+
+def test_pages_are_yielded_lazily_in_requested_order(src_pdf):
+    tr = Upper()
+    gen = iter_translate_pages(src_pdf, "vi", translator=tr, pages=iter([4, 0, 2]))
+    assert tr.calls == 0  # generator chưa chạy gì trước next()
+
+    first = next(gen)
+    assert first.page_index == 4 and tr.calls == 1
+    assert first.translations == ["HEADING ECHO PAGE."]
+    assert [b.text for b in first.text_blocks] == ["Heading echo page."]
+    with fitz.open(stream=first.pdf_bytes, filetype="pdf") as doc:
+        assert len(doc) == 1 and "HEADING ECHO PAGE." in doc[0].get_text()
+
+    assert [r.page_index for r in gen] == [0, 2]
+
+
+def test_page_range_string_cancel_and_close(src_pdf):
+    assert parse_page_range("2-3,5", 5) == [1, 2, 4]
+    with pytest.raises(ValueError):
+        parse_page_range("4-9", 5)
+
+    results = list(iter_translate_pages(src_pdf, "vi", translator=Upper(), pages="2-3,5"))
+    assert [r.page_index for r in results] == [1, 2, 4]
+
+    # cancel được kiểm tra trước mỗi trang
+    cancel = threading.Event()
+    gen = iter_translate_pages(src_pdf, "vi", translator=Upper(), cancel=cancel)
+    next(gen)
+    cancel.set()
+    assert list(gen) == []
+
+    # close() dừng generator giữa chừng, trang sau không được dịch
+    tr = Upper()
+    gen = iter_translate_pages(src_pdf, "vi", translator=tr)
+    next(gen)
+    gen.close()
+    assert tr.calls == 1
+
+
+def test_requires_api_key_or_translator(src_pdf):
+    with pytest.raises(ValueError):
+        next(iter_translate_pages(src_pdf, "vi"))
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh.journal import JobJournal, convert_resumable
+from conftest import Upper
+
+WORDS = ["alpha", "bravo", "charlie", "delta"]
+
+
+def run(src_pdf, out, work_dir, translator, target_lang="vi"):
+    convert_resumable(src_pdf, out, target_lang, work_dir, translator=translator, shard_pages=2)
+    with fitz.open(out) as doc:
+        return [p.get_text() for p in doc]
+
+
+def test_interrupted_job_resumes_without_redoing_pages(tmp_path, src_pdf):
+    work_dir = str(tmp_path / "job")
+    out = str(tmp_path / "out.pdf")
+    with pytest.raises(RuntimeError):
+        run(src_pdf, out, work_dir, Upper(fail_on="delta"))
+
+    tr = Upper()
+    texts = run(src_pdf, out, work_dir, tr)
+    # shard đầu đã render, trang 3 đã dịch -> chỉ trang 4 gọi translator
+    assert tr.requests == ["Heading delta page."]
+    assert len(texts) == 4
+    assert all(f"HEADING {w.upper()} PAGE." in t for w, t in zip(WORDS, texts))
+
+
+def test_changed_fingerprint_resets_journal(tmp_path, src_pdf):
+    work_dir = str(tmp_path / "job")
+    out = str(tmp_path / "out.pdf")
+    run(src_pdf, out, work_dir, Upper())
+
+    tr = Upper()
+    run(src_pdf, out, work_dir, tr, target_lang="fr")
+    assert len(tr.requests) == 4
+
+    # chạy lại với tham số cũ -> lại reset, không dùng bản dịch "fr"
+    tr = Upper()
+    run(src_pdf, out, work_dir, tr)
+    assert len(tr.requests) == 4
+
+
+def test_foreign_directory_is_never_wiped(tmp_path, src_pdf):
+    work_dir = tmp_path / "mine"
+    work_dir.mkdir()
+    (work_dir / "notes.txt").write_text("keep me")
+    (work_dir / "page_00001.json").write_text("{}")
+
+    with pytest.raises(ValueError, match="job.json"):
+        JobJournal(str(work_dir), "abc")
+    with pytest.raises(ValueError):
+        run(src_pdf, str(tmp_path / "out.pdf"), str(work_dir), Upper())
+    assert sorted(os.listdir(work_dir)) == ["notes.txt", "page_00001.json"]
+
+
+def test_reset_keeps_unrelated_files(tmp_path):
+    work_dir = tmp_path / "job"
+    journal = JobJournal(str(work_dir), "old")
+    journal.mark_rendered([0, 1])
+    (work_dir / "notes.txt").write_text("keep me")
+
+    journal = JobJournal(str(work_dir), "new")
+    assert journal.states == {}
+    assert sorted(os.listdir(work_dir)) == ["job.json", "notes.txt"]
@@ -0,0 +1,53 @@
+import os
+import sys
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.core import translate_units
+from pdf2zh.masking import mask, unmask
+from pdf2zh.translator.base import BaseTranslator
+
+
+class Recorder(BaseTranslator):
+    def __init__(self, drop_placeholders=False):
+        self.requests = []
+        self.drop = drop_placeholders
+
+    def translate(self, texts, src, tgt):
+        self.requests.extend(texts)
+        if self.drop:
+            self.drop = False
+            return ["mất placeholder" for _ in texts]
+        return [f"VI: {t}" for t in texts]
+
+
+def test_mask_roundtrip():
+    text = r"The loss α = 0.5 uses W_{ij} and \mathbb{R}^n, see https://example.com/x."
+    masked, spans = mask(text)
+    assert masked == "The loss {0} uses {1} and {2}, see {3}."
+    assert unmask(masked, spans) == text
+    assert unmask("thiếu {0}", spans) is None
+
+
+def test_same_prose_shares_masked_form():
+    assert mask("Batch size 32 with `lr=0.1`.")[0] == mask("Batch size 64 with `lr=0.3`.")[0]
+    # text đã có sẵn {N} thì không mask
+    assert mask("Use {0} as template 12")[1] == []
+
+
+def test_translate_units_masks_and_restores():
+    tr = Recorder()
+    assert translate_units(["Accuracy improves by 12.5% on $x_i$."], "Vietnamese", tr) == \
+        ["VI: Accuracy improves by 12.5% on $x_i$."]
+    assert tr.requests == ["Accuracy improves by {0} on {1}."]
+
+
+def test_lost_placeholder_falls_back_to_raw_text():
+    tr = Recorder(drop_placeholders=True)
+    assert translate_units(["Accuracy improves by 12.5% here."], "Vietnamese", tr) == \
+        ["VI: Accuracy improves by 12.5% here."]
+    assert tr.requests == ["Accuracy improves by {0} here.", "Accuracy improves by 12.5% here."]
@@ -0,0 +1,81 @@
+import os
+import sys
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.memory import FuzzyMemoryTranslator, TranslationMemory
+from pdf2zh.ratelimit import RateLimitedTranslator, RateLimiter
+from pdf2zh.translator.stub_translator import StubTranslator
+
+SOURCE = (
+    "Press and hold the power button for three seconds to turn the device on, "
+    "then wait until the status light turns green before connecting the cable."
+)
+
+
+def test_lookup_finds_near_duplicate(tmp_path):
+    tm = TranslationMemory(str(tmp_path / "tm.db"))
+    tm.add("S", "auto", "vi", SOURCE, "T1")
+    tm.add("S", "auto", "vi", "A completely unrelated sentence about the weather today.", "T2")
+    match = tm.lookup("S", "auto", "vi", SOURCE.replace("three", "five"))
+    assert match is not None and match.target == "T1"
+    assert 0.8 < match.similarity < 1.0
+    # khác ngôn ngữ đích / service -> không dùng chung
+    assert tm.lookup("S", "auto", "en", SOURCE) is None
+    assert tm.lookup("X", "auto", "vi", SOURCE) is None
+    assert tm.lookup("S", "auto", "vi", "Nothing like the stored segments at all.") is None
+
+
+def test_fuzzy_translator_serves_edits_and_misses(tmp_path):
+    stub = StubTranslator()
+    tr = FuzzyMemoryTranslator(stub, TranslationMemory(str(tmp_path / "tm.db")))
+    assert tr.translate([SOURCE], "auto", "vi") == [f"[vi] {SOURCE}"]
+    assert (tr.served, tr.edited, tr.missed) == (0, 0, 1)
+
+    # giống hệt -> lấy từ memory, không gọi inner
+    calls = stub.calls
+    assert tr.translate([SOURCE], "auto", "vi") == [f"[vi] {SOURCE}"]
+    assert stub.calls == calls and tr.served == 1
+
+    # chỉ khác khoảng trắng -> vẫn là khớp chính xác
+    assert tr.translate(["  " + SOURCE.replace(", ", ",\n")], "auto", "vi") == [f"[vi] {SOURCE}"]
+    assert stub.calls == calls and tr.served == 2
+
+    # gần giống -> request edit
+    changed = SOURCE.replace("three seconds", "five seconds")
+    assert tr.translate([changed], "auto", "vi") == [f"[vi~] {changed}"]
+    assert tr.edited == 1 and len(tr.memory) == 2
+
+
+def test_one_token_difference_is_never_served_verbatim(tmp_path):
+    tm = TranslationMemory(str(tmp_path / "tm.db"))
+    tr = FuzzyMemoryTranslator(StubTranslator(), tm)
+    tr.translate([SOURCE], "auto", "vi")
+    for changed in (
+        SOURCE.replace("to turn the device on", "to not turn the device on"),
+        SOURCE.replace("three", "thirty"),
+        SOURCE.replace("turns green", "turns red"),
+    ):
+        # similarity vẫn rất cao nhưng câu khác nghĩa -> đi qua edit, không serve
+        assert tm.lookup("StubTranslator", "auto", "vi", changed).similarity >= 0.85
+        assert tr.translate([changed], "auto", "vi") == [f"[vi~] {changed}"]
+    assert tr.served == 0 and tr.edited == 3
+
+    # inner không có edit() -> dịch lại từ đầu
+    class NoEdit(StubTranslator):
+        edit = None
+
+    plain = FuzzyMemoryTranslator(NoEdit(), tm)
+    changed = SOURCE.replace("three", "four")
+    assert plain.translate([changed], "auto", "vi") == [f"[vi] {changed}"]
+    assert (plain.served, plain.edited, plain.missed) == (0, 0, 1)
+
+
+def test_edit_passes_through_rate_limiter(tmp_path):
+    limited = RateLimitedTranslator(StubTranslator(), RateLimiter(1000))
+    assert limited.edit("b", "a", "A", "auto", "vi") == "[vi~] b"
+    assert not hasattr(RateLimitedTranslator(object(), RateLimiter(1000)), "edit")
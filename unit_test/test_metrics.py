@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.metrics import JsonSink, Metrics, _NULL_TIMER
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def record(self, kind, name, value):
+        self.records.append((kind, name, value))
+
+
+def test_disabled_metrics_are_noop():
+    m = Metrics()
+    assert m.timer("extract") is _NULL_TIMER
+    with m.timer("extract"):
+        pass
+    m.incr("blocks", 3)
+    assert m.flush() is None
+    assert m.timers == {} and m.counters == {}
+
+
+def test_flush_exports_and_resets(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    live = ListSink()
+    m = Metrics()
+    m.enable(JsonSink(path), live)
+    with m.timer("translate"):
+        pass
+    m.observe("translate", 0.5)
+    m.incr("cache.hits")
+    m.incr("cache.hits", 2)
+
+    snap = m.flush(job="a.pdf")
+    assert snap["timers"]["translate"]["count"] == 2
+    assert snap["timers"]["translate"]["max"] == 0.5
+    assert snap["counters"] == {"cache.hits": 3}
+    assert m.timers == {} and m.counters == {}
+    assert [r[:2] for r in live.records] == [
+        ("timer", "translate"), ("timer", "translate"),
+        ("counter", "cache.hits"), ("counter", "cache.hits"),
+    ]
+    with open(path, encoding="utf-8") as f:
+        saved = [json.loads(line) for line in f]
+    assert saved[0]["labels"]["job"] == "a.pdf"
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh import multilang
+from pdf2zh.translator.stub_translator import StubTranslator
+
+
+def test_extracts_once_and_renders_each_language(tmp_path, monkeypatch):
+    src = tmp_path / "in.pdf"
+    doc = fitz.open()
+    for i in range(2):
+        doc.new_page().insert_text((72, 72), f"Hello page {i + 1}", fontsize=12)
+    doc.save(str(src))
+
+    extracted = []
+    real_extract = multilang.extract_page
+    monkeypatch.setattr(
+        multilang, "extract_page",
+        lambda s, p, i: extracted.append(i) or real_extract(s, p, i)
+    )
+
+    outputs = {lang: str(tmp_path / f"out_{lang}.pdf") for lang in ("vi", "fr", "de")}
+    multilang.convert_pdf_multi(str(src), outputs, translator=StubTranslator())
+
+    assert extracted == [0, 1]
+    for lang, path in outputs.items():
+        with fitz.open(path) as out:
+            assert len(out) == 2
+            assert f"[{lang}]" in out[1].get_text()
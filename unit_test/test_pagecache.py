@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh import pagecache
+from pdf2zh.core import convert_pdf
+from conftest import Upper
+
+
+def test_unchanged_pages_are_spliced_from_cache(tmp_path, monkeypatch):
+    src = tmp_path / "in.pdf"
+    doc = fitz.open()
+    for word in ("first", "second", "third"):
+        doc.new_page().insert_text((72, 72), f"Hello from the {word} page", fontsize=12)
+    doc.save(str(src))
+
+    rendered = []
+    real_render = pagecache.render_page
+    monkeypatch.setattr(
+        pagecache, "render_page",
+        lambda out, s, pc, *a: rendered.append(pc.page_index) or real_render(out, s, pc, *a)
+    )
+
+    def run(translator, out_name):
+        out = str(tmp_path / out_name)
+        convert_pdf(str(src), out, "vi", api_key="", debug=False,
+                    translator=translator, page_cache=str(tmp_path / "pages"))
+        with fitz.open(out) as result:
+            return [p.get_text() for p in result]
+
+    first = run(Upper(), "a.pdf")
+    assert rendered == [0, 1, 2]
+    assert "HELLO FROM THE SECOND PAGE" in first[1]
+
+    rendered.clear()
+    assert run(Upper(), "b.pdf") == first
+    assert rendered == []
+
+    # sửa bản dịch của một trang -> chỉ trang đó render lại
+    rendered.clear()
+    texts = run(Upper({"Hello from the third page": "Xin chào trang ba"}), "c.pdf")
+    assert rendered == [2]
+    assert texts[:2] == first[:2] and "Xin chào trang ba" in texts[2]
+
+
+@pytest.mark.parametrize("option", [
+    {"work_dir": "wd"}, {"pipelined": True}, {"stream_window": 2},
+    {"render_workers": 2}, {"streaming": True},
+])
+def test_page_cache_rejects_paths_that_would_ignore_it(tmp_path, option):
+    option = {k: str(tmp_path / v) if k == "work_dir" else v for k, v in option.items()}
+    with pytest.raises(ValueError, match="page_cache cannot be combined"):
+        convert_pdf(str(tmp_path / "in.pdf"), str(tmp_path / "out.pdf"), "vi", api_key="",
+                    debug=False, translator=Upper(), page_cache=str(tmp_path / "pages"), **option)
+
+    from pdf2zh.multilang import convert_pdf_multi
+    with pytest.raises(ValueError, match="page_cache cannot be combined"):
+        convert_pdf_multi(str(tmp_path / "in.pdf"), {"vi": str(tmp_path / "vi.pdf")},
+                          translator=Upper(), render_workers=2, page_cache=str(tmp_path / "pages"))
+    assert not os.path.exists(tmp_path / "pages")
+
+
+def test_pages_differing_only_inside_a_form_xobject_do_not_share_cache(tmp_path):
+    def make(name, color):
+        figure = fitz.open()
+        figure.new_page(width=200, height=100).draw_rect(
+            fitz.Rect(10, 10, 190, 90), color=color, fill=color
+        )
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "A page with a figure", fontsize=12)
+        page.show_pdf_page(fitz.Rect(72, 200, 272, 300), figure, 0)  # -> Form XObject
+        path = str(tmp_path / name)
+        doc.save(path)
+        return path
+
+    red, blue = make("red.pdf", (1, 0, 0)), make("blue.pdf", (0, 0, 1))
+    with fitz.open(red) as a, fitz.open(blue) as b:
+        assert a[0].read_contents() == b[0].read_contents()
+        assert pagecache.page_fingerprint(a, 0) != pagecache.page_fingerprint(b, 0)
+
+    for path in (red, blue):
+        out = path.replace(".pdf", "_vi.pdf")
+        convert_pdf(path, out, "vi", api_key="", debug=False, mode="overlay",
+                    translator=Upper(), page_cache=str(tmp_path / "pages"))
+    with fitz.open(out) as result:
+        fills = {d.get("fill") for d in result[0].get_drawings()}
+    assert (0.0, 0.0, 1.0) in fills and (1.0, 0.0, 0.0) not in fills
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+
+from pdf2zh.core import (
+    PageCoordinates, join_block_texts, split_translation, text_blocks_of,
+    translate_blocks, translate_pages,
+)
+from conftest import Upper
+
+
+def page_with(lines):
+    doc = fitz.open()
+    page = doc.new_page()
+    for (x, y), text in lines:
+        page.insert_text((x, y), text, fontsize=8)
+    return doc, page
+
+
+def test_join_and_split():
+    assert join_block_texts(["a long sen-\ntence that", "goes on"]) == "a long sentence that goes on"
+    assert split_translation("một hai ba bốn năm sáu", [1, 1]) == ["một hai ba", "bốn năm sáu"]
+    assert split_translation("这是一个测试", [1, 2]) == ["这是", "一个测试"]
+
+
+def test_split_with_fewer_words_than_blocks_keeps_separators():
+    # ít từ hơn block -> cắt theo ký tự, space/xuống dòng giữa các từ vẫn còn
+    parts = split_translation("Xin chào\nbạn", [1, 1, 1, 1])
+    assert len(parts) == 4
+    assert "".join(parts) == "Xin chào bạn"
+    parts = split_translation("这是\n一个测试", [1, 1, 1])
+    assert "".join(parts) == "这是一个测试"
+
+
+def test_blocks_and_columns_become_one_request():
+    doc, page = page_with([
+        ((56, 66), "This is the first part of a paragraph which"),
+        ((56, 86), "continues in the second block and ends."),
+        ((56, 106), "Short"),
+        ((56, 126), "Text at the bottom of the first column and"),
+        ((320, 50), "carries on at the top of the second column to the end."),
+    ])
+    blocks = text_blocks_of(PageCoordinates.from_page(0, page))
+    tr = Upper()
+    result = translate_blocks(blocks, "vi", tr)
+    assert len(tr.requests) == 3
+    # mỗi block nhận lại đúng phần bản dịch tương ứng
+    assert result == [b.text.upper() for b in blocks]
+
+
+def test_paragraph_across_pages():
+    doc = fitz.open()
+    doc.new_page().insert_text((56, 800), "A paragraph at the bottom of the page that keeps going onto", fontsize=8)
+    doc.new_page().insert_text((56, 60), "the next page where the sentence finally ends.", fontsize=8)
+    pcs = [PageCoordinates.from_page(i, doc[i]) for i in range(2)]
+    tr = Upper()
+    result = list(translate_pages(pcs, "vi", tr))
+    assert len(tr.requests) == 1
+    assert result[0][1] == ["A PARAGRAPH AT THE BOTTOM OF THE PAGE THAT KEEPS GOING ONTO"]
+    assert result[1][1] == ["THE NEXT PAGE WHERE THE SENTENCE FINALLY ENDS."]
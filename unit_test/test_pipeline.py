@@ -0,0 +1,72 @@
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh import core
+from pdf2zh.pipeline import convert_pipelined
+from pdf2zh.translator.base import BaseTranslator
+from conftest import Upper
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+
+
+def test_pipeline_renders_pages_in_order(tmp_path, src_pdf):
+    out = str(tmp_path / "out.pdf")
+    stats = convert_pipelined(src_pdf, out, "vi", translator=Upper(),
+                              extract_workers=2, translate_workers=3, queue_size=2)
+    assert stats["render"].items == len(WORDS)
+    with fitz.open(out) as doc:
+        assert [w.upper() in p.get_text() for w, p in zip(WORDS, doc)] == [True] * len(WORDS)
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="patch must reach the extract process")
+def test_extract_error_fails_fast(tmp_path, src_pdf, monkeypatch):
+    real = core.extract_page
+
+    def broken(src, pdf_p, i):
+        if i == 3:
+            raise ValueError("corrupt page")
+        return real(src, pdf_p, i)
+
+    monkeypatch.setattr(core, "extract_page", broken)
+    t0 = time.perf_counter()
+    with pytest.raises(RuntimeError, match="page 4.*corrupt page"):
+        convert_pipelined(src_pdf, str(tmp_path / "out.pdf"), "vi", translator=Upper(), queue_size=2)
+    assert time.perf_counter() - t0 < 10
+
+
+def test_translate_error_propagates(tmp_path, src_pdf):
+    class Broken(BaseTranslator):
+        def translate(self, texts, src, tgt):
+            if "charlie" in texts[0]:
+                raise ConnectionError("network down")
+            return texts
+
+    with pytest.raises(ConnectionError):
+        convert_pipelined(src_pdf, str(tmp_path / "out.pdf"), "vi", translator=Broken())
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="patch must reach the extract process")
+def test_killed_extract_process_is_reported_as_stall(tmp_path, src_pdf, monkeypatch):
+    real = core.extract_page
+
+    def crash(src, pdf_p, i):
+        if i == 2:
+            os._exit(1)  # như bị OOM killer: không gửi lỗi, không gửi _DONE
+        return real(src, pdf_p, i)
+
+    monkeypatch.setattr(core, "extract_page", crash)
+    with pytest.raises(RuntimeError, match="pipeline stalled"):
+        convert_pipelined(src_pdf, str(tmp_path / "out.pdf"), "vi", translator=Upper())
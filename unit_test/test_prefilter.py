@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.prefilter import SkipStats, skip_reason, split_translatable
+import pdf2zh.prefilter as prefilter
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("12", "number"),
+    ("Page 3 of 10", "page_number"),
+    ("XIV", "page_number"),
+    ("IV.", "page_number"),
+    ("(iii)", "page_number"),
+    ("xii.", "page_number"),
+    ("https://example.com/paper?id=1", "url"),
+    ("doi:10.1145/3292500.3330701", "doi"),
+    ("[3, 4] [7–9]", "citation"),
+    ("f(x) = y^2", "formula"),
+    ("def foo(x):\n    return x + 1", "code"),
+    ("Đây là một đoạn văn đã được viết bằng tiếng Việt.", "target_lang"),
+])
+def test_skipped(text, reason):
+    assert skip_reason(text, "Vietnamese") == reason
+
+
+@pytest.mark.parametrize("text", [
+    "We set the learning rate = 0.1 for all experiments.",
+    "Note that if x > 0 the loss decreases.",
+    "Figure 3",
+    "civil",
+    # từ/viết tắt trông giống số La Mã
+    "Mix",
+    "CV",
+    "Vi",
+    "DI",
+    "MD",
+    "vi",
+    "mix",
+    "In this paper we propose a new method.",
+])
+def test_translated(text):
+    assert skip_reason(text, "Vietnamese") is None
+
+
+def test_split_translatable_counts(monkeypatch):
+    monkeypatch.setattr(prefilter, "STATS", SkipStats())
+    todo, keep = split_translatable(["Hello world, this is prose.", "42", "[7]"], "Vietnamese")
+    assert todo == [0]
+    assert keep == {1: "42", 2: "[7]"}
+    assert (prefilter.STATS.segments, prefilter.STATS.chars) == (2, 5)
+    assert prefilter.STATS.by_reason == {"number": 1, "citation": 1}
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh.core import convert_pdf
+from pdf2zh.preflight import preflight_pdf, project_runtime
+from pdf2zh.translator.stub_translator import StubTranslator
+
+
+def make_manual_pdf(path):
+    doc = fitz.open()
+    for i in range(2):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Introduction to section {i + 1} of the manual", fontsize=12)
+        page.insert_text((72, 120), "The same footer sentence on every page", fontsize=12)
+        page.insert_text((72, 800), str(i + 1), fontsize=10)
+    doc.save(str(path))
+
+
+def test_preflight_counts_segments_and_cache_hits(tmp_path):
+    src = tmp_path / "in.pdf"
+    make_manual_pdf(src)
+    cache_db = str(tmp_path / "cache.db")
+
+    before, = preflight_pdf(str(src), ["vi"], cache_db, service="stub")
+    assert before.pages == 2
+    assert before.skipped == 2            # số trang
+    assert before.segments == 4 and before.cache_hits == 0
+    # số được mask -> hai câu tiêu đề giống nhau; câu trùng chỉ gửi một lần
+    assert before.requests == 2
+    assert before.tokens > 0
+
+    stub = StubTranslator()
+    convert_pdf(str(src), str(tmp_path / "out.pdf"), "vi", api_key="", debug=False,
+                translator=stub, cache_db=cache_db)
+    assert stub.calls == before.requests
+
+    after, other = preflight_pdf(str(src), ["vi", "fr"], cache_db, service="stub", batch_size=2)
+    assert after.cache_hits == 4 and after.requests == 0
+    assert other.cache_hits == 0 and other.requests == 1
+
+
+def test_project_runtime():
+    assert project_runtime(100, 2.0, concurrency=4) == 50.0
+    assert project_runtime(100, 2.0, concurrency=4, rate_limit=1.0) == 100.0
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh.core import convert_pdf
+from conftest import Upper
+
+
+def make_drawing_pdf(path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.draw_rect(fitz.Rect(50, 300, 250, 400), color=(1, 0, 0), fill=(0, 0, 1))
+    page.insert_text((72, 72), "Hello from the source page", fontsize=12)
+    doc.save(str(path))
+
+
+@pytest.mark.parametrize("mode", ["overlay", "rebuild"])
+def test_overlay_keeps_graphics_and_rebuild_drops_them(tmp_path, mode):
+    src = tmp_path / "in.pdf"
+    make_drawing_pdf(src)
+    out = tmp_path / f"{mode}.pdf"
+    convert_pdf(str(src), str(out), "vi", api_key="", debug=False, mode=mode, translator=Upper())
+
+    with fitz.open(str(out)) as doc:
+        assert len(doc) == 1
+        page = doc[0]
+        text = page.get_text()
+        # text gốc đã bị xoá/thay, chỉ còn bản dịch
+        assert "HELLO FROM THE SOURCE PAGE" in text
+        assert "Hello from the source page" not in text
+        drawings = page.get_drawings()
+    if mode == "overlay":
+        assert any(d.get("fill") == (0.0, 0.0, 1.0) for d in drawings)
+    else:
+        assert not any(d.get("fill") == (0.0, 0.0, 1.0) for d in drawings)
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    src = tmp_path / "in.pdf"
+    make_drawing_pdf(src)
+    with pytest.raises(ValueError):
+        convert_pdf(str(src), str(tmp_path / "out.pdf"), "vi", api_key="", debug=False,
+                    mode="inplace", translator=Upper())
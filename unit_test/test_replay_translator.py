@@ -0,0 +1,114 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.translator.base import BaseTranslator
+from pdf2zh.translator.replay_translator import RecordingTranslator, ReplayError, ReplayTranslator
+from pdf2zh.translator.stub_translator import StubTranslator
+
+
+class FailOnce(BaseTranslator):
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, texts, src, tgt):
+        self.calls += 1
+        if self.calls == 2:
+            raise TimeoutError("upstream timeout")
+        return StubTranslator().translate(texts, src, tgt)
+
+
+@pytest.mark.parametrize("name", ["calls.jsonl", "calls.jsonl.gz"])
+def test_record_then_replay(tmp_path, name):
+    path = str(tmp_path / name)
+    rec = RecordingTranslator(FailOnce(), path)
+    assert rec.translate(["a", "b"], "auto", "vi") == ["[vi] a", "[vi] b"]
+    with pytest.raises(TimeoutError):
+        rec.translate(["c"], "auto", "vi")
+    assert rec.translate(["c"], "auto", "vi") == ["[vi] c"]
+    rec.close()
+
+    replay = ReplayTranslator(path, latency="none")
+    assert replay.translate(["b", "a"], "auto", "vi") == ["[vi] b", "[vi] a"]
+    # lỗi đã ghi được phát lại đúng thứ tự, lần sau trả bản dịch
+    with pytest.raises(ReplayError):
+        replay.translate(["c"], "auto", "vi")
+    assert replay.translate(["c"], "auto", "vi") == ["[vi] c"]
+    with pytest.raises(KeyError):
+        replay.translate(["unknown"], "auto", "vi")
+
+
+def test_replay_scales_recorded_latency(tmp_path, monkeypatch):
+    path = str(tmp_path / "calls.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"s":"auto","t":"vi","in":["x","y"],"out":["X","Y"],"ms":400.0}\n')
+    replay = ReplayTranslator(path, scale=0.25, on_miss="echo")
+    assert replay.latencies == [0.2, 0.2]
+    slept = []
+    monkeypatch.setattr("pdf2zh.translator.replay_translator.time.sleep", slept.append)
+    assert replay.translate(["x", "z"], "auto", "vi") == ["X", "z"]
+    assert slept == [pytest.approx(0.05), pytest.approx(0.05)]
+    assert (replay.hits, replay.misses) == (1, 1)
+
+
+def test_recording_forwards_and_records_memory_edits(tmp_path):
+    from pdf2zh.memory import FuzzyMemoryTranslator, TranslationMemory
+
+    path = str(tmp_path / "calls.jsonl")
+    source = "Press and hold the power button for three seconds to turn the device on."
+    changed = source.replace("three", "five")
+
+    def run(inner):
+        tr = FuzzyMemoryTranslator(inner, TranslationMemory(str(tmp_path / f"{id(inner)}.db")))
+        out = tr.translate([source], "auto", "vi") + tr.translate([changed], "auto", "vi")
+        tr.close()
+        return out, tr.edited
+
+    rec = RecordingTranslator(StubTranslator(), path)
+    assert run(rec) == ([f"[vi] {source}", f"[vi~] {changed}"], 1)
+    rec.close()
+    # inner không có edit() -> wrapper cũng không có
+    plain = RecordingTranslator(FailOnce(), str(tmp_path / "plain.jsonl"))
+    assert not hasattr(plain, "edit")
+    plain.close()
+
+    replay = ReplayTranslator(path, latency="none")
+    assert run(replay) == ([f"[vi] {source}", f"[vi~] {changed}"], 1)
+    # edit được tra riêng, không lẫn với translate()
+    with pytest.raises(KeyError):
+        replay.translate([changed], "auto", "vi")
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage"])
+def test_replay_loads_intact_prefix_of_damaged_gzip(tmp_path, damage):
+    path = str(tmp_path / "calls.jsonl.gz")
+    rec = RecordingTranslator(StubTranslator(), path)
+    texts = [f"segment number {i} " + "x" * 200 for i in range(300)]
+    for t in texts:
+        rec.translate([t], "auto", "vi")
+    rec.close()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if damage == "truncate":
+        data = data[: len(data) * 2 // 3]    # như process bị kill giữa lúc ghi
+    else:
+        data += b"\x1f\x8bnot really gzip"  # member sau bị hỏng
+    with open(path, "wb") as f:
+        f.write(data)
+
+    replay = ReplayTranslator(path, latency="none")
+    loaded = [t for t in texts if ("auto", "vi", t) in replay._entries]
+    assert 0 < len(loaded) <= len(texts)
+    # phần đọc được là một prefix liền mạch, đúng bản dịch
+    assert loaded == texts[:len(loaded)]
+    assert replay.translate([texts[0]], "auto", "vi") == [f"[vi] {texts[0]}"]
+    if damage == "garbage":
+        assert len(loaded) == len(texts)
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.translator.base import BaseTranslator
+from pdf2zh.translator.routing_translator import RoutingTranslator
+from pdf2zh.translator.stub_translator import StubTranslator
+
+
+class Failing(BaseTranslator):
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, texts, src, tgt):
+        self.calls += 1
+        raise RuntimeError("backend down")
+
+
+def test_routes_to_faster_backend():
+    fast, slow = StubTranslator(delay=0.005), StubTranslator(delay=0.05)
+    router = RoutingTranslator({"fast": fast, "slow": slow}, default_hedge_delay=1.0)
+    try:
+        for i in range(10):
+            assert router.translate([f"t{i}"], "auto", "vi") == [f"[vi] t{i}"]
+        # mỗi backend được thử ít nhất một lần, sau đó dồn về backend nhanh
+        assert router.ranked()[0] == "fast"
+        assert router.wins["fast"] >= 8
+    finally:
+        router.close()
+
+
+def test_hedges_when_primary_is_slower_than_p95():
+    a, b = StubTranslator(delay=0.01), StubTranslator(delay=0.02)
+    router = RoutingTranslator({"a": a, "b": b}, default_hedge_delay=1.0)
+    try:
+        for i in range(6):
+            router.translate([f"warm{i}"], "auto", "vi")
+        assert router.ranked()[0] == "a"
+        a.delay = 1.0  # backend nhanh đột ngột bị nghẽn
+        t0 = time.perf_counter()
+        assert router.translate(["x"], "auto", "vi") == ["[vi] x"]
+        assert time.perf_counter() - t0 < 0.5
+        assert router.hedged >= 1 and router.hedge_wins >= 1
+    finally:
+        router.close()
+
+
+def test_fails_over_and_trips_breaker():
+    bad, good = Failing(), StubTranslator()
+    router = RoutingTranslator({"bad": bad, "good": good}, cooldown=60)
+    try:
+        for i in range(10):
+            assert router.translate([f"t{i}"], "auto", "vi") == [f"[vi] t{i}"]
+        assert not router.stats["bad"].healthy
+        assert router.ranked() == ["good", "bad"]
+    finally:
+        router.close()
+
+    only = RoutingTranslator({"bad": Failing()})
+    with pytest.raises(RuntimeError):
+        only.translate(["x"], "auto", "vi")
+    only.close()
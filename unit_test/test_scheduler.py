@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# --- Thêm src/ vào path để import gui ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+# gui/__init__ import main window -> cần PySide6
+pytest.importorskip("PySide6.QtPdfWidgets")
+
+from gui.scheduler import PageScheduler
+
+
+def test_focus_reprioritizes_pending_pages():
+    sched = PageScheduler(10, prefetch=2)
+    it = iter(sched)
+    assert next(it) == 0
+    # người dùng cuộn tới trang 6: trang 1-2 đang chờ bị bỏ, 6-8 lên trước
+    sched.focus(6)
+    assert [next(it), next(it), next(it)] == [6, 7, 8]
+    # quay lại trang 0: trang 0 đã dịch -> chỉ còn 1, 2
+    sched.focus(0)
+    assert [next(it), next(it)] == [1, 2]
+
+
+def test_whole_document_finishes_after_priority_window():
+    sched = PageScheduler(6, prefetch=1, whole_document=True)
+    sched.focus(4)
+    assert list(sched) == [4, 5, 0, 1, 2, 3]
+    assert sched.finished
+
+
+def test_on_demand_waits_for_focus_and_close_stops():
+    sched = PageScheduler(8, prefetch=0)
+    it = iter(sched)
+    assert next(it) == 0
+    seen = []
+    got = threading.Event()
+    t = threading.Thread(target=lambda: [seen.append(p) or got.set() for p in it])
+    t.start()
+    t.join(0.2)
+    assert t.is_alive() and seen == []  # on-demand: chờ trang người dùng xem tiếp
+    sched.focus(5)
+    assert got.wait(2)
+    sched.close()
+    t.join(2)
+    assert not t.is_alive()
+    assert seen == [5]
@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from pdf2zh.server import TranslationService, make_server
+
+
+def make_pdf_bytes(pages: int = 3) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Hello page {i + 1}", fontsize=12)
+    return doc.tobytes()
+
+
+@pytest.fixture
+def server():
+    svc = TranslationService(service="stub", workers=1, queue_size=2)
+    srv = make_server(svc, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+    svc.close()
+
+
+def test_job_streams_pages_and_result(server):
+    req = urllib.request.Request(
+        f"{server}/jobs?target_lang=Vietnamese", data=make_pdf_bytes(3), method="POST"
+    )
+    with urllib.request.urlopen(req) as resp:
+        assert resp.status == 202
+        job_id = json.load(resp)["job_id"]
+
+    with urllib.request.urlopen(f"{server}/jobs/{job_id}/events", timeout=60) as resp:
+        events = [json.loads(line) for line in resp]
+    kinds = [e["type"] for e in events]
+    assert kinds[0] == "queued" and kinds[-1] == "done", events
+    assert sorted(e["page"] for e in events if e["type"] == "page") == [0, 1, 2]
+
+    with urllib.request.urlopen(f"{server}/jobs/{job_id}/pages/1") as resp:
+        page = fitz.open("pdf", resp.read())
+    assert "[Vietnamese]" in page[0].get_text()
+
+    with urllib.request.urlopen(f"{server}/jobs/{job_id}/result") as resp:
+        assert len(fitz.open("pdf", resp.read())) == 3
+
+
+def test_rejects_non_pdf(server):
+    req = urllib.request.Request(f"{server}/jobs", data=b"hello", method="POST")
+    with pytest.raises(urllib.error.HTTPError) as err:
+        urllib.request.urlopen(req)
+    assert err.value.code == 400
+
+
+def post(server, path, data, headers=None):
+    req = urllib.request.Request(f"{server}{path}", data=data, method="POST", headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.load(resp)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_rejects_bad_mode_and_bad_length(server):
+    status, body = post(server, "/jobs?mode=inplace", make_pdf_bytes(1))
+    assert status == 400 and "mode" in body["error"]
+
+    status, _ = post(server, "/jobs", make_pdf_bytes(1), {"Content-Length": "abc"})
+    assert status == 411
+
+
+def test_rejects_oversized_upload():
+    svc = TranslationService(service="stub", workers=1, max_upload=1000)
+    srv = make_server(svc, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        status, body = post(f"http://127.0.0.1:{srv.server_address[1]}", "/jobs", make_pdf_bytes(1) + b" " * 2000)
+        assert status == 413
+        assert not svc.jobs
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        svc.close()
+
+
+def test_finished_jobs_are_evicted(tmp_path):
+    svc = TranslationService(service="stub", workers=1, work_dir=str(tmp_path), max_jobs=2)
+    try:
+        ids = []
+        for _ in range(3):
+            job = svc.submit(make_pdf_bytes(1), "Vietnamese")
+            ids.append(job.job_id)
+            events = list(svc.iter_events(job.job_id, timeout=60))
+            assert events[-1]["type"] == "done"
+            assert os.path.exists(svc.result_path(job.job_id))
+        # job thứ 4 vượt max_jobs -> job xong sớm nhất bị xoá cùng thư mục
+        svc.submit(make_pdf_bytes(1), "Vietnamese")
+        assert ids[0] not in svc.jobs and ids[1] in svc.jobs
+        assert not os.path.exists(os.path.join(str(tmp_path), ids[0]))
+
+        # hết TTL -> mọi job đã xong bị xoá, job đang chạy/chờ thì không
+        svc.job_ttl = 0.0
+        evicted = svc.evict()
+        assert set(ids[1:]) <= set(evicted)
+        assert all(j.status not in ("done", "failed") for j in svc.jobs.values())
+    finally:
+        svc.close()
+
+
+def test_page_files_are_written_atomically(tmp_path, monkeypatch):
+    from pdf2zh import server as server_mod
+
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(server_mod.os, "replace", lambda a, b: replaced.append(b) or real_replace(a, b))
+    server_mod._write_atomic(str(tmp_path / "page_00000.pdf"), b"%PDF-1.7")
+    assert replaced == [str(tmp_path / "page_00000.pdf")]
+    assert os.listdir(tmp_path) == ["page_00000.pdf"]
@@ -0,0 +1,123 @@
+import os
+import sys
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+fitz = pytest.importorskip("fitz")
+pdfplumber = pytest.importorskip("pdfplumber")
+
+from pdf2zh.core import extract_page, translate_pages
+from pdf2zh.shards import TranslatedPage, render_parallel
+from conftest import WORDS, Upper, make_pdf
+
+
+def translated_pages(path):
+    with fitz.open(str(path)) as src, pdfplumber.open(str(path)) as pdf_p:
+        pcs = [extract_page(src, pdf_p, i) for i in range(len(src))]
+    return [TranslatedPage(pc, tr) for pc, tr in translate_pages(pcs, "vi", Upper())]
+
+
+def test_render_parallel_keeps_page_order(tmp_path):
+    src = tmp_path / "in.pdf"
+    make_pdf(src)
+    out = tmp_path / "out.pdf"
+    # 7 trang, shard 2 trang -> 4 shard, shard cuối thiếu
+    render_parallel(str(src), str(out), translated_pages(src), workers=3, shard_pages=2)
+
+    with fitz.open(str(out)) as doc:
+        assert len(doc) == 7
+        for page, word in zip(doc, WORDS):
+            assert f"HEADING {word.upper()} PAGE." in page.get_text()
+
+
+def test_output_bytes_do_not_depend_on_worker_count(tmp_path, monkeypatch):
+    from pdf2zh import shards
+
+    src = tmp_path / "in.pdf"
+    make_pdf(src)
+    pages = translated_pages(src)
+    real_merge = shards.merge_shards
+    for compact_pages in (256, 0):
+        monkeypatch.setattr(shards, "merge_shards",
+                            lambda paths, out: real_merge(paths, out, compact_pages=compact_pages))
+        outputs = []
+        for workers in (1, 3, 1):
+            out = tmp_path / f"out_{compact_pages}_{len(outputs)}.pdf"
+            render_parallel(str(src), str(out), pages, workers=workers, shard_pages=2)
+            outputs.append(out.read_bytes())
+        # không có /ID ngẫu nhiên trong trailer -> giống hệt nhau từng byte
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert b"/ID" not in outputs[0]
+
+
+@pytest.mark.parametrize("compact_pages", [0, 256])
+def test_merge_shards_appends_in_order(tmp_path, compact_pages):
+    from pdf2zh.shards import merge_shards
+
+    paths = []
+    for n, size in enumerate([3, 1, 2]):
+        shard = fitz.open()
+        for k in range(size):
+            shard.new_page().insert_text((72, 72), f"shard {n} page {k}", fontsize=12)
+        path = str(tmp_path / f"shard_{n}.pdf")
+        shard.save(path)
+        paths.append(path)
+
+    out = str(tmp_path / "out.pdf")
+    merge_shards(paths, out, compact_pages=compact_pages)
+    with fitz.open(out) as doc:
+        texts = [p.get_text().strip() for p in doc]
+    assert texts == [f"shard {n} page {k}" for n, size in enumerate([3, 1, 2]) for k in range(size)]
+    assert not os.path.exists(out + ".part")
+
+
+def font_files(doc):
+    """xref các stream font nhúng (FontFile*) được FontDescriptor tham chiếu."""
+    found = set()
+    for xref in range(1, doc.xref_length()):
+        for key in ("FontFile", "FontFile2", "FontFile3"):
+            try:
+                kind, value = doc.xref_get_key(xref, key)
+            except Exception:
+                continue
+            if kind == "xref":
+                found.add(int(value.split()[0]))
+    return found
+
+
+def test_incremental_merge_shares_font_files(tmp_path, monkeypatch):
+    from pdf2zh import shards
+
+    src = tmp_path / "in.pdf"
+    make_pdf(src, WORDS[:6])
+    out = tmp_path / "out.pdf"
+    real_merge = shards.merge_shards
+    monkeypatch.setattr(shards, "merge_shards", lambda paths, o: real_merge(paths, o, compact_pages=0))
+    # 3 shard, mỗi shard nhúng lại font của riêng nó
+    render_parallel(str(src), str(out), translated_pages(src), workers=2, shard_pages=2)
+
+    with fitz.open(str(out)) as doc:
+        assert [f"HEADING {w.upper()} PAGE." in p.get_text() for p, w in zip(doc, WORDS)] == [True] * 6
+        fonts = font_files(doc)
+        assert len(fonts) == 1
+        font_size = len(doc.xref_stream_raw(next(iter(fonts))))
+    assert os.path.getsize(out) < 1.5 * font_size
+
+
+def test_windowed_conversion_keeps_page_order(tmp_path):
+    from pdf2zh.shards import convert_windowed
+
+    src = tmp_path / "in.pdf"
+    make_pdf(src, WORDS[:5])
+    out = tmp_path / "out.pdf"
+    convert_windowed(str(src), str(out), "vi", window=2, translator=Upper())
+    with fitz.open(str(out)) as doc:
+        assert len(doc) == 5
+        for page, word in zip(doc, WORDS):
+            assert f"HEADING {word.upper()} PAGE." in page.get_text()
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# --- Thêm src/ vào path để import pdf2zh ---
+this_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(this_dir, os.pardir, "src"))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from pdf2zh.metrics import METRICS
+from pdf2zh.translator.base import BaseTranslator
+from pdf2zh.translator.streaming import SegmentStreamParser, parse_stream
+
+
+def chunked(text, size=7):
+    return [text[k:k + size] for k in range(0, len(text), size)]
+
+
+def fake_client(reply, log):
+    """
+    Client giả của openai: create(stream=True) trả từng chunk của reply, rồi
+    chunk usage (không có choices) như khi bật stream_options include_usage.
+    """
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        assert kwargs["stream_options"] == {"include_usage": True}
+        log.append(("request", kwargs["messages"][-1]["content"]))
+        for piece in chunked(reply):
+            log.append(("chunk", piece))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))],
+                                  usage=None)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=40, completion_tokens=12))
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_parser_handles_tags_split_across_chunks():
+    parser = SegmentStreamParser(3)
+    out = []
+    for piece in chunked("<seg id=1>B</seg>\n<seg id=7>?</seg><seg id=0> A </seg><seg id=2>C", 3):
+        out.extend(parser.feed(piece))
+    assert out == [(1, "B"), (0, "A")]
+    assert parser.missing() == [2]
+
+    got = list(parse_stream(["<seg id=0>x</seg>"], ["a", "b"], lambda rest: [f"fb:{t}" for t in rest]))
+    assert got == [(0, "x"), (1, "fb:b")]
+
+
+def test_openai_translator_yields_segments_before_stream_ends():
+    pytest.importorskip("openai")
+    from pdf2zh.translator.openai_translator import OpenAITranslator
+
+    log = []
+    tr = OpenAITranslator("test-key")
+    tr.client = fake_client("<seg id=0>Xin chào</seg>\n<seg id=1>Tạm biệt bạn nhé</seg>", log)
+    results = []
+    for i, text in tr.translate_stream(["Hello", "Goodbye"], "en", "vi"):
+        results.append((i, text))
+        log.append(("result", i))
+    assert results == [(0, "Xin chào"), (1, "Tạm biệt bạn nhé")]
+    assert "<seg id=1>Goodbye</seg>" in log[0][1]
+    # đoạn 0 được trả ra khi vẫn còn chunk của đoạn 1 chưa tới
+    first = log.index(("result", 0))
+    assert any(kind == "chunk" for kind, _ in log[first:])
+
+
+@pytest.fixture
+def metrics():
+    METRICS.enable()
+    yield METRICS
+    METRICS.disable()
+    METRICS.reset()
+
+
+@pytest.mark.parametrize("backend", ["openai_translator", "default"])
+def test_stream_records_usage_and_network_time(monkeypatch, metrics, backend):
+    log = []
+    client = fake_client("<seg id=0>Xin chào</seg>\n<seg id=1>Tạm biệt</seg>", log)
+    if backend == "default":
+        from pdf2zh import core
+        monkeypatch.setattr(core, "_openai", client)
+        tr = core.DefaultTranslator()
+    else:
+        pytest.importorskip("openai")
+        from pdf2zh.translator.openai_translator import OpenAITranslator
+        tr = OpenAITranslator("test-key")
+        tr.client = client
+
+    results = []
+    for item in tr.translate_stream(["Hello", "Goodbye"], "en", "vi"):
+        results.append(item)
+        time.sleep(0.05)  # thời gian render của consumer, không phải thời gian mạng
+    assert results == [(0, "Xin chào"), (1, "Tạm biệt")]
+    assert metrics.counters["tokens.prompt"] == 40
+    assert metrics.counters["tokens.completion"] == 12
+    network = metrics.timers["translate.network"]
+    assert network.count == 1 and network.total < 0.05
+
+
+def test_paragraphs_render_as_they_arrive(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("pdfplumber")
+    from pdf2zh.core import PageCoordinates, render_page_streaming
+    from pdf2zh.images import ImageEmbedder
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "The first paragraph of the page.", fontsize=12)
+    page.insert_text((72, 400), "The second paragraph of the page.", fontsize=12)
+    pc = PageCoordinates.from_page(0, page)
+
+    rendered = []
+
+    class Renderer:
+        def render_page(self, newp, blocks, translations, debug):
+            rendered.extend(translations)
+
+    class Streaming(BaseTranslator):
+        def translate(self, texts, src, tgt):
+            raise AssertionError("should stream")
+
+        def translate_stream(self, texts, src, tgt):
+            for i, t in enumerate(texts):
+                # đoạn trước đã được render trước khi đoạn sau được dịch
+                assert len(rendered) == i
+                yield i, t.upper()
+
+    out = fitz.open()
+    translations = render_page_streaming(
+        out, doc, pc, "vi", Streaming(), Renderer(), ImageEmbedder(doc, out)
+    )
+    assert rendered == translations == [
+        "THE FIRST PARAGRAPH OF THE PAGE.", "THE SECOND PARAGRAPH OF THE PAGE."
+    ]
+    assert len(out) == 1